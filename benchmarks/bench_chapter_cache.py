@@ -0,0 +1,106 @@
+# bench_chapter_cache.py - FULL RENDER VS REPUBLISH AFTER A SMALL EDIT
+#
+# Renders a synthetic biography (benchmarks/synthetic.py) once with an
+# empty chapter cache, then edits one answer in the last chapter and
+# renders again, the way an author republishes. Records both times, the
+# speedup and the hit/miss counts per format. The cache folder is a
+# temporary directory, so the real chapter_cache/ is never touched.
+# Results are saved to benchmarks/results/chapter_cache.json.
+#
+#   python benchmarks/bench_chapter_cache.py
+#   python benchmarks/bench_chapter_cache.py --stories 5000 --formats txt,html,docx
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "chapter_cache.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+
+CACHED_FORMATS = ("txt", "md", "html", "docx", "epub")
+
+
+def edit_last_chapter(stories_data):
+    """Append a sentence to the first answer of the last session"""
+    last_session = max(stories_data["stories"], key=int)
+    questions = stories_data["stories"][last_session]["questions"]
+    question = next(iter(questions))
+    if isinstance(questions[question], dict):
+        questions[question]["answer"] += " And that is how it ended."
+    else:
+        questions[question] += " And that is how it ended."
+
+
+def timed_render(stories_data, fmt, include_questions):
+    import biography_renderers
+    from biography_renderers import chapter_cache
+    chapter_cache.reset_stats()
+    start = time.perf_counter()
+    biography_renderers.render(stories_data, fmt, include_questions)
+    seconds = time.perf_counter() - start
+    return seconds, chapter_cache.stats()["total"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark republishing with the chapter cache.")
+    parser.add_argument("--stories", type=int, default=2000, help="stories in the biography")
+    parser.add_argument("--words", type=int, default=200, help="words per story")
+    parser.add_argument("--formats", default=None, help="comma-separated formats (default: all cached ones available)")
+    parser.add_argument("--interview", action="store_true", help="render with questions (Q&A format)")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/chapter_cache.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["CHAPTER_CACHE_DIR"] = cache_dir
+        import biography_renderers
+        from biography_renderers import chapter_cache
+        from synthetic import synthetic_biography
+
+        available = biography_renderers.available_formats()
+        formats = [f.strip() for f in args.formats.split(",")] if args.formats else \
+            [fmt for fmt in CACHED_FORMATS if fmt in available]
+
+        results = []
+        print(f"{'format':<7}{'full s':>9}{'republish s':>13}{'speedup':>9}{'hits':>7}{'misses':>8}")
+        for fmt in formats:
+            stories_data = synthetic_biography(args.stories, None, args.words)
+            chapter_cache.clear()
+            full, _ = timed_render(stories_data, fmt, args.interview)
+            edit_last_chapter(stories_data)
+            republish, counts = timed_render(stories_data, fmt, args.interview)
+            results.append({
+                "format": fmt,
+                "full_seconds": round(full, 4),
+                "republish_seconds": round(republish, 4),
+                "speedup": round(full / republish, 2),
+                "hits": counts["hits"],
+                "misses": counts["misses"]
+            })
+            print(f"{fmt:<7}{full:>9.3f}{republish:>13.3f}{full / republish:>8.1f}x"
+                  f"{counts['hits']:>7}{counts['misses']:>8}", flush=True)
+        chapter_cache.clear()
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"stories": args.stories, "words": args.words, "interview": args.interview},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
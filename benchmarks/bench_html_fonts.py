@@ -0,0 +1,153 @@
+# bench_html_fonts.py - HTML EXPORT SIZE AND LOAD TIME BY FONT MODE
+#
+# Renders synthetic biographies (benchmarks/synthetic.py) as HTML in each
+# HTML_FONTS mode and records render time, file size (raw and gzipped, as
+# sent by e-mail or a web server), the fonts embedded and the requests the
+# page makes when opened. Results are saved to
+# benchmarks/results/html_fonts.json.
+#
+# Load time is modelled, not measured in a browser: the text of a
+# "google" page waits for the @import'ed stylesheet (a new connection to
+# fonts.googleapis.com: DNS, TCP and TLS round trips, then the request),
+# and its fonts need another connection to fonts.gstatic.com plus their
+# download. Google serves a Latin subset of each face, estimated here by
+# cutting the local font files down to Latin-1 (faces without a local file
+# aren't counted). "local" pages make no requests, nor do "embed" pages
+# once every family is bundled; offline, imported fonts never arrive.
+#
+#   python benchmarks/bench_html_fonts.py
+#   python benchmarks/bench_html_fonts.py --sizes 100,2000 --unicode --rtt-ms 300 --mbps 1.5
+import argparse
+import gzip
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "html_fonts.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+os.environ.setdefault("CHAPTER_CACHE", "off")
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+MODES = ("google", "local", "embed")
+CONNECTION_ROUND_TRIPS = 3   # DNS, TCP, TLS
+LATIN_1 = "".join(chr(c) for c in range(0x20, 0x100)) + "–—‘’“”•…€"
+
+
+def google_font_bytes(families):
+    """Estimated bytes of the Latin subsets Google would serve for these families' faces"""
+    from biography_renderers import web_fonts
+    total = 0
+    for family, _, stem in web_fonts.FACES:
+        path = web_fonts.font_path(stem)
+        if path and family in families:
+            total += len(web_fonts._subset(path, os.path.getmtime(path), LATIN_1, "woff2"))
+    return total
+
+
+def load_model(imports, gzip_bytes, font_bytes, rtt_ms, bytes_per_ms):
+    """(ms until text shows, ms until the book's fonts show, requests) for a page fetched over the network"""
+    download = gzip_bytes / bytes_per_ms
+    if not imports:
+        return download, download, 0
+    stylesheet = (CONNECTION_ROUND_TRIPS + 1) * rtt_ms
+    fonts = (CONNECTION_ROUND_TRIPS + 1) * rtt_ms + font_bytes / bytes_per_ms
+    return download + stylesheet, download + stylesheet + fonts, 1 + 3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HTML export's font modes.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated story counts")
+    parser.add_argument("--words", type=int, default=200, help="words per story")
+    parser.add_argument("--unicode", action="store_true", help="mix accented, CJK, RTL and emoji text in")
+    parser.add_argument("--interview", action="store_true", help="render with questions (Q&A format)")
+    parser.add_argument("--rtt-ms", type=float, default=100.0, help="modelled round trip time")
+    parser.add_argument("--mbps", type=float, default=10.0, help="modelled bandwidth in megabits per second")
+    parser.add_argument("--note", default="", help="saved with the results (e.g. which font files were used)")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/html_fonts.json")
+    args = parser.parse_args(argv)
+
+    from biography_renderers import html_format, web_fonts
+    from synthetic import synthetic_biography
+
+    embeddable = web_fonts.embeddable_families()
+    if not embeddable:
+        print(f"No fonts to embed: install fonttools and brotli and put the font files in {web_fonts.FONT_DIR}")
+        return 1
+
+    bytes_per_ms = args.mbps * 1e6 / 8 / 1000
+    all_families = {family for family, _, _ in web_fonts.FACES}
+    google_fonts = google_font_bytes(all_families)
+    imported_fonts = {"google": google_fonts, "embed": google_font_bytes(all_families - embeddable)}
+    fonts = {stem: os.path.getsize(web_fonts.font_path(stem)) for _, _, stem in web_fonts.FACES
+             if web_fonts.font_path(stem)}
+    print(f"Font files: {fonts}; embeddable: {sorted(embeddable)}; Google Latin subsets ~{google_fonts:,} bytes")
+
+    results = []
+    print(f"{'mode':<8}{'stories':>9}{'render s':>10}{'KB':>10}{'gzip KB':>9}{'fonts KB':>10}"
+          f"{'text ms':>9}{'fonts ms':>10}{'offline fonts':>15}")
+    for stories in sorted(int(s) for s in args.sizes.split(",") if s.strip()):
+        stories_data = synthetic_biography(stories, None, args.words, args.unicode)
+        for mode in MODES:
+            web_fonts._subset.cache_clear()
+            start = time.perf_counter()
+            html = html_format.create_html_biography(stories_data, args.interview, fonts=mode)[0].encode("utf-8")
+            seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            html_format.create_html_biography(stories_data, args.interview, fonts=mode)
+            republish_seconds = time.perf_counter() - start
+
+            packed = len(gzip.compress(html, 6))
+            style = html[html.index(b"<style>"):html.index(b"</style>")]
+            embedded = sum(len(part.split(b")")[0]) * 3 // 4 for part in style.split(b"base64,")[1:])
+            imports = b"@import" in style
+            text_ms, fonts_ms, requests = load_model(imports, packed, imported_fonts.get(mode, 0), args.rtt_ms, bytes_per_ms)
+            offline = mode == "embed" and not imports
+            results.append({
+                "mode": mode,
+                "stories": stories,
+                "render_seconds": round(seconds, 4),
+                "republish_seconds": round(republish_seconds, 4),
+                "bytes": len(html),
+                "gzip_bytes": packed,
+                "embedded_font_bytes": embedded,
+                "requests": requests,
+                "modelled_text_ms": round(text_ms, 1),
+                "modelled_fonts_ms": round(fonts_ms, 1),
+                "fonts_offline": offline
+            })
+            print(f"{mode:<8}{stories:>9,}{seconds:>10.3f}{len(html) / 1e3:>10.1f}{packed / 1e3:>9.1f}"
+                  f"{embedded / 1e3:>10.1f}{text_ms:>9.0f}{fonts_ms:>10.0f}{'yes' if offline else 'no':>15}", flush=True)
+
+    stylesheet = {"bytes": len(html_format.STYLESHEET.encode("utf-8")),
+                  "minified_bytes": len(html_format.MINIFIED_STYLESHEET.encode("utf-8"))}
+    print(f"Stylesheet: {stylesheet['bytes']:,} -> {stylesheet['minified_bytes']:,} bytes minified")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"words": args.words, "unicode": args.unicode, "interview": args.interview,
+                            "rtt_ms": args.rtt_ms, "mbps": args.mbps},
+                "note": args.note,
+                "font_files": fonts,
+                "embedded_families": sorted(embeddable),
+                "google_font_bytes_estimate": google_fonts,
+                "stylesheet": stylesheet,
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# bench_ingest.py - PUBLISHER INGESTION: TIME AND PEAK MEMORY, OLD VS STREAMING
+#
+# Feeds the publisher's three inputs (an uploaded file, a legacy ?data=
+# link, a ?sync= link) to the old whole-payload decoding (json.load,
+# b64decode + json.loads, zlib.decompress + json.loads) and to ingest.py,
+# recording time and tracemalloc peak. Valid synthetic biographies
+# (benchmarks/synthetic.py) come first, then hostile inputs: an endless
+# upload, a zip bomb in a sync link and a flood of tiny values. The old
+# decoding is only run on hostile inputs it can survive. Results are
+# saved to benchmarks/results/ingest.json.
+#
+#   python benchmarks/bench_ingest.py
+#   python benchmarks/bench_ingest.py --sizes 100,1000 --no-save
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import zlib
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "ingest.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+
+DEFAULT_SIZES = (100, 1000, 5000)
+BOMB_BYTES = 200 * 1024 * 1024
+
+
+class EndlessUpload:
+    """A file that never ends, made up as it is read"""
+
+    def __init__(self):
+        self.started = False
+
+    def read(self, size):
+        if not self.started:
+            self.started = True
+            return b'{"stories": "'
+        return b"x" * size
+
+
+def measure(function, *args):
+    """(seconds, peak MB, error message or None); peak comes from a second, traced run"""
+    start = time.perf_counter()
+    try:
+        function(*args)
+        error = None
+    except ValueError as e:
+        error = str(e)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        function(*args)
+    except ValueError:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1e6, error
+
+
+def sync_token(raw):
+    return base64.urlsafe_b64encode(zlib.compress(raw, 9)).decode("ascii").rstrip("=")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the publisher's JSON ingestion.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated story counts")
+    parser.add_argument("--words", type=int, default=300, help="words per story")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/ingest.json")
+    args = parser.parse_args(argv)
+
+    import ingest
+    from synthetic import synthetic_biography
+
+    cases = []
+    for stories in sorted(int(s) for s in args.sizes.split(",") if s.strip()):
+        raw = json.dumps(synthetic_biography(stories, None, args.words)).encode("utf-8")
+        encoded = base64.b64encode(raw).decode("ascii")
+        token = sync_token(raw)
+        cases += [
+            (f"upload {stories} stories", len(raw),
+             lambda raw=raw: json.load(io.BytesIO(raw)), lambda raw=raw: ingest.load_stories(io.BytesIO(raw))),
+            (f"?data= {stories} stories", len(raw),
+             lambda e=encoded: json.loads(base64.b64decode(e).decode()), lambda e=encoded: ingest.decode_base64(e)),
+            (f"?sync= {stories} stories", len(raw),
+             lambda t=token: json.loads(zlib.decompress(base64.urlsafe_b64decode(t + "=" * (-len(t) % 4)))),
+             lambda t=token: ingest.decode_compressed(t)),
+        ]
+
+    bomb = sync_token(b'{"v": 1, "stories": "' + b"x" * BOMB_BYTES + b'"}')
+    flood = sync_token(b'{"v": 1, "stories": {}, "a": [' + b"1," * (BOMB_BYTES // 20) + b"1]}")
+    cases += [
+        ("endless upload", None, None, lambda: ingest.load_stories(EndlessUpload())),
+        (f"?sync= bomb ({BOMB_BYTES // 2**20} MB text, {len(bomb) // 1000} KB link)", BOMB_BYTES,
+         lambda: json.loads(zlib.decompress(base64.urlsafe_b64decode(bomb + "=" * (-len(bomb) % 4)))),
+         lambda: ingest.decode_compressed(bomb)),
+        (f"?sync= flood ({BOMB_BYTES // 20 // 1_000_000}M numbers, {len(flood) // 1000} KB link)", BOMB_BYTES // 10,
+         lambda: json.loads(zlib.decompress(base64.urlsafe_b64decode(flood + "=" * (-len(flood) % 4)))),
+         lambda: ingest.decode_compressed(flood)),
+    ]
+
+    results = []
+    print(f"{'input':<44}{'MB':>8}{'old s':>9}{'old peak MB':>13}{'new s':>9}{'new peak MB':>13}  refused with")
+    for name, size, old, new in cases:
+        old_seconds, old_peak, _ = measure(old) if old else (None, None, None)
+        new_seconds, new_peak, error = measure(new)
+        results.append({
+            "input": name,
+            "json_mb": round(size / 1e6, 2) if size else None,
+            "old_seconds": round(old_seconds, 4) if old else None,
+            "old_peak_mb": round(old_peak, 2) if old else None,
+            "seconds": round(new_seconds, 4),
+            "peak_mb": round(new_peak, 2),
+            "refused": error
+        })
+        print(f"{name:<44}{(size or 0) / 1e6:>8.1f}"
+              f"{old_seconds if old else float('nan'):>9.3f}{old_peak if old else float('nan'):>13.1f}"
+              f"{new_seconds:>9.3f}{new_peak:>13.1f}  {error or '-'}", flush=True)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"words": args.words, "max_mb": ingest.MAX_UPLOAD_MB, "max_stories": ingest.MAX_STORIES},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
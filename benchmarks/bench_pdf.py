@@ -0,0 +1,108 @@
+# bench_pdf.py - PAGES PER SECOND AND PEAK MEMORY OF THE STREAMING PDF WRITER
+#
+# Writes synthetic biographies (benchmarks/synthetic.py) of increasing size
+# straight to a temporary file with biography_renderers.render_to, the way
+# export jobs do, and records pages/sec and tracemalloc peak. Peak memory
+# should stay roughly flat as the page count grows; --check fails if the
+# largest size needs more than PEAK_GROWTH_LIMIT times the smallest's peak.
+# Results are saved to benchmarks/results/pdf.json.
+#
+#   python benchmarks/bench_pdf.py                        # 100 .. 2,000 stories (~50 .. ~1,000 pages)
+#   python benchmarks/bench_pdf.py --sizes 200,1000 --check
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "pdf.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+
+DEFAULT_SIZES = (100, 500, 1000, 2000)
+PEAK_GROWTH_LIMIT = 3.0   # largest size's peak vs smallest's, for a 20x bigger book
+
+
+def measure(stories_data, include_questions):
+    """(seconds, pages, peak traced bytes, file bytes) for one streamed render"""
+    from biography_renderers import write_pdf_biography
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "book.pdf")
+
+        gc.collect()
+        tracemalloc.start()
+        with open(path, "wb") as f:
+            write_pdf_biography(f, stories_data, include_questions)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            size, pages = write_pdf_biography(f, stories_data, include_questions)[:2]
+        seconds = time.perf_counter() - start
+    return seconds, pages, peak, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the streaming PDF writer on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated story counts")
+    parser.add_argument("--words", type=int, default=200, help="words per story")
+    parser.add_argument("--unicode", action="store_true", help="mix accented, CJK, RTL and emoji text in")
+    parser.add_argument("--interview", action="store_true", help="render with questions (Q&A format)")
+    parser.add_argument("--check", action="store_true", help="fail if peak memory grows with the page count")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/pdf.json")
+    args = parser.parse_args(argv)
+
+    from synthetic import synthetic_biography
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    results = []
+    print(f"{'stories':>9}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'peak MB':>10}{'output MB':>11}")
+    for stories in sizes:
+        stories_data = synthetic_biography(stories, None, args.words, args.unicode)
+        seconds, pages, peak, size = measure(stories_data, args.interview)
+        results.append({
+            "stories": stories,
+            "pages": pages,
+            "seconds": round(seconds, 4),
+            "pages_per_second": round(pages / seconds, 1),
+            "peak_mb": round(peak / 1e6, 2),
+            "output_mb": round(size / 1e6, 2)
+        })
+        print(f"{stories:>9,}{pages:>8,}{seconds:>10.3f}{pages / seconds:>10.1f}"
+              f"{peak / 1e6:>10.2f}{size / 1e6:>11.2f}", flush=True)
+        del stories_data
+
+    exit_code = 0
+    if args.check and len(results) >= 2:
+        growth = results[-1]["peak_mb"] / max(results[0]["peak_mb"], 0.01)
+        print(f"\npeak memory x{growth:.1f} from {results[0]['pages']:,} to {results[-1]['pages']:,} pages")
+        if growth > PEAK_GROWTH_LIMIT:
+            print(f"FAIL peak memory grows with the document (limit x{PEAK_GROWTH_LIMIT})")
+            exit_code = 1
+
+    if not args.no_save and exit_code == 0:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"words": args.words, "unicode": args.unicode, "interview": args.interview},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# bench_renderers.py - TIME AND PEAK MEMORY OF EACH BIOGRAPHY FORMAT BY SIZE
+#
+# Renders synthetic biographies (benchmarks/synthetic.py) of increasing size
+# through biography_renderers and records wall time and tracemalloc peak per
+# format. Results are saved to benchmarks/results/renderers.json.
+#
+# --check fits time against story count between the two largest sizes and
+# fails if any format grows faster than SCALING_LIMIT (1.0 is linear, 2.0 is
+# quadratic), so a loop like all_stories.index() inside the story loop is
+# caught on any machine. It also warns when a size got much slower than the
+# saved baseline.
+#
+#   python benchmarks/bench_renderers.py                      # 10 .. 50,000 stories
+#   python benchmarks/bench_renderers.py --sizes 500,2000,8000 --check
+#   python benchmarks/bench_renderers.py --formats html --unicode --legacy 0.3
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "renderers.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+os.environ.setdefault("CHAPTER_CACHE", "off")   # repeated renders would otherwise all be cache hits
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 50000)
+SCALING_LIMIT = 1.5       # max log-log slope of time vs stories (allocator noise reaches ~1.35)
+BASELINE_SLOWDOWN = 2.0   # warn when a size is this much slower than the saved run
+MIN_TIMED_SECONDS = 0.2   # repeat small renders until at least this long
+
+
+def measure(stories_data, fmt, include_questions):
+    """(seconds per render, peak traced bytes, output bytes) for one format"""
+    import biography_renderers
+
+    # Traced run first: it also warms the allocator, so the timed runs below
+    # don't pay for first-touch page faults on large outputs
+    gc.collect()
+    tracemalloc.start()
+    biography_renderers.render(stories_data, fmt, include_questions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Time without tracemalloc, repeating small renders for a stable number
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        data = biography_renderers.render(stories_data, fmt, include_questions)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIMED_SECONDS:
+            break
+    seconds = elapsed / runs
+    size = len(data)
+    del data
+    return seconds, peak, size
+
+
+def scaling_exponent(rows):
+    """Log-log slope of seconds vs stories between the two largest sizes"""
+    rows = sorted(rows, key=lambda r: r["stories"])
+    if len(rows) < 2:
+        return None
+    small, large = rows[-2], rows[-1]
+    if small["seconds"] <= 0 or large["stories"] == small["stories"]:
+        return None
+    return math.log(large["seconds"] / small["seconds"]) / math.log(large["stories"] / small["stories"])
+
+
+def check(results, baseline):
+    """Failures (superlinear formats) and warnings (slower than baseline)"""
+    failures = []
+    warnings = []
+    for fmt, rows in results.items():
+        exponent = scaling_exponent(rows)
+        if exponent is not None and exponent > SCALING_LIMIT:
+            failures.append(f"{fmt}: time grows as stories^{exponent:.2f} (limit {SCALING_LIMIT})")
+
+        previous = {r["stories"]: r for r in (baseline or {}).get(fmt, [])}
+        for row in rows:
+            old = previous.get(row["stories"])
+            if old and row["seconds"] > old["seconds"] * BASELINE_SLOWDOWN:
+                warnings.append(f"{fmt} @ {row['stories']:,} stories: {row['seconds']:.3f}s vs {old['seconds']:.3f}s saved")
+    return failures, warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the biography renderers on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated story counts")
+    parser.add_argument("--formats", default=None, help="comma-separated formats (default: all available)")
+    parser.add_argument("--words", type=int, default=200, help="words per story")
+    parser.add_argument("--sessions", type=int, default=None, help="chapters (default: scales with size)")
+    parser.add_argument("--unicode", action="store_true", help="mix accented, CJK, RTL and emoji text in")
+    parser.add_argument("--legacy", type=float, default=0.1, help="fraction of bare-string legacy answers")
+    parser.add_argument("--interview", action="store_true", help="render with questions (Q&A format)")
+    parser.add_argument("--check", action="store_true", help="fail on superlinear scaling; compare with saved results")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/renderers.json")
+    args = parser.parse_args(argv)
+
+    import biography_renderers
+    from synthetic import synthetic_biography
+
+    sizes = sorted(int(s) for s in args.sizes.split(",") if s.strip())
+    formats = [f.strip() for f in args.formats.split(",")] if args.formats else biography_renderers.available_formats()
+
+    baseline = None
+    if args.check and os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results")
+
+    results = {fmt: [] for fmt in formats}
+    print(f"{'format':<7}{'stories':>9}{'seconds':>11}{'µs/story':>11}{'peak MB':>10}{'output MB':>11}")
+    for stories in sizes:
+        stories_data = synthetic_biography(stories, args.sessions, args.words, args.unicode, args.legacy)
+        for fmt in formats:
+            seconds, peak, size = measure(stories_data, fmt, args.interview)
+            results[fmt].append({
+                "stories": stories,
+                "seconds": round(seconds, 5),
+                "peak_mb": round(peak / 1e6, 2),
+                "output_mb": round(size / 1e6, 2)
+            })
+            print(f"{fmt:<7}{stories:>9,}{seconds:>11.4f}{seconds / stories * 1e6:>11.1f}"
+                  f"{peak / 1e6:>10.1f}{size / 1e6:>11.2f}", flush=True)
+        del stories_data
+
+    print()
+    for fmt, rows in results.items():
+        exponent = scaling_exponent(rows)
+        if exponent is not None:
+            print(f"{fmt}: time ~ stories^{exponent:.2f}")
+
+    exit_code = 0
+    if args.check:
+        failures, warnings = check(results, baseline)
+        for warning in warnings:
+            print(f"WARNING {warning}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+        exit_code = 1 if failures else 0
+
+    if not args.no_save and exit_code == 0:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"words": args.words, "sessions": args.sessions, "unicode": args.unicode,
+                            "legacy": args.legacy, "interview": args.interview},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# bench_retrieval.py - LATENCY OF THE RELATED-PASSAGE RETRIEVAL INDEX
+#
+# Builds retrieval.PassageIndex over synthetic answers (benchmarks/synthetic.py)
+# and records build time, per-save update latency and per-reply query latency
+# (p50/p95/p99) plus index memory. Results are saved to
+# benchmarks/results/retrieval.json.
+#
+# The synthetic vocabulary is tiny, so almost every query term appears in
+# almost every passage: those numbers are a worst case for real answers.
+# Each size is also run with words drawn from a Zipf-distributed vocabulary
+# (--vocabulary words, like real prose), where a query only touches the
+# passages that share its terms.
+#
+#   python benchmarks/bench_retrieval.py                  # 10,000 passages
+#   python benchmarks/bench_retrieval.py --passages 1000,10000,50000 --queries 500
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "retrieval.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("TRACE_EXPORTER", "off")
+
+DEFAULT_PASSAGES = (10000,)
+DEFAULT_VOCABULARY = 20000
+QUERY_WORDS = 60   # a typical chat answer plus the topic question
+ZIPF_EXPONENT = 1.1
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary_ms(samples):
+    return {
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3)
+    }
+
+
+def zipf_sampler(vocabulary, rng):
+    """Draw n words from a Zipf-distributed vocabulary of `vocabulary` distinct words"""
+    words = [f"w{rank}" for rank in range(vocabulary)]
+    cumulative = []
+    total = 0.0
+    for rank in range(1, vocabulary + 1):
+        total += rank ** -ZIPF_EXPONENT
+        cumulative.append(total)
+    return lambda n: rng.choices(words, cum_weights=cumulative, k=n)
+
+
+def run(passages, queries, seed=0, vocabulary=None):
+    """Build, update and query an index of `passages` one-passage answers"""
+    import retrieval
+    from synthetic import WORDS, synthetic_biography
+
+    rng = random.Random(seed)
+    data = synthetic_biography(passages, words_per_story=retrieval.PASSAGE_WORDS, seed=seed)
+    answers = [(int(session_id), question, answer["answer"] if isinstance(answer, dict) else answer)
+               for session_id, session in data["stories"].items()
+               for question, answer in session["questions"].items()]
+    del data
+    if vocabulary:
+        sample = zipf_sampler(vocabulary, rng)
+        answers = [(session_id, question, " ".join(sample(len(answer.split()))))
+                   for session_id, question, answer in answers]
+    else:
+        sample = lambda n: [rng.choice(WORDS) for _ in range(n)]
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = retrieval.PassageIndex()
+    for session_id, question, answer in answers:
+        index.update_answer(session_id, question, answer)
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    update_samples = []
+    query_samples = []
+    for _ in range(queries):
+        session_id, question, answer = rng.choice(answers)
+        words = answer.split()
+        rng.shuffle(words)
+        start = time.perf_counter()
+        index.update_answer(session_id, question, " ".join(words))
+        update_samples.append(time.perf_counter() - start)
+
+        query = " ".join(sample(QUERY_WORDS))
+        start = time.perf_counter()
+        index.search(query, retrieval.TOP_K, exclude=(session_id, question))
+        query_samples.append(time.perf_counter() - start)
+
+    return {
+        "vocabulary": f"zipf {vocabulary:,}" if vocabulary else "synthetic",
+        "passages": len(index.passages),
+        "terms": len(index.postings),
+        "build_seconds": round(build_seconds, 3),
+        "index_mb": round(peak / 1e6, 1),
+        "update": summary_ms(update_samples),
+        "query": summary_ms(query_samples)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval index on synthetic answers.")
+    parser.add_argument("--passages", default=",".join(str(p) for p in DEFAULT_PASSAGES), help="comma-separated passage counts")
+    parser.add_argument("--queries", type=int, default=200, help="updates and queries timed per size")
+    parser.add_argument("--vocabulary", type=int, default=DEFAULT_VOCABULARY,
+                        help="distinct words in the Zipf run (0 to skip it)")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/retrieval.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'vocabulary':>12}{'passages':>9}{'build s':>9}{'index MB':>10}{'update p50':>12}{'query p50':>11}{'p95':>9}{'p99':>9}")
+    vocabularies = (None, args.vocabulary) if args.vocabulary else (None,)
+    for passages in sorted(int(p) for p in args.passages.split(",") if p.strip()):
+        for vocabulary in vocabularies:
+            row = run(passages, args.queries, vocabulary=vocabulary)
+            results.append(row)
+            print(f"{row['vocabulary']:>12}{row['passages']:>9,}{row['build_seconds']:>9.2f}{row['index_mb']:>10.1f}"
+                  f"{row['update']['p50_ms']:>10.2f}ms{row['query']['p50_ms']:>9.2f}ms"
+                  f"{row['query']['p95_ms']:>7.2f}ms{row['query']['p99_ms']:>7.2f}ms", flush=True)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"queries": args.queries, "query_words": QUERY_WORDS, "zipf_exponent": ZIPF_EXPONENT},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
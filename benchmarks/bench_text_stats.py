@@ -0,0 +1,125 @@
+# bench_text_stats.py - WORD COUNTING: PER-CALLER PASSES VS text_stats
+#
+# Times the word counting an interview-app rerun and a publish do, the old
+# way and through text_stats.py, on synthetic biographies
+# (benchmarks/synthetic.py). The old rerun counted every answer with
+# re.findall(r'\w+') twice (sidebar and footer totals) plus the current
+# session for the progress bar; the old publish split every answer for the
+# header, again for the statistics page, and a third time in the
+# max(..., key=len(split())) pass for "Longest Story". text_stats is timed
+# cold (first rerun or publish after a start) and warm (every one after,
+# with at most a few answers changed). Results are saved to
+# benchmarks/results/text_stats.json.
+#
+#   python benchmarks/bench_text_stats.py
+#   python benchmarks/bench_text_stats.py --sizes 100,1000 --no-save
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "text_stats.json")
+
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = (100, 1000, 5000)
+REPEATS = 5
+
+
+def best_of(function):
+    """Fastest of REPEATS runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def old_rerun(sessions):
+    totals = [sum(len(re.findall(r'\w+', answer)) for answer in answers) for answers in sessions]
+    sidebar, footer = sum(totals), sum(totals)
+    progress = sum(len(re.findall(r'\w+', answer)) for answer in sessions[0])
+    return sidebar, footer, progress
+
+
+def new_rerun(sessions):
+    import text_stats
+    totals = [sum(text_stats.word_count(answer) for answer in answers) for answers in sessions]
+    sidebar, footer = sum(totals), sum(totals)
+    progress = sum(text_stats.word_count(answer) for answer in sessions[0])
+    return sidebar, footer, progress
+
+
+def old_publish(stories):
+    header = sum(len(answer.split()) for _, answer in stories)
+    stats_page = sum(len(answer.split()) for _, answer in stories)
+    longest = max(stories, key=lambda x: len(x[1].split()))
+    return header, stats_page, longest[0]
+
+
+def new_publish(stories):
+    import text_stats
+    header = text_stats.summarize(stories)
+    stats_page = text_stats.summarize(stories)
+    return header.words, stats_page.words, stats_page.longest[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark word counting in the apps.")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="comma-separated story counts")
+    parser.add_argument("--words", type=int, default=300, help="words per story")
+    parser.add_argument("--no-save", action="store_true", help="don't overwrite benchmarks/results/text_stats.json")
+    args = parser.parse_args(argv)
+
+    import text_stats
+    from synthetic import synthetic_biography
+
+    results = []
+    print(f"{'stories':>8}{'task':>9}{'old ms':>10}{'cold ms':>10}{'warm ms':>10}{'warm speedup':>14}")
+    for stories in sorted(int(s) for s in args.sizes.split(",") if s.strip()):
+        payload = synthetic_biography(stories, None, args.words)
+        sessions = [[answer["answer"] for answer in session["questions"].values()] for session in payload["stories"].values()]
+        pairs = [(question, answer["answer"]) for session in payload["stories"].values()
+                 for question, answer in session["questions"].items()]
+
+        for task, old, new, data in (("rerun", old_rerun, new_rerun, sessions), ("publish", old_publish, new_publish, pairs)):
+            old_ms = best_of(lambda: old(data))
+            cold = float("inf")
+            for _ in range(REPEATS):
+                text_stats.clear()
+                start = time.perf_counter()
+                new(data)
+                cold = min(cold, time.perf_counter() - start)
+            warm_ms = best_of(lambda: new(data))
+            results.append({
+                "stories": stories,
+                "task": task,
+                "old_ms": round(old_ms, 3),
+                "cold_ms": round(cold * 1000, 3),
+                "warm_ms": round(warm_ms, 3),
+            })
+            print(f"{stories:>8,}{task:>9}{old_ms:>10.2f}{cold * 1000:>10.2f}{warm_ms:>10.2f}{old_ms / warm_ms:>13.1f}x", flush=True)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "options": {"words": args.words, "repeats": REPEATS, "cache_entries": text_stats.CACHE_ENTRIES},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# import_time.py - COLD-START IMPORT COST OF BOTH APPS (python -X importtime)
+#
+# Each scenario runs in a fresh interpreter with -X importtime. Streamlit is
+# imported first in every scenario and excluded, since both apps always pay
+# for it; what is left is the cost of each app's own top-level imports.
+# "eager" adds back the modules that are now imported on first use.
+#
+#   python benchmarks/import_time.py            # print and save results
+#   python benchmarks/import_time.py --runs 9
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "import_time.json")
+MARK = "@@IMPORTS-START"
+
+INTERVIEW_APP = "import json, datetime, os, re, hashlib; import usage_meter, tracing, rerun_profiler"
+PUBLISHER_APP = "import json, base64, time; import biography_renderers"
+
+# Deferred by the lazy-import change: the OpenAI client, SQLite, python-docx
+# and the tracing exporter's HTTP modules
+INTERVIEW_DEFERRED = "import sqlite3, urllib.request, http.server; from openai import OpenAI"
+PUBLISHER_DEFERRED = ("from docx import Document; from docx.shared import Inches, Pt, RGBColor; "
+                      "from docx.enum.text import WD_ALIGN_PARAGRAPH; from docx.enum.style import WD_STYLE_TYPE")
+
+SCENARIOS = {
+    "interview_app_eager": f"{INTERVIEW_APP}; {INTERVIEW_DEFERRED}",
+    "interview_app_lazy": INTERVIEW_APP,
+    "publisher_eager": f"{PUBLISHER_APP}; {PUBLISHER_DEFERRED}",
+    "publisher_lazy": PUBLISHER_APP,
+}
+
+
+def measure(statement):
+    """Cumulative microseconds of top-level imports made by `statement`, plus the slowest modules"""
+    code = f"import streamlit, sys; sys.stderr.write('{MARK}\\n'); {statement}"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    lines = proc.stderr.splitlines()
+    lines = lines[lines.index(MARK) + 1:]
+
+    total_us = 0
+    modules = []
+    for line in lines:
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue
+        # Top-level imports are the ones without extra indentation
+        name = parts[2].rstrip()
+        if name.startswith(" ") and not name.startswith("  "):
+            total_us += cumulative_us
+            modules.append((cumulative_us, name.strip()))
+    return total_us, sorted(modules, reverse=True)[:5]
+
+
+def run(runs):
+    results = {}
+    for name, statement in SCENARIOS.items():
+        samples = []
+        heaviest = []
+        for _ in range(runs):
+            total_us, heaviest = measure(statement)
+            samples.append(total_us)
+        results[name] = {
+            "median_ms": round(statistics.median(samples) / 1000, 1),
+            "min_ms": round(min(samples) / 1000, 1),
+            "heaviest": [{"module": m, "ms": round(us / 1000, 1)} for us, m in heaviest]
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of both apps.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per scenario")
+    parser.add_argument("--no-save", action="store_true", help="print only; don't update the results file")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+
+    print(f"{'scenario':<24}{'median ms':>12}{'min ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['median_ms']:>12}{r['min_ms']:>10}")
+    for app in ("interview_app", "publisher"):
+        eager = results[f"{app}_eager"]["median_ms"]
+        lazy = results[f"{app}_lazy"]["median_ms"]
+        if eager:
+            print(f"{app}: {eager - lazy:.1f} ms saved per cold start ({(eager - lazy) / eager:.0%})")
+
+    if not args.no_save:
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "measured": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "runs": args.runs,
+                "results": results
+            }, f, indent=2)
+            f.write("\n")
+        print(f"Saved {os.path.relpath(RESULTS_PATH, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+# load_test.py - HOW MANY SIMULTANEOUS AUTHORS CAN ONE deepseek.py PROCESS SERVE?
+#
+# Starts the interview app and the publisher with `streamlit run`, pointed at
+# a local mock OpenAI endpoint (benchmarks/mock_openai.py), then drives them
+# headlessly over Streamlit's websocket protocol, the way browser tabs do.
+# Each simulated author signs in, answers topics, edits an answer, moves
+# between topics and sessions, and exports through the publisher link.
+#
+# Authors are added in steps; the step after which throughput stops growing
+# is reported as the saturation point. Memory per session is the server's
+# RSS growth divided by the number of connected authors (Linux only).
+#
+#   python benchmarks/load_test.py                          # ramp 1,2,4,8,16
+#   python benchmarks/load_test.py --users 1,8,32,64 --latency-ms 800 --answers 5
+#
+# AppTest is not used here: it keeps the runtime in a process-wide global,
+# so it can only run one session at a time.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_PATH = os.path.join(REPO_ROOT, "benchmarks", "results", "load_test.json")
+INTERVIEW_APP = os.path.join(REPO_ROOT, "deepseek.py")
+PUBLISHER_APP = os.path.join(REPO_ROOT, "biography_publisher.py")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Throughput must grow by at least this much per step to count as scaling
+SATURATION_GAIN = 1.10
+RUN_TIMEOUT_SECONDS = 120
+SERVER_START_TIMEOUT = 60
+
+ANSWERS = [
+    "I grew up in a small terraced house near the docks, and the smell of salt and diesel was everywhere.",
+    "My grandmother baked bread every Sunday; we fought over the crust while it was still too hot to hold.",
+    "School was a long walk along the canal, and in winter the towpath froze so hard we slid most of the way.",
+    "The first time I saw the sea properly I was seven, and I remember being angry nobody had told me it moved.",
+    "My father fixed radios in the back room, so there was always a hum of valves warming up behind the door.",
+]
+
+
+# ============================================================================
+# STREAMLIT SERVERS
+# ============================================================================
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(script, workdir, env):
+    """`streamlit run` the script headless on a free port; returns (process, port)"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script,
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false",
+         "--logger.level", "error"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{os.path.basename(script)} exited: {process.stderr.read().decode()[-2000:]}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{os.path.basename(script)} did not start within {SERVER_START_TIMEOUT}s")
+
+
+def rss_kb(pid):
+    """Resident set size of a process from /proc, or None off Linux"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# ============================================================================
+# HEADLESS BROWSER SESSION
+# ============================================================================
+class HeadlessSession:
+    """One browser tab: sends BackMsg reruns and reads ForwardMsgs until the run finishes"""
+
+    def __init__(self, port, query_string=""):
+        self.url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.query_string = query_string
+        self.connection = None
+        self.widgets = {}        # key or label -> (widget proto, fragment_id)
+        self.values = {}         # widget id -> WidgetState kept across reruns
+        self.exceptions = []
+
+    async def connect(self):
+        from websockets.asyncio.client import connect
+        self.connection = await connect(self.url, max_size=None, open_timeout=RUN_TIMEOUT_SECONDS)
+        await self._rerun([])
+
+    async def close(self):
+        if self.connection is not None:
+            await self.connection.close()
+
+    def _remember(self, element, fragment_id):
+        kind = element.WhichOneof("type")
+        widget = getattr(element, kind) if kind else None
+        if kind == "exception":
+            self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+            return
+        if kind == "link_button":
+            self.widgets[widget.label] = (widget, fragment_id)
+            return
+        widget_id = getattr(widget, "id", "")
+        if not widget_id:
+            return
+        # Keyed widget ids end in "-<key>"; keyless ones are found by label
+        if "-" in widget_id and widget_id.startswith("$$ID"):
+            self.widgets[widget_id.split("-", 2)[-1]] = (widget, fragment_id)
+        label = getattr(widget, "label", "") or getattr(widget, "placeholder", "")
+        if label:
+            self.widgets[label] = (widget, fragment_id)
+
+    async def _rerun(self, states, fragment_id=""):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        sent = {state.id for state in states}
+        for state in list(states) + [v for k, v in self.values.items() if k not in sent]:
+            msg.rerun_script.widget_states.widgets.append(state)
+        await self.connection.send(msg.SerializeToString())
+
+        deadline = time.monotonic() + RUN_TIMEOUT_SECONDS
+        while True:
+            raw = await asyncio.wait_for(self.connection.recv(), max(0.1, deadline - time.monotonic()))
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._remember(forward.delta.new_element, forward.delta.fragment_id)
+            elif kind == "page_info_changed":
+                self.query_string = forward.page_info_changed.query_string
+            elif kind == "script_finished":
+                if forward.script_finished in (ForwardMsg.FINISHED_SUCCESSFULLY,
+                                               ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY):
+                    return
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise RuntimeError("script failed to compile")
+                # FINISHED_EARLY_FOR_RERUN: st.rerun() - keep reading
+
+    def find(self, name):
+        """Widget proto by key, key prefix or label"""
+        if name in self.widgets:
+            return self.widgets[name]
+        for key, found in self.widgets.items():
+            if key.startswith(name):
+                return found
+        raise LookupError(f"no widget {name!r} on the page")
+
+    async def click(self, name, **values):
+        """Press a button; values are {widget name: string} sent with the same rerun"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        button, fragment_id = self.find(name)
+        states = []
+        for value_name, value in values.items():
+            widget, _ = self.find(value_name)
+            state = WidgetState(id=widget.id, string_value=value)
+            self.values[widget.id] = state
+            states.append(state)
+        states.append(WidgetState(id=button.id, trigger_value=True))
+        await self._rerun(states, fragment_id)
+
+    async def wait_for(self, name, poll_seconds=0.5):
+        """Rerun until a widget appears, as the browser does for an st.fragment(run_every=...)"""
+        deadline = time.monotonic() + RUN_TIMEOUT_SECONDS
+        while name not in self.widgets:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{name!r} did not appear within {RUN_TIMEOUT_SECONDS}s")
+            await asyncio.sleep(poll_seconds)
+            await self._rerun([])
+
+    async def select(self, name, option_index):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget, fragment_id = self.find(name)
+        state = WidgetState(id=widget.id, string_value=widget.options[option_index])
+        self.values[widget.id] = state
+        await self._rerun([state], fragment_id)
+
+    async def chat(self, text):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget, fragment_id = self.find("Type your answer here...")
+        state = WidgetState(id=widget.id)
+        state.chat_input_value.data = text
+        await self._rerun([state], fragment_id)
+
+
+# ============================================================================
+# ONE SIMULATED AUTHOR
+# ============================================================================
+async def run_journey(index, answers, ports, timings, errors):
+    """Sign in, answer, edit, navigate and export as one author"""
+    name = f"Load Author {index:03d}"
+    app = HeadlessSession(ports["interview"])
+    publisher = None
+
+    async def timed(interaction, action):
+        start = time.perf_counter()
+        await action
+        timings.append((interaction, (time.perf_counter() - start) * 1000))
+        if app.exceptions:
+            raise RuntimeError(f"{interaction}: {app.exceptions[0]}")
+
+    try:
+        await timed("open_app", app.connect())
+        await timed("sign_in", app.click("Start / Continue My Biography", new_user_input=name))
+
+        for i in range(answers):
+            await timed("answer", app.chat(ANSWERS[i % len(ANSWERS)]))
+            if i < answers - 1:
+                await timed("next_topic", app.click("next_q_quick"))
+        for _ in range(answers - 1):
+            await timed("prev_topic", app.click("prev_q_quick"))
+
+        await timed("edit_open", app.click("edit_1_"))
+        await timed("edit_save", app.click("save_1_", edit_area_1_=ANSWERS[0] + " The tide came right up to the wall."))
+
+        await timed("next_session", app.click("next_session_sidebar"))
+        await timed("jump_session", app.select("jump_to_session", 0))
+
+        # Export: follow the sidebar's publisher link, queue the biography
+        # and wait for the background job's downloads
+        link, _ = app.find("🖨️ Publish Biography")
+        query = urllib.parse.urlsplit(link.url).query
+        publisher = HeadlessSession(ports["publisher"], query)
+        start = time.perf_counter()
+        await publisher.connect()
+        await publisher.click("create_bio_btn")
+        await publisher.wait_for("📄 TEXT")
+        timings.append(("export", (time.perf_counter() - start) * 1000))
+        if publisher.exceptions:
+            raise RuntimeError(f"export: {publisher.exceptions[0]}")
+    except Exception as e:
+        errors.append(f"{name}: {type(e).__name__}: {e}")
+    return app, publisher
+
+
+# ============================================================================
+# ONE CONCURRENCY LEVEL
+# ============================================================================
+def _percentile(sorted_values, fraction):
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+
+async def _run_authors(first_index, users, answers, ports, interview_pid, timings, errors):
+    """Run the journeys concurrently; returns the server RSS (KB) while every tab is still open"""
+    sessions = await asyncio.gather(*[
+        run_journey(first_index + i, answers, ports, timings, errors) for i in range(users)
+    ])
+    rss = rss_kb(interview_pid)
+    for app, publisher in sessions:
+        await app.close()
+        if publisher is not None:
+            await publisher.close()
+    return rss
+
+
+def run_level(first_index, users, answers, ports, interview_pid):
+    """Run `users` new authors at once; returns the summary for this level"""
+    timings = []
+    errors = []
+
+    rss_before = rss_kb(interview_pid)
+    start = time.perf_counter()
+    rss_after = asyncio.run(_run_authors(first_index, users, answers, ports, interview_pid, timings, errors))
+    wall = time.perf_counter() - start
+
+    by_interaction = {}
+    for interaction, ms in timings:
+        by_interaction.setdefault(interaction, []).append(ms)
+
+    latency = {}
+    for interaction, values in by_interaction.items():
+        values.sort()
+        latency[interaction] = {
+            "n": len(values),
+            "p50_ms": round(_percentile(values, 0.50), 1),
+            "p95_ms": round(_percentile(values, 0.95), 1),
+            "p99_ms": round(_percentile(values, 0.99), 1)
+        }
+
+    saves = sum(len(by_interaction.get(k, [])) for k in ("answer", "edit_save"))
+    memory = None
+    if rss_before is not None and rss_after is not None:
+        memory = round(max(0, rss_after - rss_before) / users, 1)
+    return {
+        "users": users,
+        "wall_s": round(wall, 2),
+        "interactions": len(timings),
+        "interactions_per_s": round(len(timings) / wall, 2),
+        "saves_per_s": round(saves / wall, 2),
+        "memory_per_session_kb": memory,
+        "server_rss_mb": round(rss_after / 1024, 1) if rss_after else None,
+        "errors": errors,
+        "latency": latency
+    }
+
+
+def find_saturation(levels):
+    """Last level before throughput stopped growing by SATURATION_GAIN"""
+    for previous, level in zip(levels, levels[1:]):
+        if level["interactions_per_s"] < previous["interactions_per_s"] * SATURATION_GAIN:
+            return previous["users"]
+    return None
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+def print_level(level):
+    memory = "n/a" if level["memory_per_session_kb"] is None else f"{level['memory_per_session_kb']} KB/session"
+    print(f"\n== {level['users']} concurrent author(s): {level['interactions']} interactions in {level['wall_s']}s "
+          f"• {level['interactions_per_s']} interactions/s • {level['saves_per_s']} saves/s • {memory}")
+    print(f"   {'interaction':<14}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for interaction, row in level["latency"].items():
+        print(f"   {interaction:<14}{row['n']:>5}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    for error in level["errors"][:5]:
+        print(f"   ERROR {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-author load test for deepseek.py.")
+    parser.add_argument("--users", default="1,2,4,8,16", help="comma-separated concurrency steps")
+    parser.add_argument("--answers", type=int, default=3, help="topics each author answers")
+    parser.add_argument("--latency-ms", type=float, default=300, help="mock OpenAI mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=100, help="mock OpenAI latency std-dev")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of mock calls that fail with 503")
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results/load_test.json")
+    args = parser.parse_args(argv)
+
+    from mock_openai import start_mock_server
+    mock = start_mock_server(args.latency_ms, args.jitter_ms, args.error_rate)
+
+    # Everything the apps write goes to a scratch folder, nothing to the repo
+    workdir = tempfile.mkdtemp(prefix="deeper_load_")
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        f.write('OPENAI_API_KEY = "mock"\n')
+    env = dict(os.environ,
+               OPENAI_BASE_URL=mock.base_url,
+               OPENAI_API_KEY="mock",
+               USAGE_DB=os.path.join(workdir, "usage_metrics.db"),
+               TRACE_EXPORTER="off",
+               DAILY_TOKEN_BUDGET="0")
+
+    interview, interview_port = start_app(INTERVIEW_APP, workdir, env)
+    publisher, publisher_port = start_app(PUBLISHER_APP, workdir, env)
+    ports = {"interview": interview_port, "publisher": publisher_port}
+    print(f"Mock OpenAI at {mock.base_url} ({args.latency_ms:.0f}±{args.jitter_ms:.0f} ms), data in {workdir}")
+
+    levels = []
+    next_index = 0
+    try:
+        # One unmeasured author first, so module imports and caches don't count as session memory
+        warmup_errors = []
+        asyncio.run(_run_authors(-1, 1, 1, ports, interview.pid, [], warmup_errors))
+        if warmup_errors:
+            raise RuntimeError(f"warm-up journey failed: {warmup_errors[0]}")
+
+        for users in [int(u) for u in args.users.split(",") if u.strip()]:
+            level = run_level(next_index, users, args.answers, ports, interview.pid)
+            next_index += users
+            print_level(level)
+            levels.append(level)
+    finally:
+        for process in (interview, publisher):
+            process.terminate()
+            process.wait(timeout=10)
+        mock.shutdown()
+
+    saturation = find_saturation(levels)
+    if saturation is None:
+        print(f"\nThroughput still growing at {levels[-1]['users']} authors; extend --users to find saturation.")
+    else:
+        print(f"\nThroughput saturates at about {saturation} concurrent authors.")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w", encoding="utf-8") as f:
+            json.dump({
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "mock_latency_ms": args.latency_ms,
+                "mock_jitter_ms": args.jitter_ms,
+                "answers_per_author": args.answers,
+                "saturation_users": saturation,
+                "levels": levels
+            }, f, indent=2)
+        print(f"Saved {RESULTS_PATH}")
+
+    return 1 if any(level["errors"] for level in levels) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
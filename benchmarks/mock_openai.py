@@ -0,0 +1,104 @@
+# mock_openai.py - LOCAL STAND-IN FOR THE OPENAI CHAT COMPLETIONS API
+#
+# Answers POST /v1/chat/completions after a configurable delay, with a
+# usage block, so the apps can be load-tested without network or cost.
+#
+#   python benchmarks/mock_openai.py --port 8787 --latency-ms 800 --jitter-ms 200
+#   OPENAI_BASE_URL=http://127.0.0.1:8787/v1 OPENAI_API_KEY=mock streamlit run deepseek.py
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=300, jitter_ms=100, error_rate=0.0):
+        super().__init__(address, MockOpenAIHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests_served = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        delay = max(0.0, random.gauss(server.latency_ms, server.jitter_ms)) / 1000
+        time.sleep(delay)
+        with server.lock:
+            server.requests_served += 1
+
+        if random.random() < server.error_rate:
+            self._send_json(503, {"error": {"message": "mock overload", "type": "server_error"}})
+            return
+
+        messages = request.get("messages", [])
+        last = messages[-1]["content"] if messages else ""
+        is_correction = bool(messages) and messages[0]["content"].startswith("Fix spelling")
+        reply = last if is_correction else "That's a vivid memory. What do you remember hearing or smelling in that moment?"
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4 + 1
+        completion_tokens = len(reply) // 4 + 1
+
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{server.requests_served}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0}
+            }
+        })
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(latency_ms=300, jitter_ms=100, error_rate=0.0, port=0):
+    """Start the mock in a background thread; returns the server (see .base_url)"""
+    server = MockOpenAIServer(("127.0.0.1", port), latency_ms, jitter_ms, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions endpoint.")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(("127.0.0.1", args.port), args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Mock OpenAI listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
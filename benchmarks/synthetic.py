@@ -0,0 +1,79 @@
+# synthetic.py - SYNTHETIC BIOGRAPHY PAYLOADS FOR BENCHMARKS
+#
+# Builds the same {"user", "stories", "export_date"} payload the interview
+# app hands to the publisher, at any size, deterministically from a seed.
+#
+#   from synthetic import synthetic_biography
+#   data = synthetic_biography(total_stories=5000, words_per_story=300, unicode=True)
+import random
+from datetime import datetime, timedelta
+
+WORDS = (
+    "the summer we moved house my father carried boxes up the hill while mother "
+    "sang in the kitchen and the neighbours watched from behind their curtains "
+    "school began in september with new shoes that pinched and a teacher who "
+    "smelled of chalk and peppermint we walked along the river every evening "
+    "counting boats and arguing about which one we would sail away on someday"
+).split()
+
+# Accented Latin, CJK, RTL, emoji and combining marks
+UNICODE_WORDS = ["café", "naïve", "Zoë", "Ångström", "façade", "Ørsted", "niño", "Łódź",
+                 "東京", "家族", "思い出", "سلام", "שלום", "Привет", "семья", "Ελλάδα",
+                 "🎂", "👨‍👩‍👧", "🌊", "é", "ﬁne"]
+
+SESSION_TITLES = ["Childhood", "Family & Relationships", "Education & Growing Up", "Career & Work",
+                  "Love & Partnership", "Travel & Places", "Hobbies & Passions", "Wisdom & Reflections"]
+
+
+def _answer(rng, words, unicode):
+    """Answer text with paragraph breaks every ~60 words"""
+    out = []
+    for i in range(words):
+        if unicode and rng.random() < 0.15:
+            out.append(rng.choice(UNICODE_WORDS))
+        else:
+            out.append(rng.choice(WORDS))
+        if i and i % 60 == 0:
+            out.append("\n")
+    return " ".join(out).replace(" \n ", "\n")
+
+
+def synthetic_biography(total_stories=100, sessions=None, words_per_story=200, unicode=False,
+                        legacy_fraction=0.0, user="Synthetic Author", seed=0):
+    """Payload with total_stories answers spread over `sessions` chapters.
+
+    legacy_fraction of the answers are bare strings instead of
+    {"answer", "timestamp"} dicts, as in data saved by old versions.
+    """
+    rng = random.Random(seed)
+    if sessions is None:
+        sessions = max(1, min(len(SESSION_TITLES) * 4, total_stories // 10 or 1))
+    start = datetime(2024, 1, 1)
+
+    stories = {}
+    for story_index in range(total_stories):
+        session_id = str(story_index % sessions + 1)
+        if session_id not in stories:
+            title = SESSION_TITLES[(int(session_id) - 1) % len(SESSION_TITLES)]
+            if int(session_id) > len(SESSION_TITLES):
+                title = f"{title} ({int(session_id)})"
+            stories[session_id] = {"title": title, "questions": {}}
+
+        question = f"Question {story_index + 1}: what do you remember about {rng.choice(WORDS)} {rng.choice(WORDS)}?"
+        if unicode and story_index % 7 == 0:
+            question += f" {rng.choice(UNICODE_WORDS)}"
+        answer = _answer(rng, words_per_story, unicode)
+
+        if rng.random() < legacy_fraction:
+            stories[session_id]["questions"][question] = answer
+        else:
+            stories[session_id]["questions"][question] = {
+                "answer": answer,
+                "timestamp": (start + timedelta(minutes=story_index)).isoformat()
+            }
+
+    return {
+        "user": user,
+        "stories": stories,
+        "export_date": start.isoformat()
+    }
@@ -1,22 +1,17 @@
 # biography_publisher.py - WITH CLEAN CONFETTI AND EXPORT OPTIONS
 import streamlit as st
-import json
-import base64
-from datetime import datetime
-import time
-from io import BytesIO
+import functools
 
-# ============================================================================
-# DOCX LIBRARY IMPORT
-# ============================================================================
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    from docx.enum.style import WD_STYLE_TYPE
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+import bundle  # All formats plus the source JSON in one zip
+import export_jobs  # Background export queue with persisted status
+import ingest  # Size-bounded, streaming parsing of uploads and links
+import publish_sync  # Revisioned hand-over from the interview app
+import story_schema  # Typed story payloads, decoded once on the way in
+import text_stats  # Word counts shared with the interview app and the books
+
+# Renderers live in an importable, Streamlit-free package; this page is a thin shell
+from biography_renderers import DOCX_AVAILABLE, FORMATS, available_formats, render
+from biography_renderers.chapters import display_name
 
 # Page setup
 st.set_page_config(page_title="Biography Publisher", layout="wide")
@@ -163,6 +158,21 @@ def show_celebration():
     </div>
     """, unsafe_allow_html=True)
 
+def sync_stories_from_url():
+    """Stories from a ?sync= link: a full copy, or only the changes since the last publish"""
+    token = st.query_params.get("sync")
+    if not token:
+        return None
+    try:
+        # On reruns the revision is already a snapshot, so this is one file read
+        return publish_sync.apply(publish_sync.decode(token))
+    except publish_sync.MissingBase:
+        st.warning("⚠️ This link only carries your latest changes, and this publisher doesn't have your earlier "
+                   "publish. In the interview app, click **Send full copy** and open the new link.")
+    except publish_sync.SyncError as e:
+        st.error(f"Error loading data: {e}")
+    return None
+
 def decode_stories_from_url():
     """Extract stories from URL parameter - FIXED FOR COMPATIBILITY"""
     try:
@@ -181,642 +191,32 @@ def decode_stories_from_url():
         if not encoded_data:
             return None
             
-        # Decode the data
-        json_data = base64.b64decode(encoded_data).decode()
-        stories_data = json.loads(json_data)
-        
-        return stories_data
+        # Decoded and parsed a chunk at a time, refusing oversized links
+        return ingest.decode_base64(encoded_data)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None
 
-# ============================================================================
-# NEW: EXPORT OPTION FUNCTIONS
-# ============================================================================
-def create_docx_biography(stories_data, include_questions=True):
-    """Create a professionally formatted Word document (.docx) with option for questions"""
-    if not DOCX_AVAILABLE:
-        raise Exception("python-docx library not available. Please install with: pip install python-docx==1.1.0")
-    
-    # Extract data
-    user_name = stories_data.get("user", "Unknown")
-    user_profile = stories_data.get("user_profile", {})
-    stories_dict = stories_data.get("stories", {})
-    
-    # Get author name
-    if user_profile and 'first_name' in user_profile:
-        first_name = user_profile.get('first_name', '')
-        last_name = user_profile.get('last_name', '')
-        author_name = f"{first_name} {last_name}".strip()
-        if not author_name:
-            author_name = user_name
-    else:
-        author_name = user_name
-    
-    # Create document
-    doc = Document()
-    
-    # ========== SET UP DOCUMENT STYLES ==========
-    
-    # Title style - Check if exists first
-    try:
-        title_style = doc.styles['CustomTitle']
-    except KeyError:
-        title_style = doc.styles.add_style('CustomTitle', WD_STYLE_TYPE.PARAGRAPH)
-        title_font = title_style.font
-        title_font.name = 'Calibri Light'
-        title_font.size = Pt(28)
-        title_font.bold = True
-        title_font.color.rgb = RGBColor(44, 82, 130)  # Dark blue
-    
-    # Heading 1 style
-    heading1_style = doc.styles['Heading 1']
-    heading1_style.font.name = 'Calibri'
-    heading1_style.font.size = Pt(20)
-    heading1_style.font.bold = True
-    heading1_style.font.color.rgb = RGBColor(44, 82, 130)
-    
-    # Heading 2 style
-    heading2_style = doc.styles['Heading 2']
-    heading2_style.font.name = 'Calibri'
-    heading2_style.font.size = Pt(16)
-    heading2_style.font.bold = True
-    heading2_style.font.color.rgb = RGBColor(66, 133, 244)  # Blue
-    
-    # Normal style
-    normal_style = doc.styles['Normal']
-    normal_style.font.name = 'Calibri'
-    normal_style.font.size = Pt(11)
-    
-    # Quote style - Only create if it doesn't exist (FIXED)
-    try:
-        quote_style = doc.styles['Quote']
-    except KeyError:
-        quote_style = doc.styles.add_style('Quote', WD_STYLE_TYPE.PARAGRAPH)
-        quote_style.font.name = 'Calibri'
-        quote_style.font.size = Pt(11)
-        quote_style.font.italic = True
-        quote_style.paragraph_format.left_indent = Inches(0.5)
-        quote_style.paragraph_format.right_indent = Inches(0.5)
-    
-    # ========== CREATE COVER PAGE ==========
-    
-    title_para = doc.add_paragraph()
-    title_run = title_para.add_run("TELL MY STORY\n")
-    title_run.font.name = 'Calibri Light'
-    title_run.font.size = Pt(36)
-    title_run.font.bold = True
-    title_run.font.color.rgb = RGBColor(44, 82, 130)
-    title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    subtitle_para = doc.add_paragraph()
-    subtitle_run = subtitle_para.add_run("A Personal Biography\n")
-    subtitle_run.font.name = 'Calibri'
-    subtitle_run.font.size = Pt(20)
-    subtitle_run.italic = True
-    subtitle_run.font.color.rgb = RGBColor(100, 100, 100)
-    subtitle_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_paragraph("\n\n\n\n")
-    
-    # Author name
-    author_para = doc.add_paragraph()
-    author_run = author_para.add_run(f"The Life Story of\n{author_name.upper()}")
-    author_run.font.name = 'Calibri'
-    author_run.font.size = Pt(24)
-    author_run.font.color.rgb = RGBColor(0, 0, 0)
-    author_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_paragraph("\n\n\n\n\n\n")
-    
-    # Date
-    date_para = doc.add_paragraph()
-    date_run = date_para.add_run(f"Compiled on {datetime.now().strftime('%B %d, %Y')}")
-    date_run.font.name = 'Calibri'
-    date_run.font.size = Pt(14)
-    date_run.font.color.rgb = RGBColor(100, 100, 100)
-    date_run.italic = True
-    date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # Page break
-    doc.add_page_break()
-    
-    # ========== TABLE OF CONTENTS ==========
-    
-    toc_title = doc.add_heading('TABLE OF CONTENTS', 1)
-    toc_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_paragraph()
-    
-    # Collect all sessions for TOC
-    try:
-        sorted_sessions = sorted(stories_dict.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 0)
-    except:
-        sorted_sessions = stories_dict.items()
-    
-    for session_id, session_data in sorted_sessions:
-        session_title = session_data.get("title", f"Chapter {session_id}")
-        questions = session_data.get("questions", {})
-        
-        if questions:
-            para = doc.add_paragraph()
-            para.style = 'Normal'
-            run = para.add_run(f"{session_title}")
-            run.bold = True
-            run.font.size = Pt(12)
-            
-            # Add page numbers placeholder
-            para.add_run(f"\t\t\t...... ")
-    
-    doc.add_paragraph("\n")
-    
-    # ========== INTRODUCTION ==========
-    
-    intro_title = doc.add_heading('INTRODUCTION', 1)
-    intro_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    intro_para = doc.add_paragraph()
-    export_type = "Interview Q&A" if include_questions else "Biography"
-    intro_text = f"This {export_type.lower()} captures the unique life journey of {author_name}, "
-    intro_text += f"compiled from personal reflections shared on {datetime.now().strftime('%B %d, %Y')}. "
-    intro_text += "Each chapter represents a different phase of life, preserved here for future generations."
-    intro_para.add_run(intro_text)
-    
-    doc.add_page_break()
-    
-    # ========== CHAPTERS AND STORIES ==========
-    
-    chapter_num = 0
-    total_stories = 0
-    total_words = 0
-    
-    for session_id, session_data in sorted_sessions:
-        session_title = session_data.get("title", f"Chapter {session_id}")
-        questions = session_data.get("questions", {})
-        
-        if not questions:
-            continue
-        
-        chapter_num += 1
-        
-        # Chapter header
-        chapter_title = doc.add_heading(f'CHAPTER {chapter_num}: {session_title.upper()}', 1)
-        chapter_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        doc.add_paragraph()
-        
-        # Process each story in this chapter
-        story_num = 0
-        for question, answer_data in questions.items():
-            if isinstance(answer_data, dict):
-                answer = answer_data.get("answer", "")
-                date_recorded = answer_data.get("timestamp", datetime.now().isoformat())[:10]
-            else:
-                answer = str(answer_data)
-                date_recorded = datetime.now().isoformat()[:10]
-            
-            if not answer.strip():
-                continue
-            
-            story_num += 1
-            total_stories += 1
-            word_count = len(answer.split())
-            total_words += word_count
-            
-            # Story header - only include question if option is selected
-            if include_questions:
-                story_header = doc.add_heading(f'Story {story_num}: {question}', 2)
-            else:
-                story_header = doc.add_heading(f'Story {story_num}', 2)
-            
-            # Date if available
-            if date_recorded:
-                date_para = doc.add_paragraph()
-                date_run = date_para.add_run(f"Recorded: {date_recorded}")
-                date_run.font.size = Pt(10)
-                date_run.font.color.rgb = RGBColor(100, 100, 100)
-                date_run.italic = True
-            
-            # Story content
-            content_para = doc.add_paragraph()
-            content_para.add_run(answer.strip())
-            
-            # Word count
-            count_para = doc.add_paragraph()
-            count_run = count_para.add_run(f"[{word_count} words]")
-            count_run.font.size = Pt(9)
-            count_run.font.color.rgb = RGBColor(150, 150, 150)
-            
-            doc.add_paragraph()  # Add spacing between stories
-        
-        doc.add_page_break()  # New page for next chapter
-    
-    # ========== STATISTICS PAGE ==========
-    
-    stats_title = doc.add_heading('BIOGRAPHY STATISTICS', 1)
-    stats_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_paragraph()
-    
-    # Create a table for stats
-    table = doc.add_table(rows=1, cols=2)
-    table.style = 'Light Grid'
-    
-    # Header row
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Metric'
-    hdr_cells[1].text = 'Value'
-    
-    # Data rows
-    export_type_display = "Interview Q&A" if include_questions else "Biography"
-    metrics = [
-        ('Export Type', export_type_display),
-        ('Total Chapters', str(chapter_num)),
-        ('Total Stories', str(total_stories)),
-        ('Total Words', f"{total_words:,}"),
-        ('Average Story Length', f"{total_words//total_stories if total_stories > 0 else 0} words"),
-        ('Compiled Date', datetime.now().strftime('%B %d, %Y')),
-        ('Compiled Time', datetime.now().strftime('%I:%M %p'))
-    ]
-    
-    for metric, value in metrics:
-        row_cells = table.add_row().cells
-        row_cells[0].text = metric
-        row_cells[1].text = value
-    
-    doc.add_paragraph("\n\n")
-    
-    # Conclusion
-    conclusion_para = doc.add_paragraph()
-    conclusion_text = f"This {export_type_display.lower()} contains {total_stories} personal stories from {author_name}'s life, "
-    conclusion_text += f"totaling {total_words:,} words across {chapter_num} chapters. "
-    conclusion_text += "These memories are now preserved for future generations to cherish."
-    conclusion_para.add_run(conclusion_text)
-    
-    doc.add_paragraph("\n")
-    
-    # Footer note
-    footer_para = doc.add_paragraph()
-    footer_run = footer_para.add_run("Created with Tell My Story Biographer")
-    footer_run.font.size = Pt(10)
-    footer_run.font.color.rgb = RGBColor(150, 150, 150)
-    footer_run.italic = True
-    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    # ========== SAVE TO BYTESIO ==========
-    
-    docx_bytes = BytesIO()
-    doc.save(docx_bytes)
-    docx_bytes.seek(0)
-    
-    return docx_bytes, author_name, chapter_num, total_stories, total_words
+EXPORT_POLL_SECONDS = 1.0
 
-def create_beautiful_biography(stories_data, include_questions=True):
-    """Create a professionally formatted biography with option for questions"""
-    user_name = stories_data.get("user", "Unknown")
-    user_profile = stories_data.get("user_profile", {})
-    stories_dict = stories_data.get("stories", {})
-    summary = stories_data.get("summary", {})
-    
-    # Get display name
-    if user_profile and 'first_name' in user_profile:
-        first_name = user_profile.get('first_name', '')
-        last_name = user_profile.get('last_name', '')
-        display_name = f"{first_name} {last_name}".strip()
-        if not display_name:
-            display_name = user_name
+@st.fragment(run_every=EXPORT_POLL_SECONDS)
+def render_export_progress(job_id):
+    """Progress bar for a background export, polled until the job finishes"""
+    status = export_jobs.get_status(job_id)
+    if not status or status["state"] not in export_jobs.ACTIVE_STATES:
+        # Finished: redraw the whole page with the downloads, which also stops the polling
+        st.rerun(scope="app")
+    
+    if status["state"] == export_jobs.QUEUED:
+        ahead = export_jobs.queue_position(job_id)
+        text = f"⏳ Waiting for a free export slot ({ahead} ahead of you)..." if ahead else "⏳ Waiting for a free export slot..."
+    elif status.get("format"):
+        text = f"🖋️ Crafting your {status['format'].upper()} • chapter {status['chapter']} of {status['stats']['chapters']}"
     else:
-        display_name = user_name
-    
-    # Collect all stories
-    all_stories = []
-    try:
-        # Sort sessions numerically
-        sorted_sessions = sorted(stories_dict.items(), key=lambda x: int(x[0]) if x[0].isdigit() else 0)
-    except:
-        sorted_sessions = stories_dict.items()
-    
-    for session_id, session_data in sorted_sessions:
-        session_title = session_data.get("title", f"Chapter {session_id}")
-        
-        for question, answer_data in session_data.get("questions", {}).items():
-            if isinstance(answer_data, dict):
-                answer = answer_data.get("answer", "")
-            else:
-                answer = str(answer_data)
-                
-            if answer.strip():
-                all_stories.append({
-                    "session": session_title,
-                    "question": question,
-                    "answer": answer,
-                    "date": answer_data.get("timestamp", datetime.now().isoformat())[:10] 
-                             if isinstance(answer_data, dict) else datetime.now().isoformat()[:10],
-                    "session_id": session_id
-                })
-    
-    if not all_stories:
-        return "No stories found to publish.", [], display_name, 0, 0, 0
-    
-    # ========== CREATE BEAUTIFUL BIOGRAPHY ==========
-    export_type = "INTERVIEW Q&A" if include_questions else "BIOGRAPHY"
-    bio_text = "=" * 70 + "\n"
-    bio_text += f"{'TELL MY STORY':^70}\n"
-    bio_text += f"{export_type:^70}\n"
-    bio_text += "=" * 70 + "\n\n"
-    
-    bio_text += f"THE LIFE STORY OF\n{display_name.upper()}\n\n"
-    bio_text += "-" * 70 + "\n\n"
-    
-    # Personal Information
-    if user_profile:
-        bio_text += "PERSONAL INFORMATION\n"
-        bio_text += "-" * 40 + "\n"
-        if user_profile.get('birthdate'):
-            bio_text += f"Date of Birth: {user_profile.get('birthdate')}\n"
-        if user_profile.get('gender'):
-            bio_text += f"Gender: {user_profile.get('gender')}\n"
-        bio_text += "\n"
-    
-    # Table of Contents
-    bio_text += "TABLE OF CONTENTS\n"
-    bio_text += "-" * 40 + "\n\n"
-    
-    current_session = None
-    chapter_num = 0
-    for story in all_stories:
-        if story["session"] != current_session:
-            chapter_num += 1
-            bio_text += f"Chapter {chapter_num}: {story['session']}\n"
-            current_session = story["session"]
-    
-    bio_text += "\n" + "=" * 70 + "\n\n"
-    
-    # Introduction
-    bio_text += "INTRODUCTION\n\n"
-    bio_text += f"This {export_type.lower()} captures the unique life journey of {display_name}, "
-    bio_text += f"compiled from personal reflections shared on {datetime.now().strftime('%B %d, %Y')}. "
-    bio_text += "Each chapter represents a different phase of life, preserved here for future generations.\n\n"
-    
-    bio_text += "=" * 70 + "\n\n"
-    
-    # Chapters with stories
-    current_session = None
-    chapter_num = 0
-    story_num = 0
-    
-    for story in all_stories:
-        if story["session"] != current_session:
-            chapter_num += 1
-            bio_text += "\n" + "=" * 70 + "\n"
-            bio_text += f"CHAPTER {chapter_num}: {story['session'].upper()}\n"
-            bio_text += "=" * 70 + "\n\n"
-            current_session = story["session"]
-        
-        story_num += 1
-        
-        # Include question only if selected
-        if include_questions:
-            bio_text += f"Story {story_num}\n"
-            bio_text += f"Topic: {story['question']}\n"
-        else:
-            bio_text += f"Story {story_num}\n"
-        
-        if story['date']:
-            bio_text += f"Recorded: {story['date']}\n"
-        
-        bio_text += "-" * 40 + "\n"
-        
-        # Format the answer with proper paragraphs
-        answer = story['answer'].strip()
-        paragraphs = answer.split('\n')
-        
-        for para in paragraphs:
-            if para.strip():
-                bio_text += f"{para.strip()}\n\n"
-        
-        bio_text += "\n"
-    
-    # Conclusion
-    bio_text += "=" * 70 + "\n\n"
-    bio_text += "CONCLUSION\n\n"
-    bio_text += f"This collection contains {story_num} stories across {chapter_num} chapters, "
-    bio_text += f"each one a piece of {display_name}'s unique mosaic of memories. "
-    bio_text += "These reflections will continue to resonate long into the future.\n\n"
-    
-    # Statistics
-    bio_text += "-" * 70 + "\n"
-    bio_text += f"{export_type} STATISTICS\n"
-    bio_text += "-" * 40 + "\n"
-    bio_text += f"• Export Type: {export_type}\n"
-    bio_text += f"• Total Stories: {story_num}\n"
-    bio_text += f"• Total Chapters: {chapter_num}\n"
-    
-    # Calculate word count
-    total_words = sum(len(story['answer'].split()) for story in all_stories)
-    bio_text += f"• Total Words: {total_words:,}\n"
-    
-    # Find longest story
-    if all_stories:
-        longest = max(all_stories, key=lambda x: len(x['answer'].split()))
-        bio_text += f"• Longest Story: \"{longest['question'][:50]}...\" ({len(longest['answer'].split())} words)\n"
-    
-    bio_text += f"• Compiled: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n"
-    bio_text += "-" * 70 + "\n\n"
-    
-    # Final note
-    bio_text += "This digital legacy was created with Tell My Story Biographer.\n\n"
-    bio_text += "=" * 70
-    
-    return bio_text, all_stories, display_name, story_num, chapter_num, total_words
-
-def create_html_biography(stories_data, include_questions=True):
-    """Create an HTML version with option for questions"""
-    bio_text, all_stories, display_name, story_num, chapter_num, total_words = create_beautiful_biography(stories_data, include_questions)
-    
-    export_type = "Interview Q&A" if include_questions else "Biography"
-    
-    html = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{display_name}'s {export_type}</title>
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Crimson+Text:ital,wght@0,400;0,600;0,700;1,400&family=Open+Sans:wght@300;400;600&display=swap');
-        
-        body {{
-            font-family: 'Crimson Text', serif;
-            line-height: 1.8;
-            color: #333;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 40px 20px;
-            background: #fefefe;
-        }}
-        .header {{
-            text-align: center;
-            padding: 40px 0;
-            border-bottom: 3px double #2c5282;
-            margin-bottom: 40px;
-        }}
-        h1 {{
-            font-size: 2.8em;
-            color: #2c5282;
-            margin-bottom: 10px;
-        }}
-        .subtitle {{
-            font-family: 'Open Sans', sans-serif;
-            font-size: 1.2em;
-            color: #666;
-        }}
-        .chapter {{
-            margin: 50px 0;
-        }}
-        .chapter-title {{
-            color: #2c5282;
-            border-bottom: 2px solid #e2e8f0;
-            padding-bottom: 10px;
-            margin-bottom: 30px;
-        }}
-        .story {{
-            margin: 30px 0;
-            padding: 25px;
-            background: #f8fafc;
-            border-radius: 8px;
-            border-left: 4px solid #4299e1;
-        }}
-        .question {{
-            font-weight: 700;
-            color: #2d3748;
-            margin-bottom: 15px;
-            font-size: 1.2em;
-        }}
-        .answer {{
-            white-space: pre-line;
-            font-size: 1.1em;
-        }}
-        .stats {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 15px;
-            text-align: center;
-            margin: 40px 0;
-        }}
-        .stat-item {{
-            display: inline-block;
-            margin: 0 20px;
-        }}
-        .stat-number {{
-            font-size: 2.5em;
-            font-weight: 700;
-            display: block;
-        }}
-        .footer {{
-            text-align: center;
-            margin-top: 50px;
-            padding-top: 20px;
-            border-top: 2px solid #e2e8f0;
-            color: #718096;
-        }}
-        @media print {{
-            body {{ padding: 0; }}
-            .no-print {{ display: none; }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>{display_name}'s Life Story</h1>
-        <div class="subtitle">{export_type} • {datetime.now().strftime('%B %d, %Y')}</div>
-    </div>
-    
-    <div class="stats">
-        <div class="stat-item">
-            <span class="stat-number">{chapter_num}</span>
-            <span>Chapters</span>
-        </div>
-        <div class="stat-item">
-            <span class="stat-number">{story_num}</span>
-            <span>Stories</span>
-        </div>
-        <div class="stat-item">
-            <span class="stat-number">{total_words:,}</span>
-            <span>Words</span>
-        </div>
-    </div>
-    
-    <div class="content">
-'''
-
-    # Add chapters
-    current_session = None
-    chapter_num = 0
-    
-    for story in all_stories:
-        if story["session"] != current_session:
-            chapter_num += 1
-            current_session = story["session"]
-            html += f'''
-            <div class="chapter">
-                <h2 class="chapter-title">Chapter {chapter_num}: {story['session']}</h2>
-            '''
-        
-        html += f'''
-        <div class="story">
-        '''
-        
-        # Include question only if selected
-        if include_questions:
-            html += f'''
-            <div class="question">✏️ {story['question']}</div>
-            '''
-        
-        html += f'''
-            <div class="answer">{story['answer']}</div>
-        '''
-        
-        if story['date']:
-            html += f'''
-            <div style="margin-top: 15px; font-size: 0.9em; color: #718096;">
-                Recorded: {story['date']}
-            </div>
-            '''
-        
-        html += '</div>'
-        
-        # Close chapter if next story is different session or last story
-        next_idx = all_stories.index(story) + 1
-        if next_idx >= len(all_stories) or all_stories[next_idx]["session"] != current_session:
-            html += '</div>'
-
-    html += f'''
-    </div>
-    
-    <div class="footer">
-        <p>Created with Tell My Story Biographer • {export_type}</p>
-        <p>{datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-    </div>
-    
-    <div class="no-print" style="text-align: center; margin-top: 40px;">
-        <button onclick="window.print()" style="
-            background: #48bb78;
-            color: white;
-            border: none;
-            padding: 12px 30px;
-            border-radius: 8px;
-            font-size: 1.1em;
-            cursor: pointer;
-            margin: 20px;
-        ">
-            🖨️ Print This {export_type}
-        </button>
-    </div>
-</body>
-</html>'''
-    
-    return html, display_name
+        text = "🖋️ Crafting your beautiful biography..."
+    st.progress(status.get("progress", 0.0), text=text)
+    st.caption(f"You can leave this page: publishing the same stories again within {export_jobs.JOB_RETENTION_DAYS} days "
+               "brings the finished export straight back.")
 
 # ============================================================================
 # MAIN APP INTERFACE
@@ -829,7 +229,7 @@ st.markdown('<p class="subtitle">Transform your life stories into a professional
 st.markdown("""
 <div class="format-card">
     <h3>🎯 Available Export Formats</h3>
-    <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 20px; margin-top: 1.5rem;">
+    <div style="display: grid; grid-template-columns: repeat(6, 1fr); gap: 20px; margin-top: 1.5rem;">
         <div style="text-align: center; padding: 1rem; background: #f8f9fa; border-radius: 10px;">
             <div class="format-icon">📄</div>
             <div><strong>TEXT</strong></div>
@@ -854,23 +254,38 @@ st.markdown("""
             <div style="font-size: 0.9em; color: #666;">Microsoft Word</div>
             <div style="font-size: 0.8em; color: #3498db; margin-top: 0.5rem; font-weight: bold;">.docx</div>
         </div>
+        <div style="text-align: center; padding: 1rem; background: #f8f9fa; border-radius: 10px;">
+            <div class="format-icon">📕</div>
+            <div><strong>PDF BOOK</strong></div>
+            <div style="font-size: 0.9em; color: #666;">Print Ready</div>
+            <div style="font-size: 0.8em; color: #888; margin-top: 0.5rem;">.pdf</div>
+        </div>
+        <div style="text-align: center; padding: 1rem; background: #f8f9fa; border-radius: 10px;">
+            <div class="format-icon">📱</div>
+            <div><strong>E-BOOK</strong></div>
+            <div style="font-size: 0.9em; color: #666;">E-Readers</div>
+            <div style="font-size: 0.8em; color: #888; margin-top: 0.5rem;">.epub</div>
+        </div>
     </div>
 </div>
 """, unsafe_allow_html=True)
 
 # Try to get data from URL first
-stories_data = decode_stories_from_url()
+stories_data = sync_stories_from_url() or decode_stories_from_url()
+if stories_data:
+    try:
+        stories_data = story_schema.as_biography(stories_data)
+    except story_schema.SchemaError as e:
+        st.error(f"Error loading data: {e}")
+        stories_data = None
 
 if stories_data:
     # Auto-process data from URL
-    user_name = stories_data.get("user", "Unknown")
-    user_profile = stories_data.get("user_profile", {})
-    summary = stories_data.get("summary", {})
+    user_name = stories_data.user
+    user_profile = stories_data.user_profile
     
     # Count stories
-    story_count = 0
-    for session_id, session_data in stories_data.get("stories", {}).items():
-        story_count += len(session_data.get("questions", {}))
+    story_count = stories_data.story_count()
     
     if story_count > 0:
         # Display user info
@@ -886,22 +301,17 @@ if stories_data:
                 st.caption(f"🎂 Born: {user_profile.get('birthdate')}")
         
         with col2:
-            st.metric("Sessions", len(stories_data.get("stories", {})))
+            st.metric("Sessions", len(stories_data.sessions))
         
         with col3:
             st.metric("Stories", story_count)
         
         with col4:
             # Count total words
-            total_words = 0
-            for session_id, session_data in stories_data.get("stories", {}).items():
-                for question, answer_data in session_data.get("questions", {}).items():
-                    if isinstance(answer_data, dict):
-                        answer = answer_data.get("answer", "")
-                    else:
-                        answer = str(answer_data)
-                    total_words += len(answer.split())
-            st.metric("Words", f"{total_words:,}")
+            summary = text_stats.summarize((question, answer.text) for session in stories_data.sessions
+                                           for question, answer in session.answers.items())
+            st.metric("Words", f"{summary.words:,}",
+                      help=f"About {text_stats.format_reading_time(summary.reading_minutes)} to read")
         
         # DOCX availability indicator
         if not DOCX_AVAILABLE:
@@ -946,31 +356,49 @@ if stories_data:
         
         include_questions = export_format == "🎤 Interview Format (Questions & Answers)"
         
-        # Generate biography button
+        # Generate biography button: rendering runs as a background job, so
+        # big biographies don't block the page and survive navigating away
         if st.button("✨ Create Beautiful Biography", type="primary", use_container_width=True, key="create_bio_btn"):
-            with st.spinner("🖋️ Crafting your beautiful biography..."):
-                time.sleep(1)
-                
-                # Create all versions
-                bio_text, all_stories, author_name, story_num, chapter_num, total_words = create_beautiful_biography(
-                    stories_data, include_questions
-                )
-                html_bio, html_name = create_html_biography(stories_data, include_questions)
-                
-                # Create DOCX if available
-                docx_data = None
-                if DOCX_AVAILABLE:
-                    try:
-                        docx_bytes, docx_name, docx_chapters, docx_stories, docx_words = create_docx_biography(
-                            stories_data, include_questions
-                        )
-                        docx_data = docx_bytes
-                    except Exception as e:
-                        st.error(f"⚠️ DOCX creation failed: {str(e)}")
-                        docx_data = None
-            
-            # Show celebration
-            show_celebration()
+            st.session_state.export_job_id = export_jobs.submit(stories_data, available_formats(), include_questions, bundle=True)
+            # Only jobs this browser session submitted are ever listed: the user in a link proves nothing
+            st.session_state.setdefault("submitted_export_jobs", []).append(st.session_state.export_job_id)
+        
+        export_status = None
+        if st.session_state.get("export_job_id"):
+            export_status = export_jobs.get_status(st.session_state.export_job_id)
+        
+        if export_status and export_status["state"] in export_jobs.ACTIVE_STATES:
+            render_export_progress(export_status["id"])
+        elif export_status and export_status["state"] != export_jobs.DONE:
+            st.error(f"⚠️ Creating your biography failed ({export_status.get('error') or 'the server restarted'}). Please try again.")
+        elif export_status:
+            # Finished job: everything below reads its files
+            job_id = export_status["id"]
+            artifacts = {artifact["format"]: artifact for artifact in export_status["artifacts"]}
+            include_questions = export_status["include_questions"]
+            author_name = export_status["author"]
+            story_num = export_status["stats"]["stories"]
+            chapter_num = export_status["stats"]["chapters"]
+            total_words = export_status["stats"]["words"]
+            
+            bio_text = export_jobs.read_artifact(job_id, artifacts["txt"]).decode("utf-8")
+            # The larger files are only read when their button is clicked
+            html_bio = functools.partial(export_jobs.read_artifact, job_id, artifacts["html"])
+            md_bio = functools.partial(export_jobs.read_artifact, job_id, artifacts["md"])
+            docx_data = None
+            if "docx" in artifacts:
+                docx_data = functools.partial(export_jobs.read_artifact, job_id, artifacts["docx"])
+            pdf_data = functools.partial(export_jobs.read_artifact, job_id, artifacts["pdf"])
+            epub_data = functools.partial(export_jobs.read_artifact, job_id, artifacts["epub"])
+            bundle_data = None
+            if "zip" in artifacts:
+                bundle_data = functools.partial(export_jobs.read_artifact, job_id, artifacts["zip"])
+            
+            # Show celebration the first time this export is shown
+            celebrated = st.session_state.setdefault("celebrated_exports", set())
+            if job_id not in celebrated:
+                celebrated.add(job_id)
+                show_celebration()
             
             # Show preview
             export_type_display = "Interview Q&A" if include_questions else "Biography"
@@ -992,18 +420,18 @@ if stories_data:
                 st.metric("📝 Stories", story_num)
                 st.metric("📊 Total Words", f"{total_words:,}")
                 st.markdown('</div>', unsafe_allow_html=True)
+                cache = export_status.get("cache") or {}
+                if cache.get("hits"):
+                    st.caption(f"♻️ Reused {cache['hits']} of {cache['hits'] + cache['misses']} chapter renders from earlier publishes")
             
             # Download options
             st.subheader("📥 Download Your Biography")
             
-            # Create markdown version
-            md_bio = bio_text.replace("=" * 70, "#" * 3)
-            
             safe_name = author_name.replace(" ", "_")
             file_suffix = "_Interview" if include_questions else "_Biography"
             
             # Row 1: Download buttons
-            col_dl1, col_dl2, col_dl3, col_dl4 = st.columns(4)
+            col_dl1, col_dl2, col_dl3, col_dl4, col_dl5, col_dl6 = st.columns(6)
             
             with col_dl1:
                 st.download_button(
@@ -1057,8 +485,30 @@ if stories_data:
                         help="Install python-docx to enable Word export"
                     )
             
+            with col_dl5:
+                st.download_button(
+                    label="📕 PDF BOOK",
+                    data=pdf_data,
+                    file_name=f"{safe_name}{file_suffix}.pdf",
+                    mime="application/pdf",
+                    use_container_width=True,
+                    type="secondary",
+                    help="Print-ready PDF with a clickable table of contents"
+                )
+            
+            with col_dl6:
+                st.download_button(
+                    label="📱 E-BOOK",
+                    data=epub_data,
+                    file_name=f"{safe_name}{file_suffix}.epub",
+                    mime="application/epub+zip",
+                    use_container_width=True,
+                    type="secondary",
+                    help="EPUB for Kindle, Kobo, Apple Books and other e-readers"
+                )
+            
             # Row 2: Format descriptions
-            col_desc1, col_desc2, col_desc3, col_desc4 = st.columns(4)
+            col_desc1, col_desc2, col_desc3, col_desc4, col_desc5, col_desc6 = st.columns(6)
             
             with col_desc1:
                 st.caption("**TEXT** - Universal format")
@@ -1075,31 +525,38 @@ if stories_data:
                 else:
                     st.caption("**WORD DOC** - Not available")
             
+            with col_desc5:
+                st.caption("**PDF** - Print-ready book")
+            
+            with col_desc6:
+                st.caption("**EPUB** - For e-readers")
+            
+            # Row 3: everything in one download
+            if bundle_data:
+                st.download_button(
+                    label="📦 DOWNLOAD EVERYTHING (.zip)",
+                    data=bundle_data,
+                    file_name=artifacts["zip"]["file"],
+                    mime=bundle.MIME_TYPE,
+                    use_container_width=True,
+                    type="primary",
+                    help="Every format above plus your stories as JSON, in one file"
+                )
+            
             # Story preview
             with st.expander("📋 Preview Your Stories", expanded=False):
-                try:
-                    sorted_sessions = sorted(stories_data.get("stories", {}).items(), 
-                                           key=lambda x: int(x[0]) if x[0].isdigit() else 0)
-                except:
-                    sorted_sessions = stories_data.get("stories", {}).items()
-                
-                for session_id, session_data in sorted_sessions[:3]:
-                    session_title = session_data.get("title", f"Session {session_id}")
-                    st.markdown(f"### {session_title}")
+                for session in stories_data.sessions[:3]:
+                    st.markdown(f"### {session.title}")
                     
-                    for question, answer_data in list(session_data.get("questions", {}).items())[:2]:
-                        if isinstance(answer_data, dict):
-                            answer = answer_data.get("answer", "")
-                        else:
-                            answer = str(answer_data)
-                        
+                    for question, answer in list(session.answers.items())[:2]:
+                        answer = answer.text
                         if answer.strip():
                             if include_questions:
                                 st.markdown(f"**{question}**")
                             else:
                                 st.markdown(f"**Story**")
                             st.write(answer[:200] + "..." if len(answer) > 200 else answer)
-                            st.caption(f"{len(answer.split())} words")
+                            st.caption(f"{text_stats.word_count(answer)} words")
                             st.divider()
             
             st.success(f"✨ {export_type_display} created! **{story_num} stories** across **{chapter_num} chapters** ({total_words:,} words)")
@@ -1124,9 +581,31 @@ if stories_data:
                         <div>Words</div>
                     </div>
                 </div>
-                <p style="font-size: 1.1em; margin-top: 1rem;">Your life story is now preserved in {4 if docx_data else 3} formats!</p>
+                <p style="font-size: 1.1em; margin-top: 1rem;">Your life story is now preserved in {6 if docx_data else 5} formats!</p>
             </div>
             """, unsafe_allow_html=True)
+        
+        # Other finished exports from this visit stay downloadable
+        earlier_jobs = [job for job in export_jobs.list_jobs(st.session_state.get("submitted_export_jobs", []))
+                        if job["id"] != st.session_state.get("export_job_id")]
+        if earlier_jobs:
+            with st.expander(f"📂 Your earlier exports ({len(earlier_jobs)})", expanded=False):
+                for job in earlier_jobs:
+                    job_type = "Interview Q&A" if job["include_questions"] else "Biography"
+                    finished = job.get("finished", job["created"])[:16].replace("T", " ")
+                    st.markdown(f"**{job_type}** • {job['stats']['stories']} stories • created {finished}")
+                    job_columns = st.columns(len(job["artifacts"]))
+                    for column, artifact in zip(job_columns, job["artifacts"]):
+                        with column:
+                            st.download_button(
+                                label=artifact["format"].upper(),
+                                data=functools.partial(export_jobs.read_artifact, job["id"], artifact),
+                                file_name=artifact["file"],
+                                mime=FORMATS[artifact["format"]][1] if artifact["format"] in FORMATS else bundle.MIME_TYPE,
+                                key=f"earlier_{job['id']}_{artifact['format']}",
+                                on_click="ignore",
+                                use_container_width=True
+                            )
     
     else:
         st.warning(f"Found your profile but no stories yet.")
@@ -1178,11 +657,12 @@ else:
         2. Upload it here:
         """)
         
-        uploaded_file = st.file_uploader("Choose a JSON file", type=['json'], label_visibility="collapsed")
+        uploaded_file = st.file_uploader("Choose a JSON file", type=['json'], label_visibility="collapsed",
+                                         max_upload_size=ingest.MAX_UPLOAD_MB)
         if uploaded_file:
             try:
-                uploaded_data = json.load(uploaded_file)
-                story_count = sum(len(session.get("questions", {})) for session in uploaded_data.get("stories", {}).values())
+                uploaded_data = story_schema.as_biography(ingest.load_stories(uploaded_file))
+                story_count = uploaded_data.story_count()
                 st.success(f"✅ Loaded {story_count} stories")
                 
                 # Add export format option for manual upload
@@ -1196,70 +676,91 @@ else:
                 manual_include_questions = manual_export_format == "🎤 Interview Format (Questions & Answers)"
                 
                 if st.button("Create Biography from File", type="primary", use_container_width=True):
-                    bio_text, all_stories, author_name, story_num, chapter_num, total_words = create_beautiful_biography(
-                        uploaded_data, manual_include_questions
-                    )
-                    
+                    author_name = display_name(uploaded_data)
                     safe_name = author_name.replace(" ", "_")
                     file_suffix = "_Interview" if manual_include_questions else "_Biography"
                     
-                    # Create all formats
-                    html_bio, _ = create_html_biography(uploaded_data, manual_include_questions)
-                    md_bio = bio_text.replace("=" * 70, "#" * 3)
-                    
-                    # Try DOCX
-                    docx_data = None
-                    if DOCX_AVAILABLE:
-                        try:
-                            docx_bytes, docx_name, docx_chapters, docx_stories, docx_words = create_docx_biography(
-                                uploaded_data, manual_include_questions
-                            )
-                            docx_data = docx_bytes
-                        except Exception as e:
-                            st.warning(f"Could not create DOCX: {str(e)}")
+                    # Each format is rendered only when its button is clicked, so
+                    # nothing but the uploaded stories stays in the session
+                    def deferred(fmt):
+                        return functools.partial(render, uploaded_data, fmt, manual_include_questions)
                     
                     # Show download buttons in columns
-                    col1, col2, col3, col4 = st.columns(4)
+                    col1, col2, col3, col4, col5, col6 = st.columns(6)
                     
                     with col1:
                         st.download_button(
                             label="📄 TXT",
-                            data=bio_text,
+                            data=deferred("txt"),
                             file_name=f"{safe_name}{file_suffix}.txt",
                             mime="text/plain",
+                            on_click="ignore",
                             use_container_width=True
                         )
                     
                     with col2:
                         st.download_button(
                             label="🌐 HTML",
-                            data=html_bio,
+                            data=deferred("html"),
                             file_name=f"{safe_name}{file_suffix}.html",
                             mime="text/html",
+                            on_click="ignore",
                             use_container_width=True
                         )
                     
                     with col3:
                         st.download_button(
                             label="📝 MD",
-                            data=md_bio,
+                            data=deferred("md"),
                             file_name=f"{safe_name}{file_suffix}.md",
                             mime="text/markdown",
+                            on_click="ignore",
                             use_container_width=True
                         )
                     
                     with col4:
-                        if docx_data:
+                        if DOCX_AVAILABLE:
                             st.download_button(
                                 label="📘 DOCX",
-                                data=docx_data,
+                                data=deferred("docx"),
                                 file_name=f"{safe_name}{file_suffix}.docx",
                                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                                on_click="ignore",
                                 use_container_width=True
                             )
                         else:
                             st.button("📘 DOCX", disabled=True, use_container_width=True)
                     
+                    with col5:
+                        st.download_button(
+                            label="📕 PDF",
+                            data=deferred("pdf"),
+                            file_name=f"{safe_name}{file_suffix}.pdf",
+                            mime="application/pdf",
+                            on_click="ignore",
+                            use_container_width=True
+                        )
+                    
+                    with col6:
+                        st.download_button(
+                            label="📱 EPUB",
+                            data=deferred("epub"),
+                            file_name=f"{safe_name}{file_suffix}.epub",
+                            mime="application/epub+zip",
+                            on_click="ignore",
+                            use_container_width=True
+                        )
+                    
+                    st.download_button(
+                        label="📦 Download everything (.zip)",
+                        data=functools.partial(bundle.bundle_bytes, uploaded_data, available_formats(), manual_include_questions),
+                        file_name=bundle.bundle_name(author_name, manual_include_questions),
+                        mime=bundle.MIME_TYPE,
+                        on_click="ignore",
+                        type="primary",
+                        use_container_width=True
+                    )
+                    
                     show_celebration()
                     st.success(f"Biography created for {author_name}!")
                     
@@ -1270,4 +771,4 @@ else:
 # FOOTER
 # ============================================================================
 st.markdown("---")
-st.caption("✨ **Tell My Story Biography Publisher** • Create beautiful books from your life stories • 4 Export Formats • 2 Export Styles • Professional formatting • Celebration effects included")
+st.caption("✨ **Tell My Story Biography Publisher** • Create beautiful books from your life stories • 6 Export Formats • 2 Export Styles • Professional formatting • Celebration effects included")
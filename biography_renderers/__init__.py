@@ -0,0 +1,100 @@
+# biography_renderers - STREAMLIT-FREE BIOGRAPHY RENDERING
+#
+# The publisher page, the bulk exporter, benchmarks and tests all render
+# through this package. Nothing here imports Streamlit.
+#
+#   from biography_renderers import render, render_to
+#   html_bytes = render(stories_data, "html", include_questions=False)
+#   with open("book.pdf", "wb") as f:
+#       render_to(f, stories_data, "pdf")      # streamed page by page
+#   with open("book.epub", "wb") as f:
+#       render_to(f, stories_data, "epub")     # streamed chapter by chapter
+import story_schema
+from biography_renderers.docx_format import DOCX_AVAILABLE, create_docx_biography
+from biography_renderers.epub_format import create_epub_biography, write_epub_biography
+from biography_renderers.html_format import create_html_biography
+from biography_renderers.pdf_format import create_pdf_biography, write_pdf_biography
+from biography_renderers.text_format import create_beautiful_biography, text_to_markdown
+
+# ============================================================================
+# FORMAT REGISTRY
+# ============================================================================
+# format -> (file extension, MIME type)
+FORMATS = {
+    "txt": ("txt", "text/plain"),
+    "html": ("html", "text/html"),
+    "md": ("md", "text/markdown"),
+    "docx": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "pdf": ("pdf", "application/pdf"),
+    "epub": ("epub", "application/epub+zip"),
+}
+
+
+class UnsupportedFormat(ValueError):
+    """Raised for a format this package cannot render (or whose library is missing)"""
+
+
+def available_formats():
+    """Formats that can be rendered with the libraries installed"""
+    return [fmt for fmt in FORMATS if fmt != "docx" or DOCX_AVAILABLE]
+
+
+def file_name(author_name, fmt, include_questions=True):
+    """Download file name used by the publisher and the bulk exporter"""
+    safe_name = author_name.replace(" ", "_").replace("/", "_")
+    suffix = "_Interview" if include_questions else "_Biography"
+    return f"{safe_name}{suffix}.{FORMATS[fmt][0]}"
+
+
+# ============================================================================
+# RENDERING API
+# ============================================================================
+def iter_renders(stories_data, formats, include_questions=True, on_chapter=None):
+    """Yield (format, bytes) one format at a time, sharing the text render between txt and md
+
+    on_chapter(format, chapter_num) is called as each chapter of each format starts.
+    """
+    stories_data = story_schema.as_biography(stories_data)   # decoded once for every format
+    bio_text = None
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise UnsupportedFormat(f"Unknown export format: {fmt}")
+        chapter_hook = (lambda chapter_num, fmt=fmt: on_chapter(fmt, chapter_num)) if on_chapter else None
+
+        if fmt in ("txt", "md"):
+            if bio_text is None:
+                bio_text = create_beautiful_biography(stories_data, include_questions, chapter_hook)[0]
+            data = bio_text if fmt == "txt" else text_to_markdown(bio_text)
+            yield fmt, data.encode("utf-8")
+        elif fmt == "html":
+            yield fmt, create_html_biography(stories_data, include_questions, chapter_hook)[0].encode("utf-8")
+        elif fmt == "docx":
+            if not DOCX_AVAILABLE:
+                raise UnsupportedFormat("python-docx library not available. Please install with: pip install python-docx==1.1.0")
+            yield fmt, create_docx_biography(stories_data, include_questions, chapter_hook)[0].getvalue()
+        elif fmt == "pdf":
+            yield fmt, create_pdf_biography(stories_data, include_questions, chapter_hook)[0].getvalue()
+        elif fmt == "epub":
+            yield fmt, create_epub_biography(stories_data, include_questions, chapter_hook)[0].getvalue()
+
+
+def render(stories_data, fmt, include_questions=True):
+    """Render one format and return its bytes"""
+    for _, data in iter_renders(stories_data, [fmt], include_questions):
+        return data
+
+
+def render_to(stream, stories_data, fmt, include_questions=True, on_chapter=None):
+    """Render one format into a binary stream; returns the number of bytes written
+
+    PDF and EPUB are written to the stream as they are laid out instead of
+    being built in memory (EPUB needs a seekable stream, like a file).
+    """
+    chapter_hook = (lambda chapter_num: on_chapter(fmt, chapter_num)) if on_chapter else None
+    if fmt == "pdf":
+        return write_pdf_biography(stream, stories_data, include_questions, chapter_hook)[0]
+    if fmt == "epub":
+        return write_epub_biography(stream, stories_data, include_questions, chapter_hook)[0]
+    for _, data in iter_renders(stories_data, [fmt], include_questions, on_chapter):
+        stream.write(data)
+        return len(data)
@@ -0,0 +1,173 @@
+# chapter_cache.py - RENDERED CHAPTERS REUSED ACROSS REPUBLISHES
+#
+# Authors republish after every small change. Each renderer asks this cache
+# for a chapter's rendered fragment (TXT text, HTML, EPUB XHTML, DOCX body
+# XML) before rendering it, keyed by a hash of everything the fragment
+# depends on: format, chapter number, title, stories, the include_questions
+# flag and any numbering carried in from earlier chapters. Only changed
+# chapters are rendered again; the rest are reassembled from the cache.
+#
+# Fragments live in an in-process LRU and on disk, because export jobs run
+# in worker processes that don't share memory:
+#
+#   chapter_cache/<format>/<2 hex chars>/<key>.frag
+#
+# PDF pages are not cached: page numbers flow from one chapter to the next.
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+ENABLED = os.environ.get("CHAPTER_CACHE", "on") != "off"   # "off" renders every chapter every time
+CHAPTER_CACHE_DIR = os.environ.get("CHAPTER_CACHE_DIR", "chapter_cache")   # "" keeps the cache in memory only
+MEMORY_BUDGET_BYTES = int(os.environ.get("CHAPTER_CACHE_MEMORY_MB", "64")) * 1024 * 1024
+RETENTION_DAYS = int(os.environ.get("CHAPTER_CACHE_RETENTION_DAYS", "30"))
+PRUNE_EVERY_SECONDS = 3600   # walking the cache folder is not free; prune() is called on every export
+RENDER_VERSION = 2   # bump when a renderer's chapter output changes, so old fragments are never reused
+
+_fragments = OrderedDict()   # (format, key) -> fragment
+_memory_bytes = 0
+_stats = {}                  # format -> {"hits": n, "misses": n}
+_last_prune = 0.0
+_lock = threading.Lock()
+
+
+def chapter_key(fmt, chapter_num, title, stories, include_questions, *extra):
+    """Content hash of one chapter's inputs; stories are (question, answer, date) tuples"""
+    raw = json.dumps([RENDER_VERSION, fmt, chapter_num, title, stories, bool(include_questions), extra],
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _path(fmt, key):
+    return os.path.join(CHAPTER_CACHE_DIR, fmt, key[:2], f"{key}.frag")
+
+
+def _remember(fmt, key, fragment):
+    """Add to the in-memory LRU (caller holds _lock)"""
+    global _memory_bytes
+    if (fmt, key) in _fragments:
+        _fragments.move_to_end((fmt, key))
+        return
+    _fragments[(fmt, key)] = fragment
+    _memory_bytes += len(fragment)
+    while _memory_bytes > MEMORY_BUDGET_BYTES and _fragments:
+        _, dropped = _fragments.popitem(last=False)
+        _memory_bytes -= len(dropped)
+
+
+def _count(fmt, outcome):
+    counts = _stats.setdefault(fmt, {"hits": 0, "misses": 0})
+    counts[outcome] += 1
+
+
+def get(fmt, key):
+    """The cached fragment, or None"""
+    if not ENABLED:
+        return None
+    with _lock:
+        fragment = _fragments.get((fmt, key))
+        if fragment is not None:
+            _fragments.move_to_end((fmt, key))
+            _count(fmt, "hits")
+            return fragment
+
+    if CHAPTER_CACHE_DIR:
+        try:
+            with open(_path(fmt, key), "r", encoding="utf-8") as f:
+                fragment = f.read()
+        except OSError:
+            fragment = None
+    if fragment is None:
+        with _lock:
+            _count(fmt, "misses")
+        return None
+
+    with _lock:
+        _remember(fmt, key, fragment)
+        _count(fmt, "hits")
+    return fragment
+
+
+def put(fmt, key, fragment):
+    """Store a freshly rendered fragment"""
+    if not ENABLED:
+        return
+    with _lock:
+        _remember(fmt, key, fragment)
+    if not CHAPTER_CACHE_DIR:
+        return
+    path = _path(fmt, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic, so a worker never reads half a fragment another one is writing
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(fragment)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error caching chapter fragment: {e}")
+
+
+def cached(fmt, key, render_chapter):
+    """The cached fragment for key, rendering and storing it on a miss"""
+    fragment = get(fmt, key)
+    if fragment is None:
+        fragment = render_chapter()
+        put(fmt, key, fragment)
+    return fragment
+
+
+# ============================================================================
+# STATS AND HOUSEKEEPING
+# ============================================================================
+def stats():
+    """{format: {"hits", "misses"}} since the last reset_stats(), plus a "total" entry"""
+    with _lock:
+        result = {fmt: dict(counts) for fmt, counts in _stats.items()}
+    result["total"] = {
+        "hits": sum(c["hits"] for c in result.values()),
+        "misses": sum(c["misses"] for c in result.values()),
+    }
+    return result
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def clear():
+    """Forget every fragment, in memory and on disk"""
+    global _memory_bytes
+    with _lock:
+        _fragments.clear()
+        _memory_bytes = 0
+    prune(days=0, force=True)
+
+
+def prune(days=RETENTION_DAYS, force=False):
+    """Delete fragments on disk that haven't been written for `days` days (at most hourly unless forced)"""
+    global _last_prune
+    if not CHAPTER_CACHE_DIR or not os.path.isdir(CHAPTER_CACHE_DIR):
+        return 0
+    if not force and _last_prune and time.monotonic() - _last_prune < PRUNE_EVERY_SECONDS:
+        return 0
+    _last_prune = time.monotonic()
+    cutoff = time.time() - days * 86400
+    removed = 0
+    for root, _, files in os.walk(CHAPTER_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                if os.stat(path).st_mtime <= cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
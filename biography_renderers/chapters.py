@@ -0,0 +1,34 @@
+# chapters.py - THE BOOK STRUCTURE SHARED BY THE CHAPTER-AT-A-TIME RENDERERS
+#
+# Sessions become chapters in session order; a session with no answered
+# questions is left out, and a story is (question, answer, date recorded).
+# The DOCX, PDF and EPUB writers lay the book out from iter_chapters, and export
+# jobs count progress with it, so they all agree on chapter numbers.
+# Everything here takes a story_schema.Biography, or an export payload
+# dict that is decoded on the way in.
+import story_schema
+import text_stats
+
+
+def display_name(stories_data):
+    """Author name shown on the cover: profile name if present, else the user id"""
+    return story_schema.as_biography(stories_data).display_name
+
+
+def iter_chapters(stories_data):
+    """Yield (chapter number, title, [(question, answer, date)]) for each session with an answer"""
+    chapter_num = 0
+    for session in story_schema.as_biography(stories_data).sessions:
+        stories = [(question, answer.text, answer.date) for question, answer in session.stories()]
+        if stories:
+            chapter_num += 1
+            yield chapter_num, session.title, stories
+
+
+def count_chapters(stories_data):
+    """{"stories", "chapters", "words"} without rendering anything"""
+    stories = chapters = words = 0
+    for chapters, _, chapter_stories in iter_chapters(stories_data):
+        stories += len(chapter_stories)
+        words += sum(text_stats.word_count(answer) for _, answer, _ in chapter_stories)
+    return {"stories": stories, "chapters": chapters, "words": words}
@@ -0,0 +1,297 @@
+# docx_format.py - MICROSOFT WORD (.docx) RENDERER
+import importlib.util
+from datetime import datetime
+from io import BytesIO
+
+import story_schema
+import text_stats
+import tracing
+from biography_renderers import chapter_cache
+from biography_renderers.chapters import iter_chapters
+
+# ============================================================================
+# DOCX LIBRARY IMPORT
+# ============================================================================
+# python-docx (and lxml under it) is only imported on the first DOCX export;
+# checking that it is installed doesn't import it.
+DOCX_AVAILABLE = importlib.util.find_spec("docx") is not None
+
+
+@tracing.traced("render.docx")
+def create_docx_biography(stories_data, include_questions=True, on_chapter=None):
+    """Create a professionally formatted Word document (.docx) with option for questions
+
+    on_chapter(chapter_num) is called as each chapter starts, for progress reporting.
+    """
+    if not DOCX_AVAILABLE:
+        raise Exception("python-docx library not available. Please install with: pip install python-docx==1.1.0")
+    
+    from docx import Document
+    from docx.shared import Inches, Pt, RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+    from lxml import etree
+    
+    # Extract data
+    biography = story_schema.as_biography(stories_data)
+    author_name = biography.display_name
+    chapters = list(iter_chapters(biography))
+    
+    # Create document
+    doc = Document()
+    
+    # ========== SET UP DOCUMENT STYLES ==========
+    
+    # Title style - Check if exists first
+    try:
+        title_style = doc.styles['CustomTitle']
+    except KeyError:
+        title_style = doc.styles.add_style('CustomTitle', WD_STYLE_TYPE.PARAGRAPH)
+        title_font = title_style.font
+        title_font.name = 'Calibri Light'
+        title_font.size = Pt(28)
+        title_font.bold = True
+        title_font.color.rgb = RGBColor(44, 82, 130)  # Dark blue
+    
+    # Heading 1 style
+    heading1_style = doc.styles['Heading 1']
+    heading1_style.font.name = 'Calibri'
+    heading1_style.font.size = Pt(20)
+    heading1_style.font.bold = True
+    heading1_style.font.color.rgb = RGBColor(44, 82, 130)
+    
+    # Heading 2 style
+    heading2_style = doc.styles['Heading 2']
+    heading2_style.font.name = 'Calibri'
+    heading2_style.font.size = Pt(16)
+    heading2_style.font.bold = True
+    heading2_style.font.color.rgb = RGBColor(66, 133, 244)  # Blue
+    
+    # Normal style
+    normal_style = doc.styles['Normal']
+    normal_style.font.name = 'Calibri'
+    normal_style.font.size = Pt(11)
+    
+    # Quote style - Only create if it doesn't exist (FIXED)
+    try:
+        quote_style = doc.styles['Quote']
+    except KeyError:
+        quote_style = doc.styles.add_style('Quote', WD_STYLE_TYPE.PARAGRAPH)
+        quote_style.font.name = 'Calibri'
+        quote_style.font.size = Pt(11)
+        quote_style.font.italic = True
+        quote_style.paragraph_format.left_indent = Inches(0.5)
+        quote_style.paragraph_format.right_indent = Inches(0.5)
+    
+    # ========== CREATE COVER PAGE ==========
+    
+    title_para = doc.add_paragraph()
+    title_run = title_para.add_run("TELL MY STORY\n")
+    title_run.font.name = 'Calibri Light'
+    title_run.font.size = Pt(36)
+    title_run.font.bold = True
+    title_run.font.color.rgb = RGBColor(44, 82, 130)
+    title_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    subtitle_para = doc.add_paragraph()
+    subtitle_run = subtitle_para.add_run("A Personal Biography\n")
+    subtitle_run.font.name = 'Calibri'
+    subtitle_run.font.size = Pt(20)
+    subtitle_run.italic = True
+    subtitle_run.font.color.rgb = RGBColor(100, 100, 100)
+    subtitle_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    doc.add_paragraph("\n\n\n\n")
+    
+    # Author name
+    author_para = doc.add_paragraph()
+    author_run = author_para.add_run(f"The Life Story of\n{author_name.upper()}")
+    author_run.font.name = 'Calibri'
+    author_run.font.size = Pt(24)
+    author_run.font.color.rgb = RGBColor(0, 0, 0)
+    author_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    doc.add_paragraph("\n\n\n\n\n\n")
+    
+    # Date
+    date_para = doc.add_paragraph()
+    date_run = date_para.add_run(f"Compiled on {datetime.now().strftime('%B %d, %Y')}")
+    date_run.font.name = 'Calibri'
+    date_run.font.size = Pt(14)
+    date_run.font.color.rgb = RGBColor(100, 100, 100)
+    date_run.italic = True
+    date_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Page break
+    doc.add_page_break()
+    
+    # ========== TABLE OF CONTENTS ==========
+    
+    toc_title = doc.add_heading('TABLE OF CONTENTS', 1)
+    toc_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    doc.add_paragraph()
+    
+    # Collect all chapters for TOC
+    for _, session_title, _ in chapters:
+        para = doc.add_paragraph()
+        para.style = 'Normal'
+        run = para.add_run(f"{session_title}")
+        run.bold = True
+        run.font.size = Pt(12)
+        
+        # Add page numbers placeholder
+        para.add_run(f"\t\t\t...... ")
+    
+    doc.add_paragraph("\n")
+    
+    # ========== INTRODUCTION ==========
+    
+    intro_title = doc.add_heading('INTRODUCTION', 1)
+    intro_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    intro_para = doc.add_paragraph()
+    export_type = "Interview Q&A" if include_questions else "Biography"
+    intro_text = f"This {export_type.lower()} captures the unique life journey of {author_name}, "
+    intro_text += f"compiled from personal reflections shared on {datetime.now().strftime('%B %d, %Y')}. "
+    intro_text += "Each chapter represents a different phase of life, preserved here for future generations."
+    intro_para.add_run(intro_text)
+    
+    doc.add_page_break()
+    
+    # ========== CHAPTERS AND STORIES ==========
+    
+    # The statistics heading goes in first and chapters are inserted before
+    # it: doc.add_paragraph() scans the whole body for the section
+    # properties on every call, which is quadratic for long biographies.
+    stats_title = doc.add_heading('BIOGRAPHY STATISTICS', 1)
+    stats_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    chapter_num = 0
+    all_stories = []
+    
+    for chapter_num, session_title, stories in chapters:
+        if on_chapter:
+            on_chapter(chapter_num)
+        
+        all_stories += [(question, answer) for question, answer, _ in stories]
+        
+        # Unchanged chapters are copied in as body XML from the chapter cache
+        key = chapter_cache.chapter_key("docx", chapter_num, session_title, stories, include_questions)
+        fragment = chapter_cache.get("docx", key)
+        if fragment is not None:
+            for element in list(parse_xml(f'<w:body {nsdecls("w")}>{fragment}</w:body>')):
+                stats_title._p.addprevious(element)
+            continue
+        
+        chapter_start = stats_title._p.getprevious()
+        
+        # Chapter header
+        chapter_title = stats_title.insert_paragraph_before(f'CHAPTER {chapter_num}: {session_title.upper()}', heading1_style)
+        chapter_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        
+        stats_title.insert_paragraph_before()
+        
+        # Process each story in this chapter
+        for story_num, (question, answer, date_recorded) in enumerate(stories, 1):
+            word_count = text_stats.word_count(answer)
+            
+            # Story header - only include question if option is selected
+            if include_questions:
+                story_header = stats_title.insert_paragraph_before(f'Story {story_num}: {question}', heading2_style)
+            else:
+                story_header = stats_title.insert_paragraph_before(f'Story {story_num}', heading2_style)
+            
+            # Date if available
+            if date_recorded:
+                date_para = stats_title.insert_paragraph_before()
+                date_run = date_para.add_run(f"Recorded: {date_recorded}")
+                date_run.font.size = Pt(10)
+                date_run.font.color.rgb = RGBColor(100, 100, 100)
+                date_run.italic = True
+            
+            # Story content
+            content_para = stats_title.insert_paragraph_before()
+            content_para.add_run(answer.strip())
+            
+            # Word count
+            count_para = stats_title.insert_paragraph_before()
+            count_run = count_para.add_run(f"[{word_count} words]")
+            count_run.font.size = Pt(9)
+            count_run.font.color.rgb = RGBColor(150, 150, 150)
+            
+            stats_title.insert_paragraph_before()  # Add spacing between stories
+        
+        stats_title.insert_paragraph_before().add_run().add_break(WD_BREAK.PAGE)  # New page for next chapter
+        
+        element = chapter_start.getnext()
+        chapter_xml = []
+        while element is not stats_title._p:
+            chapter_xml.append(etree.tostring(element, encoding="unicode", with_tail=False))
+            element = element.getnext()
+        chapter_cache.put("docx", key, "".join(chapter_xml))
+    
+    # ========== STATISTICS PAGE ==========
+    
+    summary = text_stats.summarize(all_stories)
+    total_stories = len(all_stories)
+    total_words = summary.words
+    
+    doc.add_paragraph()
+    
+    # Create a table for stats
+    table = doc.add_table(rows=1, cols=2)
+    table.style = 'Light Grid'
+    
+    # Header row
+    hdr_cells = table.rows[0].cells
+    hdr_cells[0].text = 'Metric'
+    hdr_cells[1].text = 'Value'
+    
+    # Data rows
+    export_type_display = "Interview Q&A" if include_questions else "Biography"
+    metrics = [
+        ('Export Type', export_type_display),
+        ('Total Chapters', str(chapter_num)),
+        ('Total Stories', str(total_stories)),
+        ('Total Words', f"{total_words:,}"),
+        ('Average Story Length', f"{total_words//total_stories if total_stories > 0 else 0} words"),
+        ('Longest Story', f"{summary.longest[0][:50]} ({summary.longest[1].words:,} words)" if summary.longest else "-"),
+        ('Reading Time', text_stats.format_reading_time(summary.reading_minutes)),
+        ('Compiled Date', datetime.now().strftime('%B %d, %Y')),
+        ('Compiled Time', datetime.now().strftime('%I:%M %p'))
+    ]
+    
+    for metric, value in metrics:
+        row_cells = table.add_row().cells
+        row_cells[0].text = metric
+        row_cells[1].text = value
+    
+    doc.add_paragraph("\n\n")
+    
+    # Conclusion
+    conclusion_para = doc.add_paragraph()
+    conclusion_text = f"This {export_type_display.lower()} contains {total_stories} personal stories from {author_name}'s life, "
+    conclusion_text += f"totaling {total_words:,} words across {chapter_num} chapters. "
+    conclusion_text += "These memories are now preserved for future generations to cherish."
+    conclusion_para.add_run(conclusion_text)
+    
+    doc.add_paragraph("\n")
+    
+    # Footer note
+    footer_para = doc.add_paragraph()
+    footer_run = footer_para.add_run("Created with Tell My Story Biographer")
+    footer_run.font.size = Pt(10)
+    footer_run.font.color.rgb = RGBColor(150, 150, 150)
+    footer_run.italic = True
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # ========== SAVE TO BYTESIO ==========
+    
+    docx_bytes = BytesIO()
+    doc.save(docx_bytes)
+    docx_bytes.seek(0)
+    
+    return docx_bytes, author_name, chapter_num, total_stories, total_words
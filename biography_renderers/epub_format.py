@@ -0,0 +1,238 @@
+# epub_format.py - EPUB 3 E-BOOK RENDERER (NO EXTRA LIBRARIES)
+#
+# Writes the biography as a zip straight into a binary stream with
+# zipfile: a title page, one XHTML file per chapter, a statistics page,
+# and the nav document and package file (OPF) readers use for the table
+# of contents and reading order. Each chapter is deflated into the zip as
+# soon as it is rendered (or found in the chapter cache), so only the
+# chapter titles are held until the end.
+#
+#   OEBPS/title.xhtml, OEBPS/chapter-001.xhtml ..., OEBPS/stats.xhtml
+#   OEBPS/nav.xhtml, OEBPS/toc.ncx (older readers), OEBPS/content.opf
+#
+# The "mimetype" entry must come first and be stored uncompressed; the
+# rest can be in any order, so the nav and OPF are written last, once
+# every chapter is known.
+import html
+import re
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from io import BytesIO
+
+import story_schema
+import text_stats
+import tracing
+from biography_renderers import chapter_cache
+from biography_renderers.chapters import iter_chapters
+
+# ============================================================================
+# PACKAGE LAYOUT
+# ============================================================================
+CONTAINER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+'''
+
+# Same palette as the HTML and DOCX exports; e-readers override fonts anyway
+STYLESHEET = '''body { font-family: serif; line-height: 1.6; margin: 0 5%; }
+h1, h2 { color: #2c5282; text-align: center; }
+h1 { margin-top: 30%; font-size: 2em; }
+h2 { margin: 1.5em 0 1em; page-break-before: always; }
+.kicker { color: #666; text-align: center; font-size: 0.9em; letter-spacing: 0.1em; margin-top: 2em; }
+.subtitle { color: #666; text-align: center; font-style: italic; }
+.story { margin: 1.5em 0; }
+.question { color: #2c5282; font-weight: bold; margin-bottom: 0.2em; }
+.recorded { color: #718096; font-size: 0.8em; font-style: italic; margin-top: 0; }
+.answer { text-indent: 1.2em; margin: 0.4em 0; }
+.stats { list-style: none; padding: 0; text-align: center; }
+.footer { color: #718096; text-align: center; font-style: italic; margin-top: 3em; }
+'''
+
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _text(value):
+    """Escape for XHTML, dropping control characters that make the file invalid XML"""
+    return html.escape(_XML_INVALID.sub("", str(value)))
+
+
+def _page(title):
+    """(head, tail) of an XHTML content document"""
+    head = (f'<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE html>\n'
+            f'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="en" xml:lang="en">\n'
+            f'<head><meta charset="UTF-8"/><title>{_text(title)}</title>'
+            f'<link rel="stylesheet" type="text/css" href="style.css"/></head>\n'
+            f'<body>\n')
+    return head, "</body>\n</html>\n"
+
+
+def chapter_file(chapter_num):
+    return f"chapter-{chapter_num:03d}.xhtml"
+
+
+# ============================================================================
+# BIOGRAPHY
+# ============================================================================
+@tracing.traced("render.epub")
+def write_epub_biography(stream, stories_data, include_questions=True, on_chapter=None):
+    """Stream the biography as an EPUB 3 zip into a seekable binary stream
+
+    Returns (bytes written, display name, chapters, stories, words).
+    on_chapter(chapter_num) is called as each chapter starts, for progress reporting.
+    """
+    start = stream.tell()
+    stories_data = story_schema.as_biography(stories_data)
+    display_name = stories_data.display_name
+    user_profile = stories_data.user_profile
+    export_type = "Interview Q&A" if include_questions else "Biography"
+    book_title = f"{display_name}'s {export_type}"
+    # Stable per author and style, so re-exporting updates the same book in a reader's library
+    book_id = uuid.uuid5(uuid.NAMESPACE_URL, f"tellmystory:{stories_data.user}:{export_type}")
+
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        book.writestr("META-INF/container.xml", CONTAINER_XML)
+        book.writestr("OEBPS/style.css", STYLESHEET)
+
+        # ========== TITLE PAGE ==========
+        head, tail = _page(book_title)
+        title_page = [head, '<section epub:type="titlepage">\n',
+                      '<p class="kicker">TELL MY STORY</p>\n',
+                      f'<h1>The Life Story of {_text(display_name)}</h1>\n',
+                      f'<p class="subtitle">A Personal {_text(export_type)}</p>\n']
+        if user_profile and user_profile.get('birthdate'):
+            title_page.append(f'<p class="subtitle">Born {_text(user_profile.get("birthdate"))}</p>\n')
+        title_page += [f'<p class="footer">Compiled on {datetime.now().strftime("%B %d, %Y")}</p>\n', '</section>\n', tail]
+        book.writestr("OEBPS/title.xhtml", "".join(title_page))
+
+        # ========== CHAPTERS, ONE FILE EACH ==========
+        chapter_titles = []
+        total_stories = 0
+        total_words = 0
+        for chapter_num, title, stories in iter_chapters(stories_data):
+            if on_chapter:
+                on_chapter(chapter_num)
+            chapter_titles.append(title)
+            total_stories += len(stories)
+            total_words += sum(text_stats.word_count(answer) for _, answer, _ in stories)
+            head, tail = _page(title)
+            key = chapter_cache.chapter_key("epub", chapter_num, title, stories, include_questions)
+            section = chapter_cache.cached("epub", key, lambda: _chapter_section(chapter_num, title, stories, include_questions))
+            with book.open(f"OEBPS/{chapter_file(chapter_num)}", "w") as f:
+                f.write(head.encode("utf-8"))
+                f.write(section.encode("utf-8"))
+                f.write(tail.encode("utf-8"))
+
+        # ========== STATISTICS ==========
+        head, tail = _page(f"{export_type} Statistics")
+        stats = [head, '<section epub:type="appendix">\n']
+        if not chapter_titles:
+            stats.append('<p class="subtitle">No stories found to publish.</p>\n')
+        stats.append(f'<h2>{_text(export_type.upper())} STATISTICS</h2>\n<ul class="stats">\n')
+        for label, value in (("Export Type", export_type), ("Total Stories", f"{total_stories:,}"),
+                             ("Total Chapters", f"{len(chapter_titles):,}"), ("Total Words", f"{total_words:,}"),
+                             ("Compiled", datetime.now().strftime('%B %d, %Y at %I:%M %p'))):
+            stats.append(f'<li>{label}: {_text(value)}</li>\n')
+        stats += ['</ul>\n<p class="footer">This digital legacy was created with Tell My Story Biographer.</p>\n',
+                  '</section>\n', tail]
+        book.writestr("OEBPS/stats.xhtml", "".join(stats))
+
+        # ========== NAVIGATION AND PACKAGE (now that every chapter is known) ==========
+        chapters = list(enumerate(chapter_titles, 1))
+        book.writestr("OEBPS/nav.xhtml", _nav_document(book_title, chapters))
+        book.writestr("OEBPS/toc.ncx", _ncx(book_id, book_title, chapters))
+        book.writestr("OEBPS/content.opf", _package_document(book_id, book_title, display_name, chapters))
+
+    return stream.tell() - start, display_name, len(chapter_titles), total_stories, total_words
+
+
+def _chapter_section(chapter_num, title, stories, include_questions):
+    """The <section> of one chapter file"""
+    parts = [f'<section epub:type="chapter">\n<p class="kicker">CHAPTER {chapter_num}</p>\n'
+             f'<h2 id="chapter">{_text(title)}</h2>\n']
+    for story_num, (question, answer, date_recorded) in enumerate(stories, 1):
+        parts.append('<div class="story">\n')
+        heading = f"Story {story_num}: {question}" if include_questions else f"Story {story_num}"
+        parts.append(f'<p class="question">{_text(heading)}</p>\n')
+        if date_recorded:
+            parts.append(f'<p class="recorded">Recorded: {_text(date_recorded)}</p>\n')
+        for para in answer.strip().split('\n'):
+            if para.strip():
+                parts.append(f'<p class="answer">{_text(para.strip())}</p>\n')
+        parts.append('</div>\n')
+    parts.append("</section>\n")
+    return "".join(parts)
+
+
+def _nav_document(book_title, chapters):
+    head, tail = _page(book_title)
+    items = "".join(f'    <li><a href="{chapter_file(num)}">Chapter {num}: {_text(title)}</a></li>\n'
+                    for num, title in chapters)
+    return (f'{head}<nav epub:type="toc" id="toc">\n  <h1>Table of Contents</h1>\n  <ol>\n'
+            f'    <li><a href="title.xhtml">Title Page</a></li>\n{items}'
+            f'    <li><a href="stats.xhtml">Statistics</a></li>\n  </ol>\n</nav>\n'
+            f'<nav epub:type="landmarks" hidden="hidden">\n  <ol>\n'
+            f'    <li><a epub:type="titlepage" href="title.xhtml">Title Page</a></li>\n'
+            f'    <li><a epub:type="bodymatter" href="{chapter_file(1) if chapters else "stats.xhtml"}">Start</a></li>\n'
+            f'  </ol>\n</nav>\n{tail}')
+
+
+def _ncx(book_id, book_title, chapters):
+    """EPUB 2 table of contents, for readers that don't understand nav.xhtml"""
+    points = [("title", "Title Page", "title.xhtml")]
+    points += [(f"chapter-{num}", f"Chapter {num}: {title}", chapter_file(num)) for num, title in chapters]
+    points.append(("stats", "Statistics", "stats.xhtml"))
+    nav_points = "".join(
+        f'    <navPoint id="{point_id}" playOrder="{order}"><navLabel><text>{_text(label)}</text></navLabel>'
+        f'<content src="{src}"/></navPoint>\n'
+        for order, (point_id, label, src) in enumerate(points, 1))
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+            f'  <head><meta name="dtb:uid" content="urn:uuid:{book_id}"/></head>\n'
+            f'  <docTitle><text>{_text(book_title)}</text></docTitle>\n'
+            f'  <navMap>\n{nav_points}  </navMap>\n</ncx>\n')
+
+
+def _package_document(book_id, book_title, display_name, chapters):
+    modified = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    manifest = "".join(f'    <item id="chapter-{num}" href="{chapter_file(num)}" media-type="application/xhtml+xml"/>\n'
+                       for num, _ in chapters)
+    spine = "".join(f'    <itemref idref="chapter-{num}"/>\n' for num, _ in chapters)
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" xml:lang="en">\n'
+            f'  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'    <dc:identifier id="book-id">urn:uuid:{book_id}</dc:identifier>\n'
+            f'    <dc:title>{_text(book_title)}</dc:title>\n'
+            f'    <dc:creator>{_text(display_name)}</dc:creator>\n'
+            f'    <dc:language>en</dc:language>\n'
+            f'    <dc:publisher>Tell My Story Biographer</dc:publisher>\n'
+            f'    <meta property="dcterms:modified">{modified}</meta>\n'
+            f'  </metadata>\n'
+            f'  <manifest>\n'
+            f'    <item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+            f'    <item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>\n'
+            f'    <item id="style" href="style.css" media-type="text/css"/>\n'
+            f'    <item id="title" href="title.xhtml" media-type="application/xhtml+xml"/>\n'
+            f'{manifest}'
+            f'    <item id="stats" href="stats.xhtml" media-type="application/xhtml+xml"/>\n'
+            f'  </manifest>\n'
+            f'  <spine toc="ncx">\n'
+            f'    <itemref idref="title"/>\n'
+            f'{spine}'
+            f'    <itemref idref="stats"/>\n'
+            f'  </spine>\n'
+            f'</package>\n')
+
+
+def create_epub_biography(stories_data, include_questions=True, on_chapter=None):
+    """EPUB in memory, returned like create_docx_biography: (BytesIO, name, chapters, stories, words)"""
+    buffer = BytesIO()
+    _, display_name, chapter_num, total_stories, total_words = write_epub_biography(
+        buffer, stories_data, include_questions, on_chapter
+    )
+    buffer.seek(0)
+    return buffer, display_name, chapter_num, total_stories, total_words
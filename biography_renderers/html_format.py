@@ -0,0 +1,266 @@
+# html_format.py - SELF-CONTAINED HTML RENDERER
+#
+# The export is one file: the stylesheet is minified into <head> and the
+# fonts bundled in biography_renderers/fonts (web_fonts.py) are embedded
+# as subsets holding only the characters the book uses, so those open
+# offline. A family with no bundled files still comes from Google Fonts.
+import os
+import re
+from datetime import datetime
+from html import unescape
+
+import tracing
+from biography_renderers import chapter_cache, web_fonts
+from biography_renderers.text_format import chapter_runs, create_beautiful_biography
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+# "embed": subsetted fonts inlined, families without bundled files from Google
+# "google": @import from Google Fonts, as before (needs a network connection)
+# "local": installed fonts only
+HTML_FONTS = os.environ.get("HTML_FONTS", "embed")
+GOOGLE_FONTS_FAMILIES = {
+    "Crimson Text": "family=Crimson+Text:ital,wght@0,400;0,600;0,700;1,400",
+    "Open Sans": "family=Open+Sans:wght@300;400;600",
+}
+
+STYLESHEET = """
+body {
+    font-family: 'Crimson Text', Georgia, 'Times New Roman', serif;
+    line-height: 1.8;
+    color: #333;
+    max-width: 800px;
+    margin: 0 auto;
+    padding: 40px 20px;
+    background: #fefefe;
+}
+.header {
+    text-align: center;
+    padding: 40px 0;
+    border-bottom: 3px double #2c5282;
+    margin-bottom: 40px;
+}
+h1 {
+    font-size: 2.8em;
+    color: #2c5282;
+    margin-bottom: 10px;
+}
+.subtitle {
+    font-family: 'Open Sans', 'Helvetica Neue', Arial, sans-serif;
+    font-size: 1.2em;
+    color: #666;
+}
+.chapter {
+    margin: 50px 0;
+}
+.chapter-title {
+    color: #2c5282;
+    border-bottom: 2px solid #e2e8f0;
+    padding-bottom: 10px;
+    margin-bottom: 30px;
+}
+.story {
+    margin: 30px 0;
+    padding: 25px;
+    background: #f8fafc;
+    border-radius: 8px;
+    border-left: 4px solid #4299e1;
+}
+.question {
+    font-weight: 700;
+    color: #2d3748;
+    margin-bottom: 15px;
+    font-size: 1.2em;
+}
+.answer {
+    white-space: pre-line;
+    font-size: 1.1em;
+}
+.stats {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 30px;
+    border-radius: 15px;
+    text-align: center;
+    margin: 40px 0;
+}
+.stat-item {
+    display: inline-block;
+    margin: 0 20px;
+}
+.stat-number {
+    font-size: 2.5em;
+    font-weight: 700;
+    display: block;
+}
+.footer {
+    text-align: center;
+    margin-top: 50px;
+    padding-top: 20px;
+    border-top: 2px solid #e2e8f0;
+    color: #718096;
+}
+@media print {
+    body { padding: 0; }
+    .no-print { display: none; }
+}
+"""
+
+
+def minify_css(css):
+    """Drop comments and the whitespace CSS doesn't need"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+MINIFIED_STYLESHEET = minify_css(STYLESHEET)
+
+
+def google_fonts_import(families):
+    """@import rule fetching `families` from Google Fonts"""
+    query = "&".join(GOOGLE_FONTS_FAMILIES[family] for family in GOOGLE_FONTS_FAMILIES if family in families)
+    return f"@import url('https://fonts.googleapis.com/css2?{query}&display=swap');"
+
+
+GOOGLE_FONTS_IMPORT = google_fonts_import(GOOGLE_FONTS_FAMILIES)
+
+
+@tracing.traced("render.html")
+def create_html_biography(stories_data, include_questions=True, on_chapter=None, fonts=None):
+    """Create an HTML version with option for questions (on_chapter as in create_beautiful_biography)
+
+    fonts is one of the HTML_FONTS modes, defaulting to HTML_FONTS.
+    """
+    bio_text, all_stories, display_name, story_num, chapter_num, total_words = create_beautiful_biography(stories_data, include_questions)
+    
+    export_type = "Interview Q&A" if include_questions else "Biography"
+    subtitle = f"{export_type} • {datetime.now().strftime('%B %d, %Y')}"
+    
+    body = f'''
+    <div class="header">
+        <h1>{display_name}'s Life Story</h1>
+        <div class="subtitle">{subtitle}</div>
+    </div>
+    
+    <div class="stats">
+        <div class="stat-item">
+            <span class="stat-number">{chapter_num}</span>
+            <span>Chapters</span>
+        </div>
+        <div class="stat-item">
+            <span class="stat-number">{story_num}</span>
+            <span>Stories</span>
+        </div>
+        <div class="stat-item">
+            <span class="stat-number">{total_words:,}</span>
+            <span>Words</span>
+        </div>
+    </div>
+    
+    <div class="content">
+'''
+
+    # Add chapters; unchanged chapters come from the chapter cache
+    chapter_num = 0
+    
+    for session, stories in chapter_runs(all_stories):
+        chapter_num += 1
+        if on_chapter:
+            on_chapter(chapter_num)
+        key = chapter_cache.chapter_key("html", chapter_num, session,
+                                        [(s["question"], s["answer"], s["date"]) for s in stories],
+                                        include_questions)
+        body += chapter_cache.cached("html", key, lambda: _html_chapter(chapter_num, session, stories, include_questions))
+
+    body += f'''
+    </div>
+    
+    <div class="footer">
+        <p>Created with Tell My Story Biographer • {export_type}</p>
+        <p>{datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
+    </div>
+    
+    <div class="no-print" style="text-align: center; margin-top: 40px;">
+        <button onclick="window.print()" style="
+            background: #48bb78;
+            color: white;
+            border: none;
+            padding: 12px 30px;
+            border-radius: 8px;
+            font-size: 1.1em;
+            cursor: pointer;
+            margin: 20px;
+        ">
+            🖨️ Print This {export_type}
+        </button>
+    </div>
+'''
+
+    # The head comes last: embedded fonts are cut down to the characters in the body
+    html = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{display_name}'s {export_type}</title>
+    <style>{_font_css(fonts or HTML_FONTS, body, subtitle)}{MINIFIED_STYLESHEET}</style>
+</head>
+<body>{body}</body>
+</html>'''
+    
+    return html, display_name
+
+
+def _font_css(fonts, body, subtitle):
+    """Font rules for the head: Crimson Text sets the whole body, Open Sans only the subtitle"""
+    if fonts == "google":
+        return GOOGLE_FONTS_IMPORT
+    if fonts == "embed":
+        # Subsets hold the characters readers see, not the markup around them
+        rules = web_fonts.font_face_css({"Crimson Text": _visible_text(body), "Open Sans": subtitle})
+        # Families that can't be embedded here (no font files, or no fontTools) come from Google rather than not at all
+        missing = [family for family in GOOGLE_FONTS_FAMILIES if family not in web_fonts.embeddable_families()]
+        return (google_fonts_import(missing) if missing else "") + rules
+    return ""
+
+
+def _visible_text(markup):
+    """The text of an HTML fragment, tags stripped and entities decoded"""
+    return unescape(re.sub(r"<[^>]*>", "", markup))
+
+
+def _html_chapter(chapter_num, session, stories, include_questions):
+    """One chapter's <div class="chapter">"""
+    html = f'''
+            <div class="chapter">
+                <h2 class="chapter-title">Chapter {chapter_num}: {session}</h2>
+            '''
+    
+    for story in stories:
+        html += f'''
+        <div class="story">
+        '''
+        
+        # Include question only if selected
+        if include_questions:
+            html += f'''
+            <div class="question">✏️ {story['question']}</div>
+            '''
+        
+        html += f'''
+            <div class="answer">{story['answer']}</div>
+        '''
+        
+        if story['date']:
+            html += f'''
+            <div style="margin-top: 15px; font-size: 0.9em; color: #718096;">
+                Recorded: {story['date']}
+            </div>
+            '''
+        
+        html += '</div>'
+    
+    return html + '</div>'
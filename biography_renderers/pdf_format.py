@@ -0,0 +1,435 @@
+# pdf_format.py - PRINT-READY PDF RENDERER (NO EXTRA LIBRARIES)
+#
+# Writes PDF 1.4 straight to a binary stream, one page at a time. Only the
+# current page's drawing commands and one byte offset per PDF object are
+# kept in memory, so a 2,000-page biography needs about as much memory as
+# a 20-page one. Text is set in the Helvetica family every PDF reader has
+# built in (WinAnsi encoding): characters outside it fall back to their
+# unaccented letter, or "?".
+#
+# The book has a cover, a table of contents with page numbers and links,
+# chapters that each start a new page under a running header, page
+# numbers, a statistics page, and one bookmark (outline) per chapter.
+#
+# The table of contents is second in reading order but written last, once
+# the chapter page numbers are known: page order comes from the /Pages
+# tree, not from where the pages sit in the file.
+import math
+import unicodedata
+import zlib
+from datetime import datetime
+from io import BytesIO
+
+import story_schema
+import text_stats
+import tracing
+from biography_renderers.chapters import iter_chapters
+
+# ============================================================================
+# PAGE SETUP
+# ============================================================================
+PAGE_WIDTH = 595.28     # A4, in points
+PAGE_HEIGHT = 841.89
+MARGIN_X = 72
+MARGIN_TOP = 80
+MARGIN_BOTTOM = 72
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN_X
+
+BODY_SIZE = 11
+LEADING = 1.45          # line height as a multiple of the font size
+TOC_ENTRIES_PER_PAGE = 32
+
+BLUE = (0.173, 0.322, 0.510)   # headings, as in the DOCX export
+GREY = (0.4, 0.4, 0.4)
+BLACK = (0, 0, 0)
+
+# font -> (resource name, base font)
+FONTS = {
+    "regular": (b"F1", b"Helvetica"),
+    "bold": (b"F2", b"Helvetica-Bold"),
+    "italic": (b"F3", b"Helvetica-Oblique"),
+}
+
+# ============================================================================
+# FONT METRICS
+# ============================================================================
+# Advance widths (1/1000 em) of characters 32-126, from the Adobe AFM files
+_HELVETICA = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD = (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+# Upper WinAnsi characters that are not just an accented ASCII letter
+_PUNCTUATION = {"‘": 222, "’": 222, "‚": 222, "“": 333, "”": 333, "„": 333, "–": 556, "—": 1000,
+                "…": 1000, "•": 350, "€": 556, "£": 556, "©": 737, "®": 737, "°": 400, "×": 584,
+                "«": 556, "»": 556, "æ": 889, "Æ": 1000, "œ": 944, "Œ": 1000, "ß": 611, "ø": 611, "Ø": 778}
+
+
+def _width_table(ascii_widths):
+    """Width of every WinAnsi byte; accented letters take their base letter's width"""
+    table = [0] * 256
+    table[32:127] = ascii_widths
+    for code in range(128, 256):
+        char = bytes([code]).decode("cp1252", errors="ignore")
+        if not char:
+            continue
+        if char in _PUNCTUATION:
+            table[code] = _PUNCTUATION[char]
+            continue
+        base = unicodedata.normalize("NFKD", char)[:1]
+        table[code] = ascii_widths[ord(base) - 32] if base and 32 <= ord(base) < 127 else 556
+    return table
+
+
+_WIDTHS = {"regular": _width_table(_HELVETICA), "bold": _width_table(_HELVETICA_BOLD),
+           "italic": _width_table(_HELVETICA)}
+
+
+def encode_text(text):
+    """WinAnsi bytes for a PDF string; unencodable characters become their base letter or '?'"""
+    try:
+        return text.encode("cp1252")
+    except UnicodeEncodeError:
+        pass
+    out = bytearray()
+    for char in text:
+        try:
+            out += char.encode("cp1252")
+        except UnicodeEncodeError:
+            if unicodedata.category(char) in ("Mn", "Cf"):
+                continue   # combining marks, zero-width joiners
+            out += unicodedata.normalize("NFKD", char).encode("cp1252", "ignore") or b"?"
+    return bytes(out)
+
+
+def _pdf_string(data):
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").replace(b"\r", b"\\r") + b")"
+
+
+# ============================================================================
+# PDF OBJECT WRITER
+# ============================================================================
+class PdfStreamWriter:
+    """Numbered PDF objects written in order, remembering each offset for the xref table"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+        self.offsets = {}
+        self.next_number = 1
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.stream.write(data)
+        self.position += len(data)
+
+    def reserve(self):
+        """Object number for something written later (so others can refer to it now)"""
+        number = self.next_number
+        self.next_number += 1
+        return number
+
+    def add(self, body, number=None):
+        number = number or self.reserve()
+        self.offsets[number] = self.position
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        return number
+
+    def add_stream(self, data, number=None):
+        compressed = zlib.compress(data, 6)
+        return self.add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(compressed), compressed), number)
+
+    def close(self, root, info):
+        """Cross-reference table and trailer"""
+        xref_at = self.position
+        rows = [b"xref\n0 %d\n0000000000 65535 f \n" % self.next_number]
+        rows.extend(b"%010d 00000 n \n" % self.offsets[number] for number in range(1, self.next_number))
+        self._write(b"".join(rows))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self.next_number, root, info, xref_at))
+
+
+# ============================================================================
+# PAGE LAYOUT
+# ============================================================================
+class _BookWriter:
+    """Lays text out onto pages and hands each finished page to the PdfStreamWriter"""
+
+    def __init__(self, stream, display_name):
+        self.pdf = PdfStreamWriter(stream)
+        self.display_name = display_name
+        self.catalog = self.pdf.reserve()
+        self.pages_root = self.pdf.reserve()
+        self.info = self.pdf.reserve()
+        fonts = b" ".join(
+            b"/%s %d 0 R" % (name, self.pdf.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base))
+            for name, base in FONTS.values()
+        )
+        self.resources = b"<< /Font << %s >> >>" % fonts
+        self.page_refs = {}       # printed page number -> page object number
+        self.page_count = 0
+        self.ops = None
+        self.links = []
+        self.y = 0
+        self.header = None
+        self.word_widths = {}
+        self.toc_entries = []     # (chapter number, title, page number)
+
+    # ---------- pages ----------
+    def start_page(self, number, header=None):
+        """Open page `number` (its object number is reserved now, so links can point at it)"""
+        self.page_refs[number] = self.pdf.reserve()
+        self.current_number = number
+        self.header = header
+        self.ops = []
+        self.links = []
+        self.y = PAGE_HEIGHT - MARGIN_TOP
+
+    def end_page(self, show_number=True):
+        if self.header:
+            self.draw(MARGIN_X, PAGE_HEIGHT - 45, encode_text(self.header), "italic", 9, GREY)
+        if show_number:
+            label = b"%d" % self.current_number
+            self.draw((PAGE_WIDTH - self.width(label, "regular", 9)) / 2, 40, label, "regular", 9, GREY)
+        content = self.pdf.add_stream(b"\n".join(self.ops))
+        annots = b""
+        if self.links:
+            annots = b" /Annots [%s]" % b" ".join(
+                b"<< /Type /Annot /Subtype /Link /Rect [%.2f %.2f %.2f %.2f] /Border [0 0 0] /Dest [%d 0 R /XYZ 0 %.2f 0] >>"
+                % (x1, y1, x2, y2, target, PAGE_HEIGHT) for x1, y1, x2, y2, target in self.links
+            )
+        self.pdf.add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents %d 0 R%s >>"
+                     % (self.pages_root, PAGE_WIDTH, PAGE_HEIGHT, self.resources, content, annots),
+                     self.page_refs[self.current_number])
+        self.page_count += 1
+        self.ops = None
+
+    def next_page(self):
+        """Continue the flow on a new page with the same running header"""
+        self.end_page()
+        self.start_page(self.current_number + 1, self.header)
+
+    # ---------- text ----------
+    def width(self, data, font, size):
+        table = _WIDTHS[font]
+        return sum(table[b] for b in data) * size / 1000
+
+    def draw(self, x, y, data, font, size, color=BLACK):
+        self.ops.append(b"BT %.3f %.3f %.3f rg /%s %g Tf %.2f %.2f Td %s Tj ET"
+                        % (*color, FONTS[font][0], size, x, y, _pdf_string(data)))
+
+    def wrap(self, text, font, size, max_width):
+        """Greedy word wrap into lines of WinAnsi bytes"""
+        space = self.width(b" ", font, size)
+        cache = self.word_widths
+        if len(cache) > 50000:
+            cache.clear()
+        lines = []
+        line = []
+        line_width = 0.0
+        for word in encode_text(text).split():
+            key = (word, font, size)
+            word_width = cache.get(key)
+            if word_width is None:
+                word_width = cache[key] = self.width(word, font, size)
+            if word_width > max_width:
+                # A single word wider than the line: break it by characters
+                if line:
+                    lines.append(b" ".join(line))
+                    line, line_width = [], 0.0
+                piece = b""
+                for code in word:
+                    char = bytes([code])
+                    if piece and self.width(piece + char, font, size) > max_width:
+                        lines.append(piece)
+                        piece = b""
+                    piece += char
+                line, line_width = [piece], self.width(piece, font, size)
+                continue
+            if line and line_width + space + word_width > max_width:
+                lines.append(b" ".join(line))
+                line, line_width = [], 0.0
+            line_width += (space if line else 0) + word_width
+            line.append(word)
+        if line:
+            lines.append(b" ".join(line))
+        return lines
+
+    def paragraph(self, text, font="regular", size=BODY_SIZE, color=BLACK, align="left", space_after=None):
+        """Flow wrapped text down the page, breaking to new pages as needed"""
+        line_height = size * LEADING
+        for line in self.wrap(text, font, size, TEXT_WIDTH):
+            if self.y - line_height < MARGIN_BOTTOM:
+                self.next_page()
+            self.y -= line_height
+            x = MARGIN_X
+            if align == "center":
+                x = (PAGE_WIDTH - self.width(line, font, size)) / 2
+            self.draw(x, self.y, line, font, size, color)
+        self.y -= size * 0.6 if space_after is None else space_after
+
+    def keep_space(self, height):
+        """Start a new page unless `height` points are left (keeps headings with their text)"""
+        if self.y - height < MARGIN_BOTTOM:
+            self.next_page()
+
+    # ---------- finishing ----------
+    def table_of_contents(self, entries, first_number, pages):
+        """Write the TOC pages (numbered from first_number) now that chapter pages are known"""
+        size = 11
+        line_height = size * 1.9
+        for page_index in range(pages):
+            self.start_page(first_number + page_index)
+            if page_index == 0:
+                self.paragraph("TABLE OF CONTENTS", "bold", 18, BLUE, "center", space_after=24)
+            chunk = entries[page_index * TOC_ENTRIES_PER_PAGE:(page_index + 1) * TOC_ENTRIES_PER_PAGE]
+            if not chunk and page_index == 0:
+                self.paragraph("No chapters yet.", "italic", size, GREY, "center")
+            for chapter_num, title, page_number in chunk:
+                self.y -= line_height
+                number = b"%d" % page_number
+                number_width = self.width(number, "regular", size)
+                label = encode_text(f"Chapter {chapter_num}: {title}")
+                # Shorten long titles so the dot leader and page number still fit
+                limit = TEXT_WIDTH - number_width - 30
+                if self.width(label, "regular", size) > limit:
+                    while len(label) > 1 and self.width(label + b"...", "regular", size) > limit:
+                        label = label[:-1]
+                    label = label.rstrip() + b"..."
+                label_width = self.width(label, "regular", size)
+                dot_width = self.width(b".", "regular", size)
+                dots = b"." * max(0, int((TEXT_WIDTH - label_width - number_width - 12) / dot_width))
+                self.draw(MARGIN_X, self.y, label, "regular", size)
+                self.draw(MARGIN_X + label_width + 6, self.y, dots, "regular", size, GREY)
+                self.draw(PAGE_WIDTH - MARGIN_X - number_width, self.y, number, "regular", size)
+                self.links.append((MARGIN_X, self.y - 3, PAGE_WIDTH - MARGIN_X, self.y + size, self.page_refs[page_number]))
+            self.end_page()
+
+    def outlines(self, entries):
+        """One bookmark per chapter; returns the outline root object number"""
+        root = self.pdf.reserve()
+        items = [self.pdf.reserve() for _ in entries]
+        for i, (chapter_num, title, page_number) in enumerate(entries):
+            links = b""
+            if i > 0:
+                links += b" /Prev %d 0 R" % items[i - 1]
+            if i < len(items) - 1:
+                links += b" /Next %d 0 R" % items[i + 1]
+            self.pdf.add(b"<< /Title %s /Parent %d 0 R /Dest [%d 0 R /XYZ 0 %.2f 0]%s >>"
+                         % (_pdf_string(encode_text(f"Chapter {chapter_num}: {title}")), root,
+                            self.page_refs[page_number], PAGE_HEIGHT, links), items[i])
+        if items:
+            self.pdf.add(b"<< /Type /Outlines /First %d 0 R /Last %d 0 R /Count %d >>" % (items[0], items[-1], len(items)), root)
+        else:
+            self.pdf.add(b"<< /Type /Outlines /Count 0 >>", root)
+        return root
+
+    def close(self, title):
+        outlines = self.outlines(self.toc_entries)
+        kids = b" ".join(b"%d 0 R" % self.page_refs[number] for number in sorted(self.page_refs))
+        self.pdf.add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_refs)), self.pages_root)
+        self.pdf.add(b"<< /Type /Catalog /Pages %d 0 R /Outlines %d 0 R /PageMode /UseOutlines >>"
+                     % (self.pages_root, outlines), self.catalog)
+        self.pdf.add(b"<< /Title %s /Author %s /Creator (Tell My Story Biographer) /CreationDate (D:%s) >>"
+                     % (_pdf_string(encode_text(title)), _pdf_string(encode_text(self.display_name)),
+                        datetime.now().strftime("%Y%m%d%H%M%S").encode()), self.info)
+        self.pdf.close(self.catalog, self.info)
+
+
+# ============================================================================
+# BIOGRAPHY
+# ============================================================================
+@tracing.traced("render.pdf")
+def write_pdf_biography(stream, stories_data, include_questions=True, on_chapter=None):
+    """Stream the biography as a PDF into a binary stream
+
+    Returns (bytes written, pages, display name, chapters, stories, words).
+    on_chapter(chapter_num) is called as each chapter starts, for progress reporting.
+    """
+    stories_data = story_schema.as_biography(stories_data)
+    user_profile = stories_data.user_profile
+    display_name = stories_data.display_name
+
+    export_type = "Interview Q&A" if include_questions else "Biography"
+    chapters = list(iter_chapters(stories_data))
+    toc_pages = max(1, math.ceil(len(chapters) / TOC_ENTRIES_PER_PAGE))
+    book = _BookWriter(stream, display_name)
+
+    # ========== COVER (page 1) ==========
+    book.start_page(1)
+    book.y = PAGE_HEIGHT - 200
+    book.paragraph("TELL MY STORY", "bold", 30, BLUE, "center", space_after=8)
+    book.paragraph(f"A Personal {export_type}", "italic", 16, GREY, "center", space_after=120)
+    book.paragraph("The Life Story of", "regular", 18, BLACK, "center", space_after=6)
+    book.paragraph(display_name.upper(), "bold", 24, BLACK, "center", space_after=20)
+    if user_profile and user_profile.get('birthdate'):
+        book.paragraph(f"Born {user_profile.get('birthdate')}", "regular", 12, GREY, "center")
+    book.y = 160
+    book.paragraph(f"Compiled on {datetime.now().strftime('%B %d, %Y')}", "italic", 13, GREY, "center")
+    book.end_page(show_number=False)
+
+    # ========== CHAPTERS (after the table of contents pages) ==========
+    next_page = 2 + toc_pages
+    total_stories = 0
+    total_words = 0
+    for chapter_num, title, stories in chapters:
+        if on_chapter:
+            on_chapter(chapter_num)
+        book.start_page(next_page, f"{display_name}  •  {title}")
+        book.toc_entries.append((chapter_num, title, next_page))
+        book.paragraph(f"CHAPTER {chapter_num}", "bold", 12, GREY, "center", space_after=4)
+        book.paragraph(title.upper(), "bold", 22, BLUE, "center", space_after=28)
+
+        for story_num, (question, answer, date_recorded) in enumerate(stories, 1):
+            total_stories += 1
+            total_words += text_stats.word_count(answer)
+            book.keep_space(BODY_SIZE * LEADING * 5)
+            heading = f"Story {story_num}: {question}" if include_questions else f"Story {story_num}"
+            book.paragraph(heading, "bold", 14, BLUE, space_after=2)
+            if date_recorded:
+                book.paragraph(f"Recorded: {date_recorded}", "italic", 9, GREY, space_after=8)
+            for para in answer.strip().split('\n'):
+                if para.strip():
+                    book.paragraph(para.strip(), space_after=7)
+            book.y -= 14
+        next_page = book.current_number + 1
+        book.end_page()
+
+    # ========== STATISTICS ==========
+    book.start_page(next_page)
+    if not chapters:
+        book.paragraph("No stories found to publish.", "italic", 14, GREY, "center", space_after=30)
+    book.paragraph(f"{export_type.upper()} STATISTICS", "bold", 18, BLUE, "center", space_after=24)
+    for label, value in (("Export Type", export_type), ("Total Stories", f"{total_stories:,}"),
+                         ("Total Chapters", f"{len(chapters):,}"), ("Total Words", f"{total_words:,}"),
+                         ("Compiled", datetime.now().strftime('%B %d, %Y at %I:%M %p'))):
+        book.paragraph(f"{label}: {value}", "regular", 12, space_after=6)
+    book.y -= 30
+    book.paragraph("This digital legacy was created with Tell My Story Biographer.", "italic", 11, GREY, "center")
+    book.end_page()
+
+    # ========== TABLE OF CONTENTS (pages 2..), BOOKMARKS, TRAILER ==========
+    book.table_of_contents(book.toc_entries, 2, toc_pages)
+    book.close(f"{display_name}'s {export_type}")
+    return book.pdf.position, book.page_count, display_name, len(chapters), total_stories, total_words
+
+
+def create_pdf_biography(stories_data, include_questions=True, on_chapter=None):
+    """PDF in memory, returned like create_docx_biography: (BytesIO, name, chapters, stories, words)"""
+    buffer = BytesIO()
+    _, pages, display_name, chapter_num, total_stories, total_words = write_pdf_biography(
+        buffer, stories_data, include_questions, on_chapter
+    )
+    buffer.seek(0)
+    return buffer, display_name, chapter_num, total_stories, total_words
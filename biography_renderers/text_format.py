@@ -0,0 +1,180 @@
+# text_format.py - PLAIN TEXT AND MARKDOWN RENDERERS
+from datetime import datetime
+
+import story_schema
+import text_stats
+import tracing
+from biography_renderers import chapter_cache
+
+
+@tracing.traced("render.txt")
+def create_beautiful_biography(stories_data, include_questions=True, on_chapter=None):
+    """Create a professionally formatted biography with option for questions
+
+    on_chapter(chapter_num) is called as each chapter starts, for progress reporting.
+    """
+    biography = story_schema.as_biography(stories_data)
+    user_profile = biography.user_profile
+    display_name = biography.display_name
+    
+    # Collect all stories, sessions in order
+    all_stories = []
+    for session in biography.sessions:
+        for question, answer in session.stories():
+            all_stories.append({
+                "session": session.title,
+                "question": question,
+                "answer": answer.text,
+                "date": answer.date,
+                "session_id": session.id
+            })
+    
+    if not all_stories:
+        return "No stories found to publish.", [], display_name, 0, 0, 0
+    
+    # ========== CREATE BEAUTIFUL BIOGRAPHY ==========
+    export_type = "INTERVIEW Q&A" if include_questions else "BIOGRAPHY"
+    bio_text = "=" * 70 + "\n"
+    bio_text += f"{'TELL MY STORY':^70}\n"
+    bio_text += f"{export_type:^70}\n"
+    bio_text += "=" * 70 + "\n\n"
+    
+    bio_text += f"THE LIFE STORY OF\n{display_name.upper()}\n\n"
+    bio_text += "-" * 70 + "\n\n"
+    
+    # Personal Information
+    if user_profile:
+        bio_text += "PERSONAL INFORMATION\n"
+        bio_text += "-" * 40 + "\n"
+        if user_profile.get('birthdate'):
+            bio_text += f"Date of Birth: {user_profile.get('birthdate')}\n"
+        if user_profile.get('gender'):
+            bio_text += f"Gender: {user_profile.get('gender')}\n"
+        bio_text += "\n"
+    
+    # Table of Contents
+    bio_text += "TABLE OF CONTENTS\n"
+    bio_text += "-" * 40 + "\n\n"
+    
+    current_session = None
+    chapter_num = 0
+    for story in all_stories:
+        if story["session"] != current_session:
+            chapter_num += 1
+            bio_text += f"Chapter {chapter_num}: {story['session']}\n"
+            current_session = story["session"]
+    
+    bio_text += "\n" + "=" * 70 + "\n\n"
+    
+    # Introduction
+    bio_text += "INTRODUCTION\n\n"
+    bio_text += f"This {export_type.lower()} captures the unique life journey of {display_name}, "
+    bio_text += f"compiled from personal reflections shared on {datetime.now().strftime('%B %d, %Y')}. "
+    bio_text += "Each chapter represents a different phase of life, preserved here for future generations.\n\n"
+    
+    bio_text += "=" * 70 + "\n\n"
+    
+    # Chapters with stories: unchanged chapters come from the chapter cache.
+    # Story numbers run on across chapters, so the first one is part of the key.
+    chapter_num = 0
+    story_num = 0
+    
+    for session, stories in chapter_runs(all_stories):
+        chapter_num += 1
+        if on_chapter:
+            on_chapter(chapter_num)
+        key = chapter_cache.chapter_key("txt", chapter_num, session,
+                                        [(s["question"], s["answer"], s["date"]) for s in stories],
+                                        include_questions, story_num)
+        bio_text += chapter_cache.cached(
+            "txt", key, lambda: _text_chapter(chapter_num, session, stories, story_num, include_questions)
+        )
+        story_num += len(stories)
+    
+    # Conclusion
+    bio_text += "=" * 70 + "\n\n"
+    bio_text += "CONCLUSION\n\n"
+    bio_text += f"This collection contains {story_num} stories across {chapter_num} chapters, "
+    bio_text += f"each one a piece of {display_name}'s unique mosaic of memories. "
+    bio_text += "These reflections will continue to resonate long into the future.\n\n"
+    
+    # Statistics
+    bio_text += "-" * 70 + "\n"
+    bio_text += f"{export_type} STATISTICS\n"
+    bio_text += "-" * 40 + "\n"
+    bio_text += f"• Export Type: {export_type}\n"
+    bio_text += f"• Total Stories: {story_num}\n"
+    bio_text += f"• Total Chapters: {chapter_num}\n"
+    
+    # Word count, reading time and longest story, in one pass over the stories
+    summary = text_stats.summarize((story['question'], story['answer']) for story in all_stories)
+    total_words = summary.words
+    bio_text += f"• Total Words: {total_words:,}\n"
+    bio_text += f"• Reading Time: {text_stats.format_reading_time(summary.reading_minutes)}\n"
+    if summary.longest:
+        question, longest = summary.longest
+        bio_text += f"• Longest Story: \"{question[:50]}...\" ({longest.words} words)\n"
+    
+    bio_text += f"• Compiled: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}\n"
+    bio_text += "-" * 70 + "\n\n"
+    
+    # Final note
+    bio_text += "This digital legacy was created with Tell My Story Biographer.\n\n"
+    bio_text += "=" * 70
+    
+    return bio_text, all_stories, display_name, story_num, chapter_num, total_words
+
+
+def chapter_runs(all_stories):
+    """[(session title, stories)] for each run of consecutive stories from the same session"""
+    runs = []
+    for story in all_stories:
+        if not runs or runs[-1][0] != story["session"]:
+            runs.append((story["session"], []))
+        runs[-1][1].append(story)
+    return runs
+
+
+def _text_chapter(chapter_num, session, stories, story_num, include_questions):
+    """One chapter of the plain text biography; story_num is the count before it"""
+    text = "\n" + "=" * 70 + "\n"
+    text += f"CHAPTER {chapter_num}: {session.upper()}\n"
+    text += "=" * 70 + "\n\n"
+    
+    for story in stories:
+        story_num += 1
+        
+        # Include question only if selected
+        if include_questions:
+            text += f"Story {story_num}\n"
+            text += f"Topic: {story['question']}\n"
+        else:
+            text += f"Story {story_num}\n"
+        
+        if story['date']:
+            text += f"Recorded: {story['date']}\n"
+        
+        text += "-" * 40 + "\n"
+        
+        # Format the answer with proper paragraphs
+        answer = story['answer'].strip()
+        paragraphs = answer.split('\n')
+        
+        for para in paragraphs:
+            if para.strip():
+                text += f"{para.strip()}\n\n"
+        
+        text += "\n"
+    return text
+
+
+def text_to_markdown(bio_text):
+    """Markdown version of the plain text biography"""
+    return bio_text.replace("=" * 70, "#" * 3)
+
+
+@tracing.traced("render.md")
+def create_markdown_biography(stories_data, include_questions=True):
+    """Create a Markdown version with option for questions"""
+    bio_text, all_stories, display_name, story_num, chapter_num, total_words = create_beautiful_biography(stories_data, include_questions)
+    return text_to_markdown(bio_text), display_name
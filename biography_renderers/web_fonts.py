@@ -0,0 +1,105 @@
+# web_fonts.py - SUBSETTED FONTS EMBEDDED IN THE HTML EXPORT
+#
+# Families open exported HTML books years later, often offline, so the
+# export carries its own fonts instead of @importing Google Fonts: each
+# face is cut down to the characters the book actually uses and inlined
+# as a WOFF2 data URI. The font files are read from HTML_FONT_DIR:
+#
+#   biography_renderers/fonts/CrimsonText-Regular.ttf
+#   biography_renderers/fonts/CrimsonText-Bold.ttf
+#   biography_renderers/fonts/OpenSans-Regular.ttf   (OpenSans-OFL.txt)
+#
+# (both families are under the SIL Open Font License, which allows
+# embedding subsets; each family's license sits next to its files).
+# Subsetting needs fontTools, and brotli for WOFF2 (plain WOFF is used
+# without it). Only Open Sans is bundled so far: a family whose files are
+# missing, or every family without fontTools, is @imported from Google.
+import base64
+import functools
+import importlib.util
+import logging
+import os
+from io import BytesIO
+
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+FONT_DIR = os.environ.get("HTML_FONT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts"))
+FONT_EXTENSIONS = (".ttf", ".otf", ".woff2", ".woff")
+# (CSS family, weight, file name without extension)
+FACES = (
+    ("Crimson Text", 400, "CrimsonText-Regular"),
+    ("Crimson Text", 700, "CrimsonText-Bold"),
+    ("Open Sans", 400, "OpenSans-Regular"),
+)
+
+# fontTools is only imported on the first subset, like python-docx
+FONTTOOLS_AVAILABLE = importlib.util.find_spec("fontTools") is not None
+WOFF2_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+
+def font_path(file_stem):
+    """The bundled file for a face, or None"""
+    for extension in FONT_EXTENSIONS:
+        path = os.path.join(FONT_DIR, file_stem + extension)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def embeddable_families():
+    """The families the HTML export can embed on this install (every face present)"""
+    if not FONTTOOLS_AVAILABLE:
+        return set()
+    families = {family for family, _, _ in FACES}
+    return {family for family in families if all(font_path(stem) for f, _, stem in FACES if f == family)}
+
+
+@functools.lru_cache(maxsize=64)
+def _subset(path, mtime, characters, flavor):
+    """Compressed font holding only `characters` (cached: republishing mostly reuses the same set)"""
+    from fontTools import subset
+
+    # Tables fontTools can't subset (e.g. FontForge's FFTM) are dropped, which it logs as a warning
+    logging.getLogger("fontTools.subset").setLevel(logging.ERROR)
+    options = subset.Options()
+    options.flavor = flavor
+    font = subset.load_font(path, options)
+    try:
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=characters)
+        subsetter.subset(font)
+        buffer = BytesIO()
+        subset.save_font(font, buffer, options)
+    finally:
+        font.close()
+    return buffer.getvalue()
+
+
+def font_face_css(characters_by_family):
+    """@font-face rules with subsetted data URIs, e.g. {"Crimson Text": "Abc…", "Open Sans": "…"}"""
+    families = embeddable_families()
+    if not families:
+        return ""
+    flavor = "woff2" if WOFF2_AVAILABLE else "woff"
+    rules = []
+    with tracing.span("render.html.fonts", flavor=flavor) as span:
+        embedded = 0
+        for family, weight, stem in FACES:
+            characters = characters_by_family.get(family)
+            if not characters or family not in families:
+                continue
+            path = font_path(stem)
+            try:
+                data = _subset(path, os.path.getmtime(path), "".join(sorted(set(characters))), flavor)
+            except Exception as e:
+                print(f"Error subsetting font {path}: {e}")
+                continue
+            embedded += len(data)
+            rules.append(f"@font-face{{font-family:'{family}';font-style:normal;font-weight:{weight};"
+                         f"font-display:swap;src:url(data:font/{flavor};base64,"
+                         f"{base64.b64encode(data).decode('ascii')}) format('{flavor}')}}")
+        span.set(faces=len(rules), font_bytes=embedded)
+    return "".join(rules)
@@ -0,0 +1,235 @@
+# bulk_export.py - RENDER EVERY STORED USER'S BIOGRAPHY FROM THE COMMAND LINE
+#
+# Walks the sharded user files written by deepseek.py's save_user_data (see
+# user_registry.py), plus any old flat user_data_*.json files still in
+# user_registry.LEGACY_DIR, and writes
+# TXT/HTML/MD/DOCX/PDF/EPUB for each user, in parallel, into one folder per user.
+# Users whose data has not changed since the last run are skipped.
+#
+#   python bulk_export.py --data-dir user_data --out-dir exports --workers 4
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import biography_renderers
+import story_schema
+import user_registry
+from biography_renderers import chapter_cache
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+ALL_FORMATS = ("txt", "html", "md", "docx", "pdf", "epub")
+STREAMED_FORMATS = ("pdf", "epub")
+MANIFEST_NAME = ".bulk_export_manifest.json"
+MANIFEST_SAVE_EVERY = 500   # results between manifest checkpoints
+PROGRESS_EVERY_SECONDS = 2.0
+TASKS_PER_WORKER = 200      # recycle workers so memory can't creep up over thousands of users
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+
+def export_user(data_path, out_dir, formats, include_questions, previous_hash):
+    """Render one user's biography; returns a small result dict, never the payloads"""
+    result = {"file": os.path.basename(data_path), "status": "rendered", "hash": None, "bytes": 0, "stories": 0, "error": None}
+    try:
+        with open(data_path, "rb") as f:
+            raw = f.read()
+        options = f"{','.join(formats)}|{int(include_questions)}"
+        result["hash"] = hashlib.sha256(raw + options.encode()).hexdigest()
+        if result["hash"] == previous_hash:
+            result["status"] = "unchanged"
+            return result
+
+        stories_data = story_schema.decode_user_data(json.loads(raw)).to_biography()
+        del raw
+        if not stories_data.sessions:
+            result["status"] = "empty"
+            return result
+
+        user_dir = os.path.join(out_dir, os.path.splitext(result["file"])[0])
+        os.makedirs(user_dir, exist_ok=True)
+        author_name = stories_data.display_name
+        result["stories"] = stories_data.story_count()
+
+        wanted = [fmt for fmt in formats if fmt in biography_renderers.available_formats()]
+        if len(wanted) < len(formats):
+            result["error"] = "python-docx not installed, DOCX skipped"
+
+        # One format at a time, written straight to disk; PDF and EPUB are
+        # streamed into their files instead of being built in memory first
+        in_memory = [fmt for fmt in wanted if fmt not in STREAMED_FORMATS]
+        for fmt, data in biography_renderers.iter_renders(stories_data, in_memory, include_questions):
+            path = os.path.join(user_dir, biography_renderers.file_name(author_name, fmt, include_questions))
+            with open(path, "wb") as f:
+                f.write(data)
+            result["bytes"] += len(data)
+            del data
+        for fmt in wanted:
+            if fmt in STREAMED_FORMATS:
+                path = os.path.join(user_dir, biography_renderers.file_name(author_name, fmt, include_questions))
+                with open(path, "wb") as f:
+                    result["bytes"] += biography_renderers.render_to(f, stories_data, fmt, include_questions)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    """Write atomically so an interrupted run never leaves a broken manifest"""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# DRIVER
+# ============================================================================
+def iter_user_files(data_dir, legacy_dir=None):
+    """Yield (path, stat) for each user file without listing them all up front"""
+    yield from user_registry.iter_data_files(data_dir)
+    # Flat files from before the sharded layout that haven't been migrated yet
+    with os.scandir(legacy_dir or user_registry.LEGACY_DIR) as entries:
+        for entry in entries:
+            if entry.name.startswith("user_data_") and entry.name.endswith(".json") and entry.is_file():
+                yield entry.path, entry.stat()
+
+
+def run_bulk_export(data_dir, out_dir, formats=ALL_FORMATS, include_questions=False, workers=None, force=False,
+                    legacy_dir=None):
+    """Export every user; returns the summary counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+    options = f"{','.join(formats)}|{int(include_questions)}"
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+
+    total = sum(1 for _ in iter_user_files(data_dir, legacy_dir))
+    counts = {"rendered": 0, "unchanged": 0, "empty": 0, "failed": 0}
+    bytes_written = 0
+    done = 0
+    since_checkpoint = 0
+    start = time.perf_counter()
+    last_report = start
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        line = (f"[{done}/{total}] rendered {counts['rendered']} • unchanged {counts['unchanged']} • "
+                f"failed {counts['failed']} • {rate:.1f} users/s • {bytes_written / 1e6 / max(elapsed, 1e-9):.2f} MB/s")
+        print(line, file=sys.stdout if final else sys.stderr, flush=True)
+
+    def handle(result, stat):
+        nonlocal done, bytes_written, since_checkpoint
+        done += 1
+        counts[result["status"]] += 1
+        bytes_written += result["bytes"]
+        if result["status"] == "failed":
+            print(f"Error exporting {result['file']}: {result['error']}", file=sys.stderr)
+        elif result["error"]:
+            print(f"Warning for {result['file']}: {result['error']}", file=sys.stderr)
+        if result["status"] != "failed" and result["hash"]:
+            manifest[result["file"]] = {
+                "hash": result["hash"],
+                "options": options,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size
+            }
+            since_checkpoint += 1
+        if since_checkpoint >= MANIFEST_SAVE_EVERY:
+            save_manifest(out_dir, manifest)
+            since_checkpoint = 0
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=TASKS_PER_WORKER) as pool:
+        in_flight = {}
+        for path, stat in iter_user_files(data_dir, legacy_dir):
+            previous = manifest.get(os.path.basename(path))
+            if previous and previous.get("options") == options and \
+                    previous.get("mtime_ns") == stat.st_mtime_ns and previous.get("size") == stat.st_size:
+                # Untouched since the last run: skip without even reading it
+                done += 1
+                counts["unchanged"] += 1
+                continue
+
+            previous_hash = previous.get("hash") if previous and previous.get("options") == options else None
+            future = pool.submit(export_user, path, out_dir, formats, include_questions, previous_hash)
+            in_flight[future] = stat
+
+            # Keep a bounded number of tasks queued so memory stays flat
+            while len(in_flight) >= max_in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for f in finished:
+                    handle(f.result(), in_flight.pop(f))
+
+            if time.perf_counter() - last_report >= PROGRESS_EVERY_SECONDS:
+                report()
+                last_report = time.perf_counter()
+
+        for f in as_completed(list(in_flight)):
+            handle(f.result(), in_flight.pop(f))
+            if time.perf_counter() - last_report >= PROGRESS_EVERY_SECONDS:
+                report()
+                last_report = time.perf_counter()
+
+    save_manifest(out_dir, manifest)
+    report(final=True)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every stored user's biography in parallel.")
+    parser.add_argument("--data-dir", help=f"sharded user data folder (default: {user_registry.USER_DATA_DIR})")
+    parser.add_argument("--legacy-dir", help="folder holding old flat user_data_*.json files not yet migrated "
+                                             f"(default: {user_registry.LEGACY_DIR})")
+    parser.add_argument("--out-dir", default="exports", help="where to write the rendered biographies")
+    parser.add_argument("--formats", default=",".join(ALL_FORMATS), help="comma-separated subset of txt,html,md,docx,pdf,epub")
+    parser.add_argument("--interview", action="store_true", help="include the interview questions (Q&A format)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the manifest and re-render everyone")
+    parser.add_argument("--no-chapter-cache", action="store_true",
+                        help="don't read or write cached chapters (see biography_renderers/chapter_cache.py)")
+    args = parser.parse_args(argv)
+
+    formats = tuple(f.strip().lower() for f in args.formats.split(",") if f.strip())
+    unknown = [f for f in formats if f not in ALL_FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    # A folder named on the command line must exist; the default sharded
+    # tree may not yet, when every user is still in a flat file
+    for option, folder in (("--data-dir", args.data_dir), ("--legacy-dir", args.legacy_dir)):
+        if folder is not None and not os.path.isdir(folder):
+            parser.error(f"{option} {folder} is not a folder")
+
+    if args.no_chapter_cache:
+        # Workers are started after this, so they inherit the setting
+        os.environ["CHAPTER_CACHE"] = "off"
+        chapter_cache.ENABLED = False
+
+    counts = run_bulk_export(args.data_dir or user_registry.USER_DATA_DIR, args.out_dir, formats, args.interview, args.workers, args.force,
+                             args.legacy_dir)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
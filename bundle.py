@@ -0,0 +1,96 @@
+# bundle.py - EVERY EXPORT FORMAT PLUS THE SOURCE STORIES IN ONE ZIP
+#
+# A bundle is written into a binary stream one entry at a time: each
+# format is added as soon as it has been rendered (copied in chunks from
+# its job file, or rendered straight into the zip), then the stories
+# JSON it was made from. Nothing is kept once its entry is written.
+#
+#   with open("everything.zip", "wb") as f:
+#       write_bundle(f, stories_data, ["txt", "pdf", "epub"], include_questions=False)
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import datetime
+
+import biography_renderers
+import story_schema
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+MIME_TYPE = "application/zip"
+COPY_CHUNK_BYTES = 1024 * 1024
+PRECOMPRESSED = ("docx", "pdf", "epub")   # already zips/deflated: stored, not compressed again
+SEEKABLE_ONLY = ("epub",)                 # renderers that need a seekable stream
+SPOOL_MAX_BYTES = 8 * 1024 * 1024         # spool those in memory up to this, then on disk
+
+
+def bundle_name(display_name, include_questions=True):
+    """Download file name of the zip, next to the per-format names"""
+    return biography_renderers.file_name(display_name, "txt", include_questions)[:-len(".txt")] + "_All_Formats.zip"
+
+
+def source_name(display_name, include_questions=True):
+    return biography_renderers.file_name(display_name, "txt", include_questions)[:-len(".txt")] + "_Stories.json"
+
+
+class BundleWriter:
+    """A zip that formats are added to one at a time, as they finish rendering"""
+
+    def __init__(self, stream):
+        self.zip = zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED)
+
+    def _entry(self, arcname, fmt=None):
+        info = zipfile.ZipInfo(arcname, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED if fmt in PRECOMPRESSED else zipfile.ZIP_DEFLATED
+        return self.zip.open(info, "w", force_zip64=True)
+
+    def add_file(self, path, arcname, fmt=None):
+        """Copy an already rendered file in, a chunk at a time"""
+        with open(path, "rb") as src, self._entry(arcname, fmt) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_BYTES)
+
+    def add_rendered(self, stories_data, fmt, include_questions=True, on_chapter=None):
+        """Render one format straight into the zip; returns its entry name"""
+        arcname = biography_renderers.file_name(story_schema.as_biography(stories_data).display_name, fmt, include_questions)
+        with self._entry(arcname, fmt) as dst:
+            if fmt in SEEKABLE_ONLY:
+                with tempfile.SpooledTemporaryFile(SPOOL_MAX_BYTES) as spool:
+                    biography_renderers.render_to(spool, stories_data, fmt, include_questions, on_chapter)
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, dst, COPY_CHUNK_BYTES)
+            else:
+                biography_renderers.render_to(dst, stories_data, fmt, include_questions, on_chapter)
+        return arcname
+
+    def add_source(self, stories_data, arcname):
+        """The stories JSON the formats were made from, so the bundle can be re-published"""
+        with self._entry(arcname) as dst:
+            payload = story_schema.encode_export(story_schema.as_biography(stories_data))
+            dst.write(json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def close(self):
+        self.zip.close()
+
+
+def write_bundle(stream, stories_data, formats, include_questions=True, on_chapter=None):
+    """Render every format into one zip in `stream`, plus the source JSON; returns the entry names"""
+    stories_data = story_schema.as_biography(stories_data)
+    author_name = stories_data.display_name
+    bundle = BundleWriter(stream)
+    try:
+        names = [bundle.add_rendered(stories_data, fmt, include_questions, on_chapter) for fmt in formats]
+        names.append(source_name(author_name, include_questions))
+        bundle.add_source(stories_data, names[-1])
+    finally:
+        bundle.close()
+    return names
+
+
+def bundle_bytes(stories_data, formats, include_questions=True):
+    """The bundle in memory, for a download button's deferred data callable"""
+    buffer = io.BytesIO()
+    write_bundle(buffer, stories_data, formats, include_questions)
+    return buffer.getvalue()
@@ -4,18 +4,37 @@
 import streamlit as st
 import json
 from datetime import datetime
-from openai import OpenAI
 import os
-import sqlite3
-import re  # For word counting
-import hashlib  # For creating user file names
+import usage_meter  # Token, cost and latency accounting
+import tracing  # Spans for reruns, loads, saves and API calls
+import rerun_profiler  # Opt-in per-section timings (?profile=1)
+import search_index  # Full-text search over the author's answers
+import retrieval  # Related earlier answers for the biographer prompt
+import submissions  # Dedupe of repeated chat submissions
+import user_registry  # Sharded user data files keyed by full SHA-256
+import publish_sync  # Sends the publisher only what changed since the last publish
+import story_schema  # Typed, versioned story data shared with the publisher
+import text_stats  # Word counts shared with the publisher and the books
+import question_catalog  # Sessions and questions with stable ids, shared with the publisher
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY")))
+profiler = rerun_profiler.start(st.session_state)
+profiler.section("1: Imports and setup")
+
+# The OpenAI client is created on the first chat/correct call, not at start-up:
+# importing openai is the slowest part of a cold start. One client is shared
+# by every session. Retries are done (and counted) by usage_meter.
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", os.environ.get("OPENAI_API_KEY")), max_retries=0)
+
+# Time this whole script run (closed in the footer, or at the next run after st.rerun())
+tracing.begin_rerun(st.session_state, user=tracing.hash_user(st.session_state.get("user_id", "")))
 
 # ============================================================================
 # SECTION 2: CSS STYLING AND VISUAL DESIGN
 # ============================================================================
+profiler.section("2: CSS styling")
 LOGO_URL = "https://menuhunterai.com/wp-content/uploads/2026/01/logo.png"
 
 st.markdown(f"""
@@ -147,93 +166,52 @@ st.markdown(f"""
 # ============================================================================
 # SECTION 3: SESSION DEFINITIONS AND DATA STRUCTURE
 # ============================================================================
-SESSIONS = [
-    {
-        "id": 1,
-        "title": "Childhood",
-        "guidance": "Welcome to Session 1: Childhood—this is where we lay the foundation of your story. Professional biographies thrive on specific, sensory-rich memories. I'm looking for the kind of details that transport readers: not just what happened, but how it felt, smelled, sounded. The 'insignificant' moments often reveal the most. Take your time—we're mining for gold here.",
-        "questions": [
-            "What is your earliest memory?",
-            "Can you describe your family home growing up?",
-            "Who were the most influential people in your early years?",
-            "What was school like for you?",
-            "Were there any favourite games or hobbies?",
-            "Is there a moment from childhood that shaped who you are?",
-            "If you could give your younger self some advice, what would it be?"
-        ],
-        "completed": False,
-        "word_target": 800
-    },
-    {
-        "id": 2,
-        "title": "Family & Relationships",
-        "guidance": "Welcome to Session 2: Family & Relationships—this is where we explore the people who shaped you. Family stories are complex ecosystems. We're not seeking perfect narratives, but authentic ones. The richest material often lives in the tensions, the unsaid things, the small rituals. My job is to help you articulate what usually goes unspoken. Think in scenes rather than summaries.",
-        "questions": [
-            "How would you describe your relationship with your parents?",
-            "Are there any family traditions you remember fondly?",
-            "What was your relationship like with siblings or close relatives?",
-            "Can you share a story about a family celebration or challenge?",
-            "How did your family shape your values?"
-        ],
-        "completed": False,
-        "word_target": 700
-    },
-    {
-        "id": 3,
-        "title": "Education & Growing Up",
-        "guidance": "Welcome to Session 3: Education & Growing Up—this is where we explore how you learned to navigate the world. Education isn't just about schools—it's about how you learned to navigate the world. We're interested in the hidden curriculum: what you learned about yourself, about systems, about survival and growth. Think beyond grades to transformation.",
-        "questions": [
-            "What were your favourite subjects at school?",
-            "Did you have any memorable teachers or mentors?",
-            "How did you feel about exams and studying?",
-            "Were there any big turning points in your education?",
-            "Did you pursue further education or training?",
-            "What advice would you give about learning?"
-        ],
-        "completed": False,
-        "word_target": 600
-    }
-]
+profiler.section("3: Session definitions")
+# Questions have stable ids ("s1q1"); see question_catalog.py
+SESSIONS = question_catalog.SESSIONS
 
 # ============================================================================
 # SECTION 4: JSON-BASED STORAGE FUNCTIONS (RELIABLE ON STREAMLIT CLOUD)
 # ============================================================================
-def get_user_filename(user_id):
-    """Create a safe filename for user data"""
-    filename_hash = hashlib.md5(user_id.encode()).hexdigest()[:8]
-    return f"user_data_{filename_hash}.json"
+profiler.section("4: Storage functions")
+def get_user_filename(user_id, create=False):
+    """Path of the user's data file from the registry (None if they have none yet)"""
+    return user_registry.resolve(user_id, create=create)
 
 def load_user_data(user_id):
-    """Load user data from JSON file"""
-    filename = get_user_filename(user_id)
-    
+    """Load user data from JSON file, decoded into a story_schema.UserData"""
     try:
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                data = json.load(f)
-                # Ensure we have the expected structure
-                if "responses" in data:
-                    return data
-        return {"responses": {}, "last_loaded": datetime.now().isoformat()}
+        filename = get_user_filename(user_id)
+        if filename and os.path.exists(filename):
+            with tracing.span("user_data.load", user=tracing.hash_user(user_id)) as load_span:
+                with open(filename, 'r') as f:
+                    data = story_schema.decode_user_data(json.load(f))
+                load_span.set(bytes=os.path.getsize(filename))
+            return data
+        return story_schema.UserData(user_id)
     except Exception as e:
         print(f"Error loading user data for {user_id}: {e}")
-        return {"responses": {}, "last_loaded": datetime.now().isoformat()}
+        return story_schema.UserData(user_id)
 
 def save_user_data(user_id, responses_data):
     """Save user data to JSON file"""
-    filename = get_user_filename(user_id)
-    
     try:
+        filename = get_user_filename(user_id, create=True)
         data_to_save = {
+            "schema": story_schema.SCHEMA_VERSION,
             "user_id": user_id,
             "responses": responses_data,
             "last_saved": datetime.now().isoformat()
         }
         
-        with open(filename, 'w') as f:
-            json.dump(data_to_save, f, indent=2)
+        with tracing.span("user_data.save", user=tracing.hash_user(user_id)) as save_span:
+            payload = json.dumps(data_to_save, indent=2)
+            # Write then rename, so a crash mid-save never leaves half a file
+            with open(filename + ".tmp", 'w') as f:
+                f.write(payload)
+            os.replace(filename + ".tmp", filename)
+            save_span.set(bytes=len(payload))
         
-        print(f"DEBUG: Saved data for {user_id} to {filename}")
         return True
     except Exception as e:
         print(f"Error saving user data for {user_id}: {e}")
@@ -242,6 +220,7 @@ def save_user_data(user_id, responses_data):
 # ============================================================================
 # SECTION 5: SESSION STATE INITIALIZATION WITH PERSISTENCE
 # ============================================================================
+profiler.section("5: Session state and data load")
 
 # Set page config first
 st.set_page_config(page_title="DeeperVault UK Legacy Builder", page_icon="📖", layout="wide")
@@ -271,6 +250,12 @@ if "confirming_clear" not in st.session_state:
     st.session_state.confirming_clear = None
 if "data_loaded" not in st.session_state:
     st.session_state.data_loaded = False
+if "conversation_window" not in st.session_state:
+    st.session_state.conversation_window = {}
+if "jump_to_session" not in st.session_state:
+    st.session_state.jump_to_session = st.session_state.current_session
+if "awaiting_submission" not in st.session_state:
+    st.session_state.awaiting_submission = None   # (submission id, session id, question id) another tab is sending
 
 # Check URL for user parameter - THIS IS THE KEY TO PERSISTENCE
 if 'user' in st.query_params:
@@ -294,38 +279,38 @@ if not st.session_state.responses:
 
 # Load user data if we have a user and data hasn't been loaded yet
 if st.session_state.user_id and st.session_state.user_id != "" and not st.session_state.data_loaded:
-    print(f"DEBUG: Loading data for user {st.session_state.user_id}")
-    
-    user_data = load_user_data(st.session_state.user_id)
-    
-    if "responses" in user_data:
-        for session_id_str, session_data in user_data["responses"].items():
-            try:
-                session_id = int(session_id_str)
-                if session_id in st.session_state.responses:
-                    # Only load if we have questions
-                    if "questions" in session_data:
-                        st.session_state.responses[session_id]["questions"] = session_data["questions"]
-            except ValueError:
-                continue
+    with tracing.span("data_load", user=tracing.hash_user(st.session_state.user_id)) as load_span:
+        user_data = load_user_data(st.session_state.user_id)
+        
+        # Session ids are ints, questions are question ids and every answer is
+        # {"answer", "timestamp"} from here on (files saved before ids are migrated)
+        for session_id, session in user_data.sessions.items():
+            if session_id in st.session_state.responses:
+                st.session_state.responses[session_id]["questions"] = {
+                    question: answer.to_json() for question, answer in session.answers.items()
+                }
+        
+        load_span.set(answers=sum(len(s.get("questions", {})) for s in st.session_state.responses.values()))
+        
+        # The JSON file is the source of truth; rebuild this user's search rows from it
+        search_index.reindex_user(st.session_state.user_id, st.session_state.responses)
+        retrieval.rebuild(st.session_state.user_id, st.session_state.responses)
     
     st.session_state.data_loaded = True
-    print(f"DEBUG: Data loaded for {st.session_state.user_id}")
 
 # ============================================================================
 # SECTION 6: CORE APPLICATION FUNCTIONS
 # ============================================================================
-def save_response(session_id, question, answer):
+profiler.section("6: Core functions")
+def save_response(session_id, question_id, answer):
     """Save response to both session state AND JSON file"""
     user_id = st.session_state.user_id
     
     # CRITICAL: Don't save if no user
     if not user_id or user_id == "":
-        print("DEBUG: No user_id, cannot save")
+        tracing.event("save_response.skipped", reason="no user")
         return False
     
-    print(f"DEBUG: Saving for user {user_id}, session {session_id}, question: {question[:50]}...")
-    
     # 1. Save to session state
     if session_id not in st.session_state.responses:
         st.session_state.responses[session_id] = {
@@ -336,18 +321,107 @@ def save_response(session_id, question, answer):
             "word_target": SESSIONS[session_id-1].get("word_target", 500)
         }
     
-    st.session_state.responses[session_id]["questions"][question] = {
+    st.session_state.responses[session_id]["questions"][question_id] = {
         "answer": answer,
         "timestamp": datetime.now().isoformat()
     }
     
     # 2. Save to JSON file
-    if save_user_data(user_id, st.session_state.responses):
-        print(f"DEBUG: Successfully saved to JSON file for {user_id}")
-        return True
-    else:
-        print(f"DEBUG: Failed to save to JSON file for {user_id}")
-        return False
+    with tracing.span("save_response", user=tracing.hash_user(user_id), session=session_id, answer_chars=len(answer)) as save_span:
+        saved = save_user_data(user_id, st.session_state.responses)
+        save_span.set(saved=saved)
+    
+    # 3. Keep the search and retrieval indexes current
+    question = question_catalog.question_text(question_id)
+    search_index.index_answer(user_id, session_id, question, answer)
+    retrieval.index_answer(user_id, session_id, question, answer)
+    return saved
+
+def replay_submission(previous, submission, conversation, session_id, question_id):
+    """Show a repeated chat submission from the ledger instead of calling the API and saving again"""
+    if previous["state"] == submissions.PENDING:
+        # Don't hold up this run; await_pending_submission() shows the reply when it arrives
+        st.session_state.awaiting_submission = (submission, session_id, question_id)
+        return
+    if previous["reply"] is None:
+        # Nothing cached to show; never put an empty exchange into the conversation
+        return
+
+    exchange = [{"role": "user", "content": previous["user_input"]},
+                {"role": "assistant", "content": previous["reply"]}]
+    # The first run may have been cut short before it recorded the exchange,
+    # or after recording only the answer
+    if conversation[-2:] != exchange:
+        if conversation and conversation[-1] == exchange[0]:
+            conversation.append(exchange[1])
+        else:
+            conversation.extend(exchange)
+        st.session_state.session_conversations[session_id][question_id] = conversation
+    if previous["state"] == submissions.REPLIED:
+        if save_response(session_id, question_id, previous["user_input"]):
+            submissions.mark_saved(st.session_state.user_id, submission)
+
+# Navigation and editing callbacks. Streamlit runs these before the next
+# script run, so a click costs one run instead of a run plus st.rerun().
+def go_to_topic(question_index):
+    st.session_state.current_question = question_index
+    st.session_state.editing = None
+
+def go_to_session(session_index):
+    st.session_state.current_session = session_index
+    st.session_state.jump_to_session = session_index
+    st.session_state.current_question = 0
+    st.session_state.editing = None
+
+def jump_to_selected_session():
+    go_to_session(st.session_state.jump_to_session)
+
+def go_to_question(session_id, question):
+    """Open the session and topic a search hit points at (question by wording or id)"""
+    go_to_session(session_id - 1)
+    question_ids = [q["id"] for q in SESSIONS[session_id - 1]["questions"]]
+    question_id = question_catalog.question_id(question)
+    if question_id in question_ids:
+        st.session_state.current_question = question_ids.index(question_id)
+    st.session_state.search_jumped = True
+
+def start_editing(session_id, question_id, message_index, text):
+    st.session_state.editing = (session_id, question_id, message_index)
+    st.session_state.edit_text = text
+
+def cancel_editing():
+    st.session_state.editing = None
+
+def show_earlier_messages(window_key, page_size):
+    visible = st.session_state.conversation_window.get(window_key, page_size)
+    st.session_state.conversation_window[window_key] = visible + page_size
+
+def toggle_word_target_editor():
+    st.session_state.editing_word_target = not st.session_state.editing_word_target
+
+def close_word_target_editor():
+    st.session_state.editing_word_target = False
+
+def save_word_target(session_id):
+    st.session_state.responses[session_id]["word_target"] = st.session_state.target_edit_input_bottom
+    save_user_data(st.session_state.user_id, st.session_state.responses)
+    st.session_state.editing_word_target = False
+
+def prepare_publish_link(user_id, export_data, full=False):
+    """Publish button callback: a publisher link carrying only what changed since the last publish (or everything)"""
+    url, revision = publish_sync.prepare_publish(user_id, export_data, full)
+    st.session_state.publish_link = {"user": user_id, "url": url, "revision": revision}
+
+def render_publish_controls(user_id, export_data, key):
+    """Publish button, then the link to open the publisher once it's prepared for these answers"""
+    st.button("🖨️ Publish Biography", on_click=prepare_publish_link, args=(user_id, export_data),
+              key=f"publish_{key}", use_container_width=True, help="Format your biography professionally")
+    link = st.session_state.get("publish_link")
+    if link and link["user"] == user_id and link["revision"] == publish_sync.current_revision(export_data):
+        st.link_button("📘 Open the Publisher", link["url"], type="primary", use_container_width=True)
+        st.button("Send full copy", on_click=prepare_publish_link, args=(user_id, export_data, True),
+                  key=f"publish_full_{key}", type="tertiary",
+                  help="Use this if the publisher says it doesn't have your earlier publish")
 
 def calculate_author_word_count(session_id):
     total_words = 0
@@ -355,7 +429,7 @@ def calculate_author_word_count(session_id):
     
     for question, answer_data in session_data.get("questions", {}).items():
         if answer_data.get("answer"):
-            total_words += len(re.findall(r'\w+', answer_data["answer"]))
+            total_words += text_stats.word_count(answer_data["answer"])
     
     return total_words
 
@@ -396,13 +470,17 @@ def get_progress_info(session_id):
 # ============================================================================
 # SECTION 7: AUTO-CORRECT FUNCTION
 # ============================================================================
+profiler.section("7: Auto-correct function")
 def auto_correct_text(text):
     """Auto-correct text using OpenAI"""
     if not text or not st.session_state.spellcheck_enabled:
         return text
     
     try:
-        response = client.chat.completions.create(
+        response = usage_meter.metered_completion(
+            get_openai_client(),
+            st.session_state.user_id,
+            usage_meter.FEATURE_CORRECTION,
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": "Fix spelling and grammar mistakes in the following text. Return only the corrected text."},
@@ -418,9 +496,31 @@ def auto_correct_text(text):
 # ============================================================================
 # SECTION 8: GHOSTWRITER PROMPT FUNCTION
 # ============================================================================
-def get_system_prompt():
+profiler.section("8: Prompt function")
+def related_passages_section(current_session, current_question, user_input):
+    """Prompt section quoting the author's most related answers from other topics"""
+    if not retrieval.has_index(st.session_state.user_id):
+        # Dropped from memory (least recently used) while this session was open
+        retrieval.rebuild(st.session_state.user_id, st.session_state.responses)
+    passages = retrieval.related_passages(
+        st.session_state.user_id,
+        f"{current_question} {user_input}",
+        exclude=(current_session["id"], current_question)
+    )
+    if not passages:
+        return ""
+    quoted = "\n".join(
+        f'- Session {p["session_id"]}, "{p["question"]}": {p["text"]}' for p in passages
+    )
+    return f"""
+
+RELATED EARLIER ANSWERS (the author's own words from other topics; connect to them where natural, never repeat them back verbatim):
+{quoted}"""
+
+def get_system_prompt(user_input=""):
     current_session = SESSIONS[st.session_state.current_session]
-    current_question = current_session["questions"][st.session_state.current_question]
+    current_question = current_session["questions"][st.session_state.current_question]["text"]
+    related = related_passages_section(current_session, current_question, user_input)
     
     if st.session_state.ghostwriter_mode:
         return f"""ROLE: You are a senior literary biographer with multiple award-winning books to your name.
@@ -434,7 +534,7 @@ YOUR APPROACH:
 3. Find the story that needs to be told
 4. Respect silence and complexity
 
-Tone: Literary but not pretentious. Serious but not solemn."""
+Tone: Literary but not pretentious. Serious but not solemn.{related}"""
     else:
         return f"""You are a warm, professional biographer helping document a life story.
 
@@ -447,11 +547,12 @@ Please:
 3. Ask ONE natural follow-up question
 4. Keep conversation flowing
 
-Tone: Kind, curious, professional"""
+Tone: Kind, curious, professional{related}"""
 
 # ============================================================================
 # SECTION 9: MAIN APP HEADER
 # ============================================================================
+profiler.section("9: Header")
 st.markdown(f"""
 <div class="main-header">
     <img src="{LOGO_URL}" class="logo-img" alt="DeeperVault UK Logo">
@@ -463,6 +564,7 @@ st.markdown(f"""
 # ============================================================================
 # SECTION 10: USER SETUP - SHOWS FIRST IF NO USER
 # ============================================================================
+profiler.section("10: User setup")
 if not st.session_state.user_id or st.session_state.user_id == "":
     st.title("👤 Welcome to Your Biography Builder")
     
@@ -498,11 +600,15 @@ if not st.session_state.user_id or st.session_state.user_id == "":
         """)
     
     # Don't show the rest of the app
+    profiler.finish()
+    profiler.render_panel()
+    tracing.end_rerun(st.session_state, status="stopped")
     st.stop()
 
 # ============================================================================
 # SECTION 11: SIDEBAR - USER PROFILE AND SETTINGS
 # ============================================================================
+profiler.section("11: Sidebar profile and settings")
 with st.sidebar:
     st.header("👤 Your Profile")
     
@@ -554,6 +660,7 @@ with st.sidebar:
     # ============================================================================
     # SECTION 11A: SIDEBAR - SESSION NAVIGATION
     # ============================================================================
+    profiler.section("11A: Sidebar session navigation")
     st.divider()
     st.header("📖 Sessions")
     
@@ -577,17 +684,16 @@ with st.sidebar:
         
         button_text = f"{status} Session {session_id}: {session['title']} ({responses_count}/{total_questions})"
         
-        if st.button(button_text, 
-                    key=f"select_{i}",
-                    use_container_width=True):
-            st.session_state.current_session = i
-            st.session_state.current_question = 0
-            st.session_state.editing = None
-            st.rerun()
+        st.button(button_text, 
+                  key=f"select_{i}",
+                  use_container_width=True,
+                  on_click=go_to_session,
+                  args=(i,))
     
     # ============================================================================
     # SECTION 11B: SIDEBAR - NAVIGATION CONTROLS
     # ============================================================================
+    profiler.section("11B: Sidebar navigation controls")
     st.divider()
     st.subheader("Topic Navigation")
     
@@ -596,78 +702,86 @@ with st.sidebar:
     
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("← Previous Topic", disabled=st.session_state.current_question == 0, key="prev_q_sidebar"):
-            st.session_state.current_question = max(0, st.session_state.current_question - 1)
-            st.session_state.editing = None
-            st.rerun()
+        st.button("← Previous Topic", disabled=st.session_state.current_question == 0, key="prev_q_sidebar",
+                  on_click=go_to_topic, args=(max(0, st.session_state.current_question - 1),))
     
     with col2:
-        if st.button("Next Topic →", disabled=st.session_state.current_question >= len(current_session["questions"]) - 1, key="next_q_sidebar"):
-            st.session_state.current_question = min(len(current_session["questions"]) - 1, st.session_state.current_question + 1)
-            st.session_state.editing = None
-            st.rerun()
+        st.button("Next Topic →", disabled=st.session_state.current_question >= len(current_session["questions"]) - 1, key="next_q_sidebar",
+                  on_click=go_to_topic, args=(min(len(current_session["questions"]) - 1, st.session_state.current_question + 1),))
     
     st.divider()
     st.subheader("Session Navigation")
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("← Previous Session", disabled=st.session_state.current_session == 0, key="prev_session_sidebar"):
-            st.session_state.current_session = max(0, st.session_state.current_session - 1)
-            st.session_state.current_question = 0
-            st.session_state.editing = None
-            st.rerun()
+        st.button("← Previous Session", disabled=st.session_state.current_session == 0, key="prev_session_sidebar",
+                  on_click=go_to_session, args=(max(0, st.session_state.current_session - 1),))
     with col2:
-        if st.button("Next Session →", disabled=st.session_state.current_session >= len(SESSIONS)-1, key="next_session_sidebar"):
-            st.session_state.current_session = min(len(SESSIONS)-1, st.session_state.current_session + 1)
-            st.session_state.current_question = 0
-            st.session_state.editing = None
-            st.rerun()
+        st.button("Next Session →", disabled=st.session_state.current_session >= len(SESSIONS)-1, key="next_session_sidebar",
+                  on_click=go_to_session, args=(min(len(SESSIONS)-1, st.session_state.current_session + 1),))
+    
+    st.selectbox(
+        "Jump to session:",
+        range(len(SESSIONS)),
+        format_func=lambda i: f"Session {SESSIONS[i]['id']}: {SESSIONS[i]['title']}",
+        key="jump_to_session",
+        on_change=jump_to_selected_session
+    )
     
-    session_options = [f"Session {s['id']}: {s['title']}" for s in SESSIONS]
-    selected_session = st.selectbox("Jump to session:", session_options, index=st.session_state.current_session)
-    if session_options.index(selected_session) != st.session_state.current_session:
-        st.session_state.current_session = session_options.index(selected_session)
-        st.session_state.current_question = 0
-        st.session_state.editing = None
-        st.rerun()
+    st.divider()
+    st.subheader("🔍 Search Your Stories")
+    
+    # Typing a query reruns only this fragment; opening a hit reruns the app
+    @st.fragment
+    @profiler.timed("Fragment: story search")
+    def render_story_search():
+        if st.session_state.pop("search_jumped", False):
+            st.rerun(scope="app")
+        
+        query = st.text_input("Search your stories", key="story_search", placeholder="A name, a place, a year...",
+                              label_visibility="collapsed")
+        if not query.strip():
+            return
+        
+        hits = search_index.search(st.session_state.user_id, query)
+        if not hits:
+            st.caption("No matching answers.")
+            return
+        
+        for i, hit in enumerate(hits):
+            if not 1 <= hit["session_id"] <= len(SESSIONS):
+                continue
+            label = f"Session {hit['session_id']}: {hit['question'][:60]}"
+            st.button(label, key=f"search_hit_{i}", use_container_width=True,
+                      on_click=go_to_question, args=(hit["session_id"], hit["question"]))
+            st.caption(hit["snippet"])
+    
+    render_story_search()
     
     st.divider()
     
     # ============================================================================
     # SECTION 11C: SIDEBAR - EXPORT OPTIONS
     # ============================================================================
+    profiler.section("11C: Sidebar export")
     st.subheader("📤 Export Options")
     
     total_answers = sum(len(session.get("questions", {})) for session in st.session_state.responses.values())
     st.caption(f"Total answers: {total_answers}")
     
     # Prepare data for export
-    export_data = {}
-    for session in SESSIONS:
-        session_id = session["id"]
-        session_data = st.session_state.responses.get(session_id, {})
-        if session_data.get("questions"):
-            export_data[str(session_id)] = {
-                "title": session["title"],
-                "questions": session_data["questions"]
-            }
+    export_span = tracing.start_span("export.build", location="sidebar", user=tracing.hash_user(st.session_state.user_id))
+    export_payload = story_schema.export_payload(st.session_state.user_id, st.session_state.responses,
+                                                 {session["id"]: session["title"] for session in SESSIONS})
+    export_data = export_payload["stories"]
     
     # Create JSON data
     if export_data:
-        json_data = json.dumps({
-            "user": st.session_state.user_id,
-            "stories": export_data,
-            "export_date": datetime.now().isoformat()
-        }, indent=2)
-        
-        # Encode the data for URL
-        import base64
-        encoded_data = base64.b64encode(json_data.encode()).decode()
-        
-        # Create URL with the data (UPDATE THIS URL TO YOUR PUBLISHER APP)
-        publisher_base_url = "https://deeperbiographer-dny9n2j6sflcsppshrtrmu.streamlit.app/"
-        publisher_url = f"{publisher_base_url}?data={encoded_data}"
+        json_data = json.dumps(export_payload, indent=2)
         
+        export_span.set(bytes=len(json_data))
+    export_span.end()
+    
+    if export_data:
         # Download button
         st.download_button(
             label="📥 Download as JSON",
@@ -678,12 +792,7 @@ with st.sidebar:
         )
         
         # Link to publisher
-        st.link_button(
-            "🖨️ Publish Biography",
-            publisher_url,
-            use_container_width=True,
-            help="Format your biography professionally"
-        )
+        render_publish_controls(st.session_state.user_id, export_data, "sidebar")
     else:
         st.warning("No responses to export yet!")
     
@@ -692,6 +801,7 @@ with st.sidebar:
     # ============================================================================
     # SECTION 11D: SIDEBAR - DANGEROUS ACTIONS WITH CONFIRMATION
     # ============================================================================
+    profiler.section("11D: Sidebar clear data")
     st.subheader("⚠️ Clear Data")
     
     if st.session_state.confirming_clear == "session":
@@ -707,6 +817,8 @@ with st.sidebar:
                     st.session_state.responses[current_session_id]["questions"] = {}
                     # Update the JSON file
                     save_user_data(st.session_state.user_id, st.session_state.responses)
+                    search_index.reindex_user(st.session_state.user_id, st.session_state.responses)
+                    retrieval.rebuild(st.session_state.user_id, st.session_state.responses)
                     st.session_state.confirming_clear = None
                     st.rerun()
                 except Exception as e:
@@ -731,6 +843,8 @@ with st.sidebar:
                         st.session_state.responses[session_id]["questions"] = {}
                     # Update the JSON file
                     save_user_data(st.session_state.user_id, st.session_state.responses)
+                    search_index.reindex_user(st.session_state.user_id, st.session_state.responses)
+                    retrieval.rebuild(st.session_state.user_id, st.session_state.responses)
                     st.session_state.confirming_clear = None
                     st.rerun()
                 except Exception as e:
@@ -756,9 +870,10 @@ with st.sidebar:
 # ============================================================================
 # SECTION 12: MAIN CONTENT - SESSION HEADER
 # ============================================================================
+profiler.section("12: Session header")
 current_session = SESSIONS[st.session_state.current_session]
 current_session_id = current_session["id"]
-current_question_text = current_session["questions"][st.session_state.current_question]
+current_question_text = current_session["questions"][st.session_state.current_question]["text"]
 
 col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
@@ -777,15 +892,11 @@ with col2:
 with col3:
     nav_col1, nav_col2 = st.columns(2)
     with nav_col1:
-        if st.button("← Previous Topic", disabled=st.session_state.current_question == 0, key="prev_q_quick", use_container_width=True):
-            st.session_state.current_question = max(0, st.session_state.current_question - 1)
-            st.session_state.editing = None
-            st.rerun()
+        st.button("← Previous Topic", disabled=st.session_state.current_question == 0, key="prev_q_quick", use_container_width=True,
+                  on_click=go_to_topic, args=(max(0, st.session_state.current_question - 1),))
     with nav_col2:
-        if st.button("Next Topic →", disabled=st.session_state.current_question >= len(current_session["questions"]) - 1, key="next_q_quick", use_container_width=True):
-            st.session_state.current_question = min(len(current_session["questions"]) - 1, st.session_state.current_question + 1)
-            st.session_state.editing = None
-            st.rerun()
+        st.button("Next Topic →", disabled=st.session_state.current_question >= len(current_session["questions"]) - 1, key="next_q_quick", use_container_width=True,
+                  on_click=go_to_topic, args=(min(len(current_session["questions"]) - 1, st.session_state.current_question + 1),))
 
 # Show current topic
 st.markdown(f"""
@@ -814,17 +925,19 @@ if total_topics > 0:
 # ============================================================================
 # SECTION 13: CONVERSATION DISPLAY AND CHAT INPUT
 # ============================================================================
+profiler.section("13: Conversation display")
 current_session_id = current_session["id"]
-current_question_text = current_session["questions"][st.session_state.current_question]
+current_question_id = current_session["questions"][st.session_state.current_question]["id"]
+current_question_text = current_session["questions"][st.session_state.current_question]["text"]
 
 if current_session_id not in st.session_state.session_conversations:
     st.session_state.session_conversations[current_session_id] = {}
 
-conversation = st.session_state.session_conversations[current_session_id].get(current_question_text, [])
+conversation = st.session_state.session_conversations[current_session_id].get(current_question_id, [])
 
 if not conversation:
     # Check if we have a saved response for this question
-    saved_response = st.session_state.responses[current_session_id]["questions"].get(current_question_text)
+    saved_response = st.session_state.responses[current_session_id]["questions"].get(current_question_id)
     
     if saved_response:
         # We have a saved response but no conversation - create one
@@ -832,7 +945,7 @@ if not conversation:
             {"role": "assistant", "content": f"Let's explore this topic in detail: {current_question_text}"},
             {"role": "user", "content": saved_response["answer"]}
         ]
-        st.session_state.session_conversations[current_session_id][current_question_text] = conversation
+        st.session_state.session_conversations[current_session_id][current_question_id] = conversation
     else:
         # Start new conversation
         with st.chat_message("assistant", avatar="👔"):
@@ -848,67 +961,117 @@ Take your time with this—good biographies are built from thoughtful reflection
             
             st.markdown(welcome_msg, unsafe_allow_html=True)
             conversation.append({"role": "assistant", "content": f"Let's explore this topic in detail: {current_question_text}\n\nTake your time with this—good biographies are built from thoughtful reflection."})
-            st.session_state.session_conversations[current_session_id][current_question_text] = conversation
+            st.session_state.session_conversations[current_session_id][current_question_id] = conversation
 
-# Display existing conversation
-for i, message in enumerate(conversation):
-    if message["role"] == "assistant":
-        with st.chat_message("assistant", avatar="👔"):
-            st.markdown(message["content"])
+# Long topics only render the most recent messages; older ones load a page
+# at a time on request, so a rerun costs the same however long the topic is.
+CONVERSATION_PAGE_SIZE = 10
+
+def message_caption(content):
+    """Word-count caption for a message (text_stats scans each distinct text once)"""
+    word_count = text_stats.word_count(content)
+    return f"📝 {word_count} words • Click ✏️ to edit"
+
+# Display existing conversation. A fragment, so entering, typing in and
+# cancelling an edit rerun only this part of the page.
+@st.fragment
+@profiler.timed("Fragment: conversation")
+def render_conversation(session_id, question_id, conversation):
+    window_key = f"{session_id}:{question_id}"
+    visible = st.session_state.conversation_window.get(window_key, CONVERSATION_PAGE_SIZE)
+    first_shown = max(0, len(conversation) - visible)
+    
+    if first_shown > 0:
+        st.button(
+            f"⬆️ Show earlier messages ({first_shown} hidden)",
+            key=f"earlier_{session_id}_{question_id}",
+            on_click=show_earlier_messages,
+            args=(window_key, CONVERSATION_PAGE_SIZE)
+        )
     
-    elif message["role"] == "user":
-        is_editing = (st.session_state.editing == (current_session_id, current_question_text, i))
+    for i in range(first_shown, len(conversation)):
+        message = conversation[i]
+        if message["role"] == "assistant":
+            with st.chat_message("assistant", avatar="👔"):
+                st.markdown(message["content"])
         
-        with st.chat_message("user", avatar="👤"):
-            if is_editing:
-                # Edit mode
-                new_text = st.text_area(
-                    "Edit your answer:",
-                    value=st.session_state.edit_text,
-                    key=f"edit_area_{current_session_id}_{hash(current_question_text)}_{i}",
-                    height=150,
-                    label_visibility="collapsed"
-                )
-                
-                if new_text:
-                    edit_word_count = len(re.findall(r'\w+', new_text))
-                    st.caption(f"📝 Editing: {edit_word_count} words")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("✓ Save", key=f"save_{current_session_id}_{hash(current_question_text)}_{i}", type="primary"):
-                        # Auto-correct before saving
-                        if st.session_state.spellcheck_enabled:
-                            new_text = auto_correct_text(new_text)
-                        
-                        # Update conversation
-                        conversation[i]["content"] = new_text
-                        st.session_state.session_conversations[current_session_id][current_question_text] = conversation
-                        
-                        # Save to JSON file
-                        save_response(current_session_id, current_question_text, new_text)
-                        
-                        st.session_state.editing = None
-                        st.rerun()
-                with col2:
-                    if st.button("✕ Cancel", key=f"cancel_{current_session_id}_{hash(current_question_text)}_{i}"):
-                        st.session_state.editing = None
-                        st.rerun()
-            else:
-                col1, col2 = st.columns([5, 1])
-                with col1:
-                    st.markdown(message["content"])
-                    word_count = len(re.findall(r'\w+', message["content"]))
-                    st.caption(f"📝 {word_count} words • Click ✏️ to edit")
-                with col2:
-                    if st.button("✏️", key=f"edit_{current_session_id}_{hash(current_question_text)}_{i}"):
-                        st.session_state.editing = (current_session_id, current_question_text, i)
-                        st.session_state.edit_text = message["content"]
-                        st.rerun()
+        elif message["role"] == "user":
+            is_editing = (st.session_state.editing == (session_id, question_id, i))
+            
+            with st.chat_message("user", avatar="👤"):
+                if is_editing:
+                    # Edit mode
+                    new_text = st.text_area(
+                        "Edit your answer:",
+                        value=st.session_state.edit_text,
+                        key=f"edit_area_{session_id}_{question_id}_{i}",
+                        height=150,
+                        label_visibility="collapsed"
+                    )
+                    
+                    if new_text:
+                        edit_word_count = text_stats.word_count(new_text)
+                        st.caption(f"📝 Editing: {edit_word_count} words")
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("✓ Save", key=f"save_{session_id}_{question_id}_{i}", type="primary"):
+                            # Auto-correct before saving
+                            if st.session_state.spellcheck_enabled:
+                                new_text = auto_correct_text(new_text)
+                            
+                            # Update conversation
+                            conversation[i]["content"] = new_text
+                            st.session_state.session_conversations[session_id][question_id] = conversation
+                            
+                            # Save to JSON file
+                            save_response(session_id, question_id, new_text)
+                            
+                            # The answer changed, so word counts and exports elsewhere
+                            # on the page are stale: rerun the whole app once.
+                            st.session_state.editing = None
+                            st.rerun(scope="app")
+                    with col2:
+                        st.button("✕ Cancel", key=f"cancel_{session_id}_{question_id}_{i}",
+                                  on_click=cancel_editing)
+                else:
+                    col1, col2 = st.columns([5, 1])
+                    with col1:
+                        st.markdown(message["content"])
+                        st.caption(message_caption(message["content"]))
+                    with col2:
+                        st.button("✏️", key=f"edit_{session_id}_{question_id}_{i}",
+                                  on_click=start_editing, args=(session_id, question_id, i, message["content"]))
+
+render_conversation(current_session_id, current_question_id, conversation)
+
+# A repeat of a message that is still being sent (from another tab) polls the
+# submission ledger here, so the page stays responsive while it waits.
+@st.fragment(run_every=submissions.PENDING_POLL_SECONDS)
+@profiler.timed("Fragment: awaiting reply")
+def await_pending_submission():
+    if st.session_state.awaiting_submission is None:
+        return
+    submission, session_id, question_id = st.session_state.awaiting_submission
+    previous = submissions.lookup(st.session_state.user_id, submission)
+    if previous is not None and previous["state"] == submissions.PENDING:
+        st.caption("⏳ Still working on your last message…")
+        return
+    st.session_state.awaiting_submission = None
+    if previous is None:
+        st.toast("Your last message didn't go through. Please send it again.")
+        return
+    conversation = st.session_state.session_conversations.setdefault(session_id, {}).setdefault(question_id, [])
+    replay_submission(previous, submission, conversation, session_id, question_id)
+    st.rerun(scope="app")
+
+if st.session_state.awaiting_submission is not None:
+    await_pending_submission()
 
 # ============================================================================
-# CHAT INPUT BOX
+# SECTION 13A: CHAT INPUT BOX
 # ============================================================================
+profiler.section("13A: Chat input")
 input_container = st.container()
 
 with input_container:
@@ -918,75 +1081,107 @@ with input_container:
     user_input = st.chat_input("Type your answer here...")
     
     if user_input:
-        # Auto-correct if enabled
-        if st.session_state.spellcheck_enabled:
-            user_input = auto_correct_text(user_input)
-        
-        # Add user message to conversation
-        conversation.append({"role": "user", "content": user_input})
+        user_id = st.session_state.user_id
+        submission = submissions.submission_id(user_id, current_session_id, current_question_id,
+                                               submissions.conversation_turn(conversation), user_input)
+        previous = submissions.claim(user_id, submission)
+        if previous is not None:
+            replay_submission(previous, submission, conversation, current_session_id, current_question_id)
+            st.rerun()
         
-        # Generate AI response
-        with st.chat_message("assistant", avatar="👔"):
-            with st.spinner("Reflecting on your story..."):
-                try:
-                    # Generate thoughtful response
-                    conversation_history = conversation[:-1]
-                    
-                    messages_for_api = [
-                        {"role": "system", "content": get_system_prompt()},
-                        *conversation_history,
-                        {"role": "user", "content": user_input}
-                    ]
-                    
-                    if st.session_state.ghostwriter_mode:
-                        temperature = 0.8
-                        max_tokens = 400
-                    else:
-                        temperature = 0.7
-                        max_tokens = 300
-                    
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=messages_for_api,
-                        temperature=temperature,
-                        max_tokens=max_tokens
-                    )
-                    
-                    ai_response = response.choices[0].message.content
-                    
-                    # Add professional note
-                    word_count = len(re.findall(r'\w+', user_input))
-                    if word_count < 50:
-                        ai_response += f"\n\n**Note:** You've touched on something important. Consider expanding on the sensory details—what did you see, hear, feel?"
-                    elif word_count < 150:
-                        ai_response += f"\n\n**Note:** Good detail. Where does the emotional weight live in this memory?"
-                    
-                    st.markdown(ai_response)
-                    conversation.append({"role": "assistant", "content": ai_response})
+        try:
+            # Auto-correct if enabled
+            if st.session_state.spellcheck_enabled:
+                user_input = auto_correct_text(user_input)
+            
+            # Add user message to conversation
+            conversation.append({"role": "user", "content": user_input})
+            
+            # Generate AI response
+            with st.chat_message("assistant", avatar="👔"):
+                with st.spinner("Reflecting on your story..."):
+                    try:
+                        # Generate thoughtful response
+                        conversation_history = conversation[:-1]
+                        
+                        messages_for_api = [
+                            {"role": "system", "content": get_system_prompt(user_input)},
+                            *conversation_history,
+                            {"role": "user", "content": user_input}
+                        ]
+                        
+                        if st.session_state.ghostwriter_mode:
+                            temperature = 0.8
+                            max_tokens = 400
+                        else:
+                            temperature = 0.7
+                            max_tokens = 300
+                        
+                        response = usage_meter.metered_completion(
+                            get_openai_client(),
+                            st.session_state.user_id,
+                            usage_meter.FEATURE_BIOGRAPHER,
+                            model="gpt-4o-mini",
+                            messages=messages_for_api,
+                            temperature=temperature,
+                            max_tokens=max_tokens
+                        )
+                        
+                        ai_response = response.choices[0].message.content
+                        
+                        # Add professional note
+                        word_count = text_stats.word_count(user_input)
+                        if word_count < 50:
+                            ai_response += f"\n\n**Note:** You've touched on something important. Consider expanding on the sensory details—what did you see, hear, feel?"
+                        elif word_count < 150:
+                            ai_response += f"\n\n**Note:** Good detail. Where does the emotional weight live in this memory?"
+                        
+                        submissions.record_reply(user_id, submission, user_input, ai_response)
+                        
+                        st.markdown(ai_response)
+                        conversation.append({"role": "assistant", "content": ai_response})
+                        
+                    except usage_meter.BudgetExceeded:
+                        error_msg = "Thank you for sharing that. Your response has been saved. You've reached today's limit for biographer replies—come back tomorrow to continue the conversation."
+                        submissions.record_reply(user_id, submission, user_input, error_msg)
+                        st.markdown(error_msg)
+                        conversation.append({"role": "assistant", "content": error_msg})
                     
-                except Exception as e:
-                    error_msg = "Thank you for sharing that. Your response has been saved."
-                    st.markdown(error_msg)
-                    conversation.append({"role": "assistant", "content": error_msg})
-        
-        # Save conversation
-        st.session_state.session_conversations[current_session_id][current_question_text] = conversation
-        
-        # CRITICAL: Save the response to JSON file
-        save_response(current_session_id, current_question_text, user_input)
-        
-        st.rerun()
+                    except Exception as e:
+                        # No reply to cache: drop the claim so sending it again calls the biographer again
+                        submissions.release(user_id, submission)
+                        error_msg = "Thank you for sharing that. Your response has been saved."
+                        st.markdown(error_msg)
+                        conversation.append({"role": "assistant", "content": error_msg})
+            
+            # Save conversation
+            st.session_state.session_conversations[current_session_id][current_question_id] = conversation
+            
+            # CRITICAL: Save the response to JSON file
+            if save_response(current_session_id, current_question_id, user_input):
+                submissions.mark_saved(user_id, submission)
+            
+            st.rerun()
+        finally:
+            # Interrupted or failed before a reply: let the next attempt through
+            submissions.release(user_id, submission)
 
 # ============================================================================
 # SECTION 14: WORD PROGRESS INDICATOR
 # ============================================================================
+profiler.section("14: Word progress")
 st.divider()
 
-# Get progress info
-progress_info = get_progress_info(current_session_id)
-
-# Display progress container
-st.markdown(f"""
+# Progress and the word target editor form one fragment: changing the
+# target only affects this panel, so it never reruns the rest of the page.
+@st.fragment
+@profiler.timed("Fragment: word progress")
+def render_word_progress(session_id):
+    # Get progress info
+    progress_info = get_progress_info(session_id)
+    
+    # Display progress container
+    st.markdown(f"""
 <div class="progress-container">
     <div class="progress-header">📊 Session Progress</div>
     <div class="progress-status">{progress_info['emoji']} {progress_info['progress_percent']:.0f}% complete • {progress_info['status_text']}</div>
@@ -998,45 +1193,41 @@ st.markdown(f"""
     </div>
 </div>
 """, unsafe_allow_html=True)
-
-# Edit target button
-if st.button("✏️ Change Word Target", key="edit_word_target_bottom", use_container_width=True):
-    st.session_state.editing_word_target = not st.session_state.editing_word_target
-    st.rerun()
-
-# Show edit interface when triggered
-if st.session_state.editing_word_target:
-    st.markdown('<div class="edit-target-box">', unsafe_allow_html=True)
-    st.write("**Change Word Target**")
-    
-    new_target = st.number_input(
-        "Target words for this session:",
-        min_value=100,
-        max_value=5000,
-        value=progress_info['target'],
-        key="target_edit_input_bottom",
-        label_visibility="collapsed"
-    )
     
-    col_save, col_cancel = st.columns(2)
-    with col_save:
-        if st.button("💾 Save", key="save_word_target_bottom", type="primary", use_container_width=True):
-            # Update session state
-            st.session_state.responses[current_session_id]["word_target"] = new_target
-            # Update JSON file
-            save_user_data(st.session_state.user_id, st.session_state.responses)
-            st.session_state.editing_word_target = False
-            st.rerun()
-    with col_cancel:
-        if st.button("❌ Cancel", key="cancel_word_target_bottom", use_container_width=True):
-            st.session_state.editing_word_target = False
-            st.rerun()
+    # Edit target button
+    st.button("✏️ Change Word Target", key="edit_word_target_bottom", use_container_width=True,
+              on_click=toggle_word_target_editor)
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    # Show edit interface when triggered
+    if st.session_state.editing_word_target:
+        st.markdown('<div class="edit-target-box">', unsafe_allow_html=True)
+        st.write("**Change Word Target**")
+        
+        st.number_input(
+            "Target words for this session:",
+            min_value=100,
+            max_value=5000,
+            value=progress_info['target'],
+            key="target_edit_input_bottom",
+            label_visibility="collapsed"
+        )
+        
+        col_save, col_cancel = st.columns(2)
+        with col_save:
+            st.button("💾 Save", key="save_word_target_bottom", type="primary", use_container_width=True,
+                      on_click=save_word_target, args=(session_id,))
+        with col_cancel:
+            st.button("❌ Cancel", key="cancel_word_target_bottom", use_container_width=True,
+                      on_click=close_word_target_editor)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+
+render_word_progress(current_session_id)
 
 # ============================================================================
 # SECTION 15: FOOTER WITH STATISTICS
 # ============================================================================
+profiler.section("15: Footer statistics")
 st.divider()
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -1053,41 +1244,28 @@ with col3:
 # ============================================================================
 # SECTION 16: PUBLISH & VAULT SECTION
 # ============================================================================
+profiler.section("16: Publish and vault")
 st.divider()
 st.subheader("📘 Publish & Save Your Biography")
 
 # Get the current user's data
 current_user = st.session_state.get('user_id', '')
-export_data = {}
-
 # Prepare data for export
-for session in SESSIONS:
-    session_id = session["id"]
-    session_data = st.session_state.responses.get(session_id, {})
-    if session_data.get("questions"):
-        export_data[str(session_id)] = {
-            "title": session["title"],
-            "questions": session_data["questions"]
-        }
+export_span = tracing.start_span("export.build", location="publish", user=tracing.hash_user(current_user))
+export_payload = story_schema.export_payload(current_user, st.session_state.responses,
+                                             {session["id"]: session["title"] for session in SESSIONS})
+export_data = export_payload["stories"]
 
 if current_user and current_user != "" and export_data:
-    # Count total stories
-    total_stories = sum(len(session['questions']) for session in export_data.values())
-    
     # Create JSON data for the publisher
-    json_data = json.dumps({
-        "user": current_user,
-        "stories": export_data,
-        "export_date": datetime.now().isoformat()
-    }, indent=2)
+    json_data = json.dumps(export_payload, indent=2)
     
-    # Encode the data for URL
-    import base64
-    encoded_data = base64.b64encode(json_data.encode()).decode()
-    
-    # Create URL for the publisher (UPDATE THIS TO YOUR ACTUAL PUBLISHER URL)
-    publisher_base_url = "https://deeperbiographer-dny9n2j6sflcsppshrtrmu.streamlit.app/"
-    publisher_url = f"{publisher_base_url}?data={encoded_data}"
+    export_span.set(bytes=len(json_data))
+export_span.end()
+
+if current_user and current_user != "" and export_data:
+    # Count total stories
+    total_stories = sum(len(session['questions']) for session in export_data.values())
     
     st.success(f"✅ **{total_stories} stories ready to publish!**")
     
@@ -1095,17 +1273,16 @@ if current_user and current_user != "" and export_data:
     
     with col1:
         st.markdown("#### 🖨️ Create Your Book")
-        st.markdown(f"""
+        st.markdown("""
         Generate a beautiful, formatted biography from your stories.
         
-        **[📘 Click to Create Biography]({publisher_url})**
-        
         Your book will include:
         • Professional formatting
         • Table of contents
         • All your stories organized
         • Ready to print or share
         """)
+        render_publish_controls(current_user, export_data, "main")
     
     with col2:
         st.markdown("#### 🔐 Save to Your Vault")
@@ -1140,5 +1317,10 @@ else:
 # ============================================================================
 # FOOTER
 # ============================================================================
+profiler.section("Footer")
 st.markdown("---")
 st.caption(f"DeeperVault UK Legacy Builder • User: {st.session_state.user_id} • Data saved to JSON files")
+
+profiler.finish()
+profiler.render_panel()
+tracing.end_rerun(st.session_state, user=tracing.hash_user(st.session_state.user_id))
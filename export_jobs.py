@@ -0,0 +1,314 @@
+# export_jobs.py - BACKGROUND BIOGRAPHY EXPORTS WITH PERSISTED STATUS
+#
+# The publisher submits an export and polls; rendering runs in a small
+# process pool, so a big biography never ties up the Streamlit script
+# thread and at most MAX_CONCURRENT_EXPORTS run at once. Each job lives in
+# its own folder:
+#
+#   export_jobs/<job id>/payload.json   the stories it was asked to render
+#   export_jobs/<job id>/status.json    state, progress by chapter, artifacts
+#   export_jobs/<job id>/heartbeat      touched by the server process that queued
+#                                       it while the job is queued or running
+#   export_jobs/<job id>/<files>        one file per finished format, and the
+#                                       all-formats zip when a bundle was asked for
+#
+# The job id is a hash of the stories and options, so publishing the same
+# biography again returns the finished job instead of rendering it twice,
+# and users can come back later to the downloads. Nothing lists jobs by
+# user: the publisher only shows the job ids its own browser session
+# submitted, since the user name in a publish link is not authenticated.
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+import story_schema
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+EXPORT_JOBS_DIR = os.environ.get("EXPORT_JOBS_DIR", "export_jobs")
+MAX_CONCURRENT_EXPORTS = int(os.environ.get("MAX_CONCURRENT_EXPORTS", "2"))
+JOB_RETENTION_DAYS = int(os.environ.get("EXPORT_JOB_RETENTION_DAYS", "7"))
+PROGRESS_WRITE_SECONDS = 0.5   # min gap between status writes while rendering
+HEARTBEAT_SECONDS = 5.0        # how often the owning process touches its active jobs' heartbeat
+HEARTBEAT_STALE_SECONDS = 30   # an active job whose heartbeat is older has lost its server
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"    # was running when the server stopped
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+_pool = None
+_pool_lock = threading.Lock()
+_futures = {}   # job id -> Future, for jobs submitted by this process
+_heartbeat_thread = None
+
+
+# ============================================================================
+# JOB FILES
+# ============================================================================
+def job_dir(job_id):
+    return os.path.join(EXPORT_JOBS_DIR, job_id)
+
+
+def job_id_for(stories_data, formats, include_questions, bundle=False):
+    """Same stories and options -> same job (export_date is ignored, it changes on every publish)"""
+    payload = story_schema.encode_export(story_schema.as_biography(stories_data))
+    content = {k: v for k, v in payload.items() if k != "export_date"}
+    raw = json.dumps([content, list(formats), bool(include_questions), bool(bundle)], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _write_status(job_id, status):
+    """Write atomically so a poll never reads half a file"""
+    status["updated"] = datetime.now().isoformat(timespec="seconds")
+    path = os.path.join(job_dir(job_id), "status.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def _read_status(job_id):
+    try:
+        with open(os.path.join(job_dir(job_id), "status.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_path(job_id, artifact):
+    return os.path.join(job_dir(job_id), artifact["file"])
+
+
+def read_artifact(job_id, artifact):
+    with open(artifact_path(job_id, artifact), "rb") as f:
+        return f.read()
+
+
+# ============================================================================
+# WORKER SIDE
+# ============================================================================
+def run_job(job_id):
+    """Render every format of a job into its folder, updating status.json as it goes"""
+    import biography_renderers
+    import bundle
+    from biography_renderers import chapter_cache
+
+    status = _read_status(job_id)
+    with open(os.path.join(job_dir(job_id), "payload.json"), "r", encoding="utf-8") as f:
+        stories_data = story_schema.decode_export(json.load(f))   # decoded once, every format renders from it
+
+    status.update(state=RUNNING, started=datetime.now().isoformat(timespec="seconds"), artifacts=[], error=None)
+    chapter_cache.reset_stats()
+    _write_status(job_id, status)
+    formats = status["formats"]
+    chapters = max(1, status["stats"]["chapters"])
+    author_name = stories_data.display_name
+    last_write = 0.0
+
+    def on_chapter(fmt, chapter_num):
+        nonlocal last_write
+        status.update(format=fmt, chapter=chapter_num)
+        status["progress"] = min(1.0, (status["formats_done"] + (chapter_num - 1) / chapters) / len(formats))
+        if time.monotonic() - last_write >= PROGRESS_WRITE_SECONDS:
+            _write_status(job_id, status)
+            last_write = time.monotonic()
+
+    bundle_file = bundle.bundle_name(author_name, status["include_questions"]) if status.get("bundle") else None
+    bundle_stream = bundle_writer = None
+    try:
+        with tracing.span("export_job", job=job_id, formats=",".join(formats), chapters=chapters) as job_span:
+            if bundle_file:
+                bundle_stream = open(os.path.join(job_dir(job_id), bundle_file), "wb")
+                bundle_writer = bundle.BundleWriter(bundle_stream)
+            for fmt in formats:
+                file_name = biography_renderers.file_name(author_name, fmt, status["include_questions"])
+                path = os.path.join(job_dir(job_id), file_name)
+                # Straight to disk: PDF and EPUB are streamed, nothing is kept in memory
+                with open(path, "wb") as f:
+                    size = biography_renderers.render_to(f, stories_data, fmt, status["include_questions"], on_chapter)
+                if bundle_writer:
+                    bundle_writer.add_file(path, file_name, fmt)
+                status["artifacts"].append({"format": fmt, "file": file_name, "bytes": size})
+                status["formats_done"] += 1
+                status["progress"] = status["formats_done"] / len(formats)
+                _write_status(job_id, status)
+                last_write = time.monotonic()
+            if bundle_writer:
+                bundle_writer.add_file(os.path.join(job_dir(job_id), "payload.json"),
+                                       bundle.source_name(author_name, status["include_questions"]))
+                bundle_writer.close()
+                bundle_stream.close()
+                status["artifacts"].append({"format": "zip", "file": bundle_file,
+                                            "bytes": os.path.getsize(os.path.join(job_dir(job_id), bundle_file))})
+            # Chapters reused from earlier publishes vs rendered again
+            status["cache"] = chapter_cache.stats()["total"]
+            job_span.set(bytes=sum(a["bytes"] for a in status["artifacts"]),
+                         cache_hits=status["cache"]["hits"], cache_misses=status["cache"]["misses"])
+        status.update(state=DONE, progress=1.0, finished=datetime.now().isoformat(timespec="seconds"))
+    except Exception as e:
+        status.update(state=FAILED, error=f"{type(e).__name__}: {e}")
+    finally:
+        if bundle_stream:
+            bundle_stream.close()
+    _write_status(job_id, status)
+    return status["state"]
+
+
+# ============================================================================
+# QUEUE (STREAMLIT PROCESS)
+# ============================================================================
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn, not fork: the Streamlit server is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=MAX_CONCURRENT_EXPORTS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _touch_heartbeat(job_id):
+    path = os.path.join(job_dir(job_id), "heartbeat")
+    try:
+        with open(path, "a"):
+            pass
+        os.utime(path, None)
+    except OSError as e:
+        print(f"Error updating heartbeat of export job {job_id}: {e}")
+
+
+def _beat():
+    """Keep the heartbeat of every job this process owns fresh, so other processes know it is alive"""
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        for job_id in list(_futures):
+            _touch_heartbeat(job_id)
+
+
+def _has_heartbeat(job_id):
+    try:
+        return time.time() - os.path.getmtime(os.path.join(job_dir(job_id), "heartbeat")) < HEARTBEAT_STALE_SECONDS
+    except OSError:
+        return False
+
+
+def _job_finished(job_id, future):
+    """Record worker crashes that run_job could not report itself, then forget the future"""
+    global _pool
+    error = future.exception()
+    if error is not None:
+        status = _read_status(job_id) or {}
+        if status.get("state") in ACTIVE_STATES:
+            status.update(state=FAILED, error=f"{type(error).__name__}: {error}")
+            _write_status(job_id, status)
+        from concurrent.futures.process import BrokenProcessPool
+        if isinstance(error, BrokenProcessPool):
+            with _pool_lock:
+                _pool = None
+    if _futures.get(job_id) is future:
+        del _futures[job_id]
+
+
+def _enqueue(job_id, status):
+    global _heartbeat_thread
+    status.update(state=QUEUED, progress=0.0, formats_done=0, format=None, chapter=0, artifacts=[], error=None)
+    _write_status(job_id, status)
+    _touch_heartbeat(job_id)
+    with _pool_lock:
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_beat, name="export-job-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+    future = _get_pool().submit(run_job, job_id)
+    _futures[job_id] = future
+    future.add_done_callback(lambda f: _job_finished(job_id, f))
+
+
+def submit(stories_data, formats, include_questions=False, bundle=False):
+    """Queue an export and return its job id; a finished identical job is reused
+
+    With bundle=True the job also writes one zip of every format plus the source JSON.
+    """
+    stories_data = story_schema.as_biography(stories_data)
+    job_id = job_id_for(stories_data, formats, include_questions, bundle)
+    status = get_status(job_id)
+    if status and (status["state"] in ACTIVE_STATES or (status["state"] == DONE and _artifacts_present(job_id, status))):
+        tracing.event("export_job.reused", job=job_id, state=status["state"])
+        return job_id
+
+    prune_old_jobs()
+    os.makedirs(job_dir(job_id), exist_ok=True)
+    with open(os.path.join(job_dir(job_id), "payload.json"), "w", encoding="utf-8") as f:
+        json.dump(story_schema.encode_export(stories_data), f)
+
+    from biography_renderers.chapters import count_chapters
+    status = {
+        "id": job_id,
+        "user": stories_data.user,
+        "author": stories_data.display_name,
+        "formats": list(formats),
+        "include_questions": bool(include_questions),
+        "bundle": bool(bundle),
+        "stats": count_chapters(stories_data),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    _enqueue(job_id, status)
+    return job_id
+
+
+def _artifacts_present(job_id, status):
+    return all(os.path.exists(artifact_path(job_id, a)) for a in status.get("artifacts", []))
+
+
+def get_status(job_id):
+    """The job's status dict, or None; active jobs whose server stopped are reported as interrupted
+
+    The job may belong to another server process, so liveness comes from
+    its heartbeat file rather than from this process's futures.
+    """
+    status = _read_status(job_id)
+    if status and status["state"] in ACTIVE_STATES and job_id not in _futures and not _has_heartbeat(job_id):
+        status["state"] = INTERRUPTED
+    return status
+
+
+def queue_position(job_id):
+    """How many jobs submitted before this one are still waiting for a slot (0 once running)"""
+    waiting = [jid for jid, future in _futures.items() if not future.running() and not future.done()]
+    return waiting.index(job_id) if job_id in waiting else 0
+
+
+def list_jobs(job_ids, state=DONE):
+    """Those of job_ids (the ones a browser session submitted) in `state`, newest first"""
+    jobs = []
+    for job_id in set(job_ids):
+        status = get_status(job_id)
+        if status and status["state"] == state:
+            jobs.append(status)
+    return sorted(jobs, key=lambda s: s.get("finished") or s["created"], reverse=True)
+
+
+def prune_old_jobs(days=JOB_RETENTION_DAYS):
+    """Delete finished job folders older than the retention period, and stale cached chapters"""
+    from biography_renderers import chapter_cache
+    chapter_cache.prune()
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+    try:
+        entries = os.scandir(EXPORT_JOBS_DIR)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            status = get_status(entry.name) if entry.is_dir() else None
+            if status and status["state"] not in ACTIVE_STATES and status.get("updated", "") < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
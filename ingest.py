@@ -0,0 +1,368 @@
+# ingest.py - SIZE-BOUNDED, STREAMING JSON INGESTION FOR THE PUBLISHER
+#
+# Everything the publisher receives from outside goes through here: an
+# uploaded stories file, a legacy ?data= link and a ?sync= link. Input is
+# decoded and parsed a chunk at a time, and parsing stops at the first
+# broken limit (bytes, stories, sessions, nesting, field sizes, shape), so
+# an oversized or malicious payload costs at most MAX_BYTES of input and
+# is never read or decoded in full:
+#
+#   stories_data = ingest.load_stories(uploaded_file)
+#   stories_data = ingest.decode_base64(st.query_params["data"])
+#   payload = ingest.decode_compressed(token)      # ?sync= links
+#
+# The parser yields ijson-style events (start_map, map_key, string, ...)
+# from a buffer holding one chunk plus at most one unfinished token, with
+# strings unescaped by the json module's C scanner. The builder turns them
+# into the stories dicts the renderers take, checking each session as soon
+# as it is complete.
+import base64
+import binascii
+import codecs
+import json
+import os
+import re
+import zlib
+from json.decoder import scanstring
+
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+MAX_UPLOAD_MB = int(os.environ.get("INGEST_MAX_MB", "20"))
+MAX_BYTES = MAX_UPLOAD_MB * 1024 * 1024        # decoded JSON, whatever it arrived as
+MAX_STORIES = int(os.environ.get("INGEST_MAX_STORIES", "5000"))
+MAX_SESSIONS = 500
+MAX_DEPTH = 16
+MAX_VALUES = 200_000                           # every string, number, object... (a story is ~5)
+MAX_TITLE_CHARS = 200
+MAX_QUESTION_CHARS = 2000
+MAX_ANSWER_CHARS = 200_000
+MAX_TOKEN_CHARS = MAX_ANSWER_CHARS * 6 + 2     # the longest answer with every character \u-escaped
+CHUNK_BYTES = 64 * 1024
+STORY_CONTAINERS = ("stories", "changed")      # top-level keys holding {session id: {"title", "questions"}}
+
+
+class IngestError(ValueError):
+    """Input the publisher refuses: too big, not JSON, or not shaped like stories"""
+
+
+def _too_big(max_bytes):
+    return f"The stories are larger than the {max_bytes / (1024 * 1024):g} MB limit"
+
+
+# ============================================================================
+# CHUNK SOURCES
+# ============================================================================
+def _read_chunks(stream, max_bytes):
+    """Chunks of a file object, refusing it as soon as it passes max_bytes"""
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_BYTES)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise IngestError(_too_big(max_bytes))
+        yield chunk
+
+
+def _base64_chunks(encoded, max_bytes, urlsafe=False):
+    """Decoded bytes of a base64 string, a chunk at a time (characters outside the alphabet are ignored)"""
+    if len(encoded) * 3 // 4 > max_bytes:
+        raise IngestError(_too_big(max_bytes))
+    # Copied only when it has stray characters (the old decoding silently skipped them too)
+    outside_alphabet = re.compile(r"[^A-Za-z0-9_=-]" if urlsafe else r"[^A-Za-z0-9+/=]")
+    if outside_alphabet.search(encoded):
+        encoded = outside_alphabet.sub("", encoded)
+    decode = base64.urlsafe_b64decode if urlsafe else base64.b64decode
+    step = CHUNK_BYTES // 3 * 4
+    for start in range(0, len(encoded), step):
+        piece = encoded[start:start + step]
+        try:
+            yield decode(piece + "=" * (-len(piece) % 4))
+        except binascii.Error as e:
+            raise IngestError(f"The link's data is damaged ({e})")
+
+
+def _inflate(chunks, max_bytes):
+    """zlib-decompressed chunks, refusing output past max_bytes (so a zip bomb is never expanded)"""
+    inflater = zlib.decompressobj()
+    total = 0
+    try:
+        for chunk in chunks:
+            while chunk:
+                out = inflater.decompress(chunk, CHUNK_BYTES)
+                chunk = inflater.unconsumed_tail
+                total += len(out)
+                if total > max_bytes:
+                    raise IngestError(_too_big(max_bytes))
+                yield out
+        yield inflater.flush()
+    except zlib.error as e:
+        raise IngestError(f"The link's data is damaged ({e})")
+    if not inflater.eof:
+        raise IngestError("The link's data is cut short")
+
+
+def _text(chunks):
+    """UTF-8 text of byte chunks (text chunks pass through), dropping a byte order mark"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    try:
+        for chunk in chunks:
+            yield chunk if isinstance(chunk, str) else decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise IngestError("The stories are not UTF-8 text")
+
+
+# ============================================================================
+# INCREMENTAL PARSER
+# ============================================================================
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?")
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"t": ("true", True), "f": ("false", False), "n": ("null", None)}
+
+
+class _Buffer:
+    """The unparsed text: the current chunk plus whatever token was cut off at the end of the last one"""
+
+    def __init__(self, texts):
+        self.texts = iter(texts)
+        self.text = ""
+        self.pos = 0
+        self.offset = 0   # characters dropped from the front, for error positions
+        self.eof = False
+
+    def more(self):
+        """Append the next chunk; False at the end of the input"""
+        for text in self.texts:
+            if text:
+                self.offset += self.pos
+                self.text = self.text[self.pos:] + text
+                self.pos = 0
+                return True
+        self.eof = True
+        return False
+
+    def error(self, message, pos=None):
+        position = self.offset + (self.pos if pos is None else pos)
+        return IngestError(f"Not valid JSON: {message.removesuffix(' at')} (character {position:,})")
+
+    def peek(self):
+        """The next character after whitespace, "" at the end of the input"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.more():
+                return ""
+
+    def string(self):
+        while True:
+            try:
+                value, self.pos = scanstring(self.text, self.pos + 1, True)
+                return value
+            except json.JSONDecodeError as e:
+                # Cut off by the end of the chunk (possibly mid-escape), or really invalid
+                if not e.msg.startswith("Unterminated") and e.pos < len(self.text) - 6:
+                    raise self.error(e.msg, e.pos)
+                if len(self.text) - self.pos > MAX_TOKEN_CHARS:
+                    raise IngestError(f"A text field is longer than {MAX_ANSWER_CHARS:,} characters")
+                if not self.more():
+                    raise self.error(e.msg, e.pos)
+
+    def number(self):
+        while True:
+            match = _NUMBER.match(self.text, self.pos)
+            # Two characters of lookahead, so "1." or "1e" at the end of a chunk isn't taken for "1"
+            if match and (match.end() + 2 < len(self.text) or self.eof):
+                break
+            if len(self.text) - self.pos > 64:
+                raise self.error("Invalid number")
+            if not self.more():
+                if match:
+                    break
+                raise self.error("Invalid number")
+        self.pos = match.end()
+        number = match.group()
+        return float(number) if any(c in number for c in ".eE") else int(number)
+
+    def literal(self):
+        word, value = _LITERALS[self.text[self.pos]]
+        while len(self.text) - self.pos < len(word) and self.more():
+            pass
+        if not self.text.startswith(word, self.pos):
+            raise self.error("Expecting value")
+        self.pos += len(word)
+        return value
+
+    def take(self, char):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+
+def iter_events(texts):
+    """ijson-style (event, value) pairs for the JSON document in an iterable of text chunks"""
+    buffer = _Buffer(texts)
+    stack = []         # "{" or "[" for each open container
+    expect = "value"   # value | value_or_end | key | key_or_end | after_value
+    while True:
+        char = buffer.peek()
+        if expect in ("value", "value_or_end"):
+            if char == "]" and expect == "value_or_end":
+                buffer.pos += 1
+                stack.pop()
+                yield "end_array", None
+                expect = "after_value"
+            elif char and char in "{[":
+                buffer.pos += 1
+                stack.append(char)
+                if len(stack) > MAX_DEPTH:
+                    raise IngestError(f"The stories are nested more than {MAX_DEPTH} levels deep")
+                yield ("start_map", None) if char == "{" else ("start_array", None)
+                expect = "key_or_end" if char == "{" else "value_or_end"
+            elif char == '"':
+                yield "string", buffer.string()
+                expect = "after_value"
+            elif char and char in "-0123456789":
+                yield "number", buffer.number()
+                expect = "after_value"
+            elif char and char in _LITERALS:
+                value = buffer.literal()
+                yield ("null" if value is None else "boolean"), value
+                expect = "after_value"
+            else:
+                raise buffer.error("Expecting value")
+        elif expect in ("key", "key_or_end"):
+            if char == "}" and expect == "key_or_end":
+                buffer.pos += 1
+                stack.pop()
+                yield "end_map", None
+                expect = "after_value"
+            elif char == '"':
+                key = buffer.string()
+                buffer.take(":")
+                yield "map_key", key
+                expect = "value"
+            else:
+                raise buffer.error("Expecting property name enclosed in double quotes")
+        else:
+            if not stack:
+                if char:
+                    raise buffer.error("Extra data")
+                return
+            if char == ",":
+                buffer.pos += 1
+                expect = "key" if stack[-1] == "{" else "value"
+            elif char == _CLOSERS[stack[-1]]:
+                buffer.pos += 1
+                yield ("end_map" if stack.pop() == "{" else "end_array"), None
+            else:
+                raise buffer.error("Expecting ',' delimiter")
+
+
+# ============================================================================
+# STORIES
+# ============================================================================
+def _check(condition, message):
+    if not condition:
+        raise IngestError(message)
+
+
+def validate_session(session_id, session):
+    """Shape and size checks for one session: {"title", "questions": {question: answer}}"""
+    _check(isinstance(session, dict), f"Session {session_id} is not an object")
+    title = session.get("title", "")
+    _check(isinstance(title, str) and len(title) <= MAX_TITLE_CHARS, f"Session {session_id} has an invalid title")
+    questions = session.get("questions", {})
+    _check(isinstance(questions, dict), f"Session {session_id} questions are not an object")
+    for question, answer_data in questions.items():
+        _check(len(question) <= MAX_QUESTION_CHARS, f"A question in session {session_id} is too long")
+        if isinstance(answer_data, dict):
+            answer = answer_data.get("answer", "")
+            _check(isinstance(answer, str), f"An answer in session {session_id} is not text")
+            _check(isinstance(answer_data.get("timestamp", ""), str), f"An answer in session {session_id} has a bad timestamp")
+        else:
+            _check(isinstance(answer_data, str), f"An answer in session {session_id} is not text")
+            answer = answer_data
+        _check(len(answer) <= MAX_ANSWER_CHARS, f"An answer in session {session_id} is too long")
+
+
+def build(events, counts=None):
+    """The JSON object the events describe, checking story and session limits as it grows
+
+    counts, if given, is filled with {"sessions", "stories"}.
+    """
+    counts = {"sessions": 0, "stories": 0} if counts is None else counts
+    counts.update(sessions=0, stories=0)
+    values = 0
+    root = None
+    containers = []   # open containers, outermost first
+    keys = []         # the key each open map is filling (None for arrays)
+    for event, value in events:
+        if event == "map_key":
+            keys[-1] = value
+            if keys[0] in STORY_CONTAINERS:
+                if len(keys) == 2:
+                    counts["sessions"] += 1
+                    _check(counts["sessions"] <= MAX_SESSIONS, f"More than {MAX_SESSIONS} sessions")
+                elif len(keys) == 4 and keys[2] == "questions":
+                    counts["stories"] += 1
+                    _check(counts["stories"] <= MAX_STORIES, f"More than {MAX_STORIES:,} stories")
+            continue
+        if event in ("end_map", "end_array"):
+            value = containers.pop()
+            keys.pop()
+            if len(keys) == 2 and keys[0] in STORY_CONTAINERS:
+                validate_session(keys[1], value)
+            continue
+
+        values += 1
+        _check(values <= MAX_VALUES, f"The stories have more than {MAX_VALUES:,} fields")
+        if event == "start_map":
+            value = {}
+        elif event == "start_array":
+            value = []
+        if not containers:
+            _check(isinstance(value, dict), "Expected a JSON object of stories")
+            root = value
+        elif isinstance(containers[-1], list):
+            containers[-1].append(value)
+        else:
+            containers[-1][keys[-1]] = value
+            if len(keys) == 1 and keys[0] in STORY_CONTAINERS:
+                _check(isinstance(value, dict), f'"{keys[0]}" is not an object of sessions')
+            elif len(keys) == 2 and keys[0] in STORY_CONTAINERS and not isinstance(value, (dict, list)):
+                validate_session(keys[1], value)
+        if event in ("start_map", "start_array"):
+            containers.append(value)
+            keys.append(None)
+    _check(root is not None, "No stories found")
+    return root
+
+
+def _parse(chunks, source):
+    counts = {}
+    with tracing.span("ingest.parse", source=source) as span:
+        result = build(iter_events(_text(chunks)), counts)
+        span.set(**counts)
+    return result
+
+
+def load_stories(stream, max_bytes=MAX_BYTES):
+    """stories_data from a JSON file object, binary or text (e.g. an uploaded file)"""
+    return _parse(_read_chunks(stream, max_bytes), "file")
+
+
+def decode_base64(encoded, max_bytes=MAX_BYTES):
+    """stories_data from a legacy ?data= link: standard base64 of the JSON"""
+    return _parse(_base64_chunks(encoded, max_bytes), "link")
+
+
+def decode_compressed(token, max_bytes=MAX_BYTES):
+    """The JSON object in a ?sync= token: URL-safe base64 of zlib-compressed JSON"""
+    return _parse(_inflate(_base64_chunks(token, max_bytes, urlsafe=True), max_bytes), "sync")
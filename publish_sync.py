@@ -0,0 +1,338 @@
+# publish_sync.py - REVISIONED SYNC FROM THE INTERVIEW APP TO THE PUBLISHER
+#
+# The interview app (deepseek.py) hands a biography to the publisher
+# (biography_publisher.py) in the link's ?sync= parameter. The first
+# publish carries every answer; later ones carry only the answers whose
+# revision changed since the last publish, plus the ones removed:
+#
+#   full:  {"v": 2, "user", "revision", "stories": {...}}
+#   delta: {"v": 2, "user", "base", "fallback_bases": [...], "revision",
+#           "changed": {...}, "removed": [[session, question id]]}
+#
+# Version 2 keys questions by id (question_catalog.py); the publisher still
+# reads version 1 links, which key them by wording.
+#
+# An answer's revision is the timestamp save_response writes with it (a
+# hash of the text for old answers without one), and a biography's
+# revision is a hash of all answer revisions and chapter titles. The
+# interview app remembers what it last sent next to the user's data file;
+# the publisher keeps the snapshots it has received, applies a delta to
+# its base, validates only the changed answers, and checks the result
+# hashes to the promised revision:
+#
+#   user_data/ab/cd/<user key>.published.json       (interview app)
+#   publisher_snapshots/<user key>/<revision>.json  (publisher)
+#
+# The interview app never learns whether a link was opened, so it keeps
+# the last BASES_KEPT revisions it sent. A delta carries every answer that
+# differs from any of them and names them all; the publisher applies it to
+# the newest one it has. If it has none (another server, pruned, or no
+# link was ever opened) it raises MissingBase and the author sends a full
+# copy instead.
+import base64
+import hashlib
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+
+import ingest
+import tracing
+import user_registry
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+PROTOCOL_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+PUBLISHER_URL = os.environ.get("PUBLISHER_URL", "https://deeperbiographer-dny9n2j6sflcsppshrtrmu.streamlit.app/")
+SNAPSHOT_DIR = os.environ.get("PUBLISHER_SNAPSHOT_DIR", "publisher_snapshots")
+SNAPSHOTS_KEPT = 5                # per user; older ones can no longer be a delta's base
+SNAPSHOT_MAX_BYTES = int(os.environ.get("PUBLISHER_SNAPSHOT_MAX_BYTES", 1024 * 1024 * 1024))  # all users; oldest go first
+BASES_KEPT = 3                    # sent revisions a delta can still apply to
+REVISION_PATTERN = re.compile(r"[0-9a-f]{20}")   # what revision_of produces; revisions name snapshot files
+
+
+class SyncError(ingest.IngestError):
+    """A sync payload that can't be decoded, validated or applied"""
+
+
+class MissingBase(SyncError):
+    """A delta against a snapshot this publisher doesn't have"""
+
+
+# ============================================================================
+# REVISIONS
+# ============================================================================
+def answer_revision(answer_data):
+    """The save timestamp, or a hash of the text for answers saved without one"""
+    if isinstance(answer_data, dict) and answer_data.get("timestamp"):
+        return answer_data["timestamp"]
+    answer = answer_data.get("answer", "") if isinstance(answer_data, dict) else str(answer_data)
+    return "sha256:" + hashlib.sha256(answer.encode("utf-8")).hexdigest()[:16]
+
+
+def answer_revisions(stories):
+    """{session id: {"title", "answers": {question: revision}}}"""
+    return {
+        str(session_id): {
+            "title": session.get("title", ""),
+            "answers": {question: answer_revision(data) for question, data in session.get("questions", {}).items()}
+        }
+        for session_id, session in stories.items()
+    }
+
+
+def revision_of(revisions):
+    return hashlib.sha256(json.dumps(revisions, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+
+
+# ============================================================================
+# INTERVIEW APP SIDE
+# ============================================================================
+def _published_path(user_id, create=False):
+    """<data file>.published.json, next to whichever file the registry gave the user"""
+    path = user_registry.resolve(user_id, create=create)
+    return path[:-len(".json")] + ".published.json" if path else None
+
+
+def load_published(user_id):
+    """What was last sent to the publisher for this user, or None"""
+    path = _published_path(user_id)
+    if path is None:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_published(user_id, published):
+    path = _published_path(user_id, create=True)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(published, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Error saving publish state for {user_id}: {e}")
+
+
+def _bases(published):
+    """The sent revisions a delta may apply to, newest first"""
+    return [published] + published.get("earlier", [])[:BASES_KEPT - 1]
+
+
+def build_payload(user_id, stories, published=None):
+    """Full payload, or a delta against any of the bases in `published` (as returned by load_published)"""
+    revisions = answer_revisions(stories)
+    payload = {"v": PROTOCOL_VERSION, "user": user_id, "revision": revision_of(revisions),
+               "export_date": datetime.now().isoformat()}
+    if not published:
+        payload["stories"] = stories
+        return payload, revisions
+
+    bases = _bases(published)
+    changed = {}
+    removed = set()
+    for session_id, session in revisions.items():
+        befores = [base["answers"].get(session_id, {"title": None, "answers": {}}) for base in bases]
+        questions = {question: stories[session_id]["questions"][question]
+                     for question, revision in session["answers"].items()
+                     if any(before["answers"].get(question) != revision for before in befores)}
+        if questions or any(session["title"] != before["title"] for before in befores):
+            changed[session_id] = {"title": session["title"], "questions": questions}
+        removed.update((session_id, question) for before in befores for question in before["answers"]
+                       if question not in session["answers"])
+    for base in bases:
+        for session_id, before in base["answers"].items():
+            if session_id not in revisions:
+                removed.update((session_id, question) for question in before["answers"])
+
+    payload.update(base=published["revision"], fallback_bases=[base["revision"] for base in bases[1:]],
+                   changed=changed, removed=[list(entry) for entry in sorted(removed)])
+    return payload, revisions
+
+
+def prepare_publish(user_id, stories, full=False):
+    """Link that hands the biography to the publisher, recording it as the newest base for deltas"""
+    previous = load_published(user_id)
+    published = None if full else previous
+    with tracing.span("publish.prepare", user=tracing.hash_user(user_id)) as span:
+        payload, revisions = build_payload(user_id, stories, published)
+        if published and published["revision"] == payload["revision"]:
+            # Nothing changed: the link already handed over carries the same revision
+            token = published["token"]
+        else:
+            token = encode(payload)
+            # Earlier bases stay usable: this link may never be opened
+            earlier = [{"revision": base["revision"], "answers": base["answers"]}
+                       for base in (_bases(previous) if previous else [])][:BASES_KEPT - 1]
+            _save_published(user_id, {"revision": payload["revision"], "answers": revisions, "token": token,
+                                      "sent": payload["export_date"], "earlier": earlier})
+        span.set(mode="delta" if "base" in payload else "full", url_bytes=len(token),
+                 changed=sum(len(s["questions"]) for s in payload.get("changed", {}).values()))
+    return f"{PUBLISHER_URL}?sync={token}", payload["revision"]
+
+
+def current_revision(stories):
+    return revision_of(answer_revisions(stories))
+
+
+def encode(payload):
+    """Compact, compressed, URL-safe"""
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(zlib.compress(raw, 9)).decode("ascii").rstrip("=")
+
+
+# ============================================================================
+# PUBLISHER SIDE
+# ============================================================================
+def decode(token):
+    """The payload of a ?sync= token, parsed and size-checked as it is decompressed"""
+    try:
+        payload = ingest.decode_compressed(token)
+    except ingest.IngestError as e:
+        raise SyncError(f"Unreadable publish link ({e})")
+    if payload.get("v") not in READABLE_VERSIONS:
+        raise SyncError("This publish link was made by a different version of the interview app")
+    if not isinstance(payload.get("user"), str) or not isinstance(payload.get("revision"), str):
+        raise SyncError("Publish link is missing the user or revision")
+    _check_revision(payload["revision"])
+    if "base" in payload:
+        _check_revision(payload["base"])
+        fallbacks = payload.get("fallback_bases", [])
+        _check(isinstance(fallbacks, list) and len(fallbacks) < SNAPSHOTS_KEPT, "Publish link has malformed bases")
+        for revision in fallbacks:
+            _check_revision(revision)
+    return payload
+
+
+def _check(condition, message):
+    if not condition:
+        raise SyncError(message)
+
+
+def _check_revision(revision):
+    """Revisions name snapshot files, so nothing but a revision digest may reach the disk"""
+    _check(isinstance(revision, str) and REVISION_PATTERN.fullmatch(revision), "Publish link has a malformed revision")
+
+
+def _validate_session(session_id, session):
+    """ingest's shape and size checks, for the answers a payload carries"""
+    try:
+        ingest.validate_session(session_id, session)
+    except ingest.IngestError as e:
+        raise SyncError(str(e))
+
+
+def _snapshot_dir(user_id):
+    return os.path.join(SNAPSHOT_DIR, user_registry.user_key(user_id))
+
+
+def load_snapshot(user_id, revision):
+    _check_revision(revision)
+    try:
+        with open(os.path.join(_snapshot_dir(user_id), f"{revision}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_snapshot(user_id, revision, stories):
+    """Write atomically, then keep only the newest SNAPSHOTS_KEPT for this user and SNAPSHOT_MAX_BYTES overall"""
+    folder = _snapshot_dir(user_id)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{revision}.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(stories, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+
+    with os.scandir(folder) as entries:
+        snapshots = sorted((e for e in entries if e.name.endswith(".json")), key=lambda e: e.stat().st_mtime, reverse=True)
+    for old in snapshots[SNAPSHOTS_KEPT:]:
+        try:
+            os.remove(old.path)
+        except OSError:
+            pass
+    _evict_snapshots(path)
+
+
+def _evict_snapshots(keep):
+    """Delete the oldest snapshots of any user until all of them fit in SNAPSHOT_MAX_BYTES"""
+    snapshots = []
+    try:
+        with os.scandir(SNAPSHOT_DIR) as users:
+            for user in users:
+                if user.is_dir():
+                    with os.scandir(user.path) as entries:
+                        snapshots += [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries if e.name.endswith(".json")]
+    except OSError as e:
+        print(f"Error checking publisher snapshot space: {e}")
+        return
+    total = sum(size for _, size, _ in snapshots)
+    for _, size, path in sorted(snapshots):
+        if total <= SNAPSHOT_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            os.rmdir(os.path.dirname(path))   # only succeeds once the user has no snapshots left
+        except OSError:
+            pass
+
+
+def apply(payload):
+    """The full stories_data the payload stands for; raises SyncError / MissingBase"""
+    user_id = payload["user"]
+    stories_data = {"user": user_id, "export_date": payload.get("export_date", "")}
+    with tracing.span("publish.apply", user=tracing.hash_user(user_id), mode="delta" if "base" in payload else "full") as span:
+        # Already received (the page was reloaded, or nothing changed): nothing to re-validate
+        stories = load_snapshot(user_id, payload["revision"])
+        if stories is not None:
+            span.set(snapshot="reused")
+            stories_data["stories"] = stories
+            return stories_data
+
+        if "base" in payload:
+            for base in [payload["base"]] + payload.get("fallback_bases", []):
+                stories = load_snapshot(user_id, base)
+                if stories is not None:
+                    break
+            else:
+                raise MissingBase("This publisher doesn't have your previous publish")
+            changed = payload.get("changed", {})
+            removed = payload.get("removed", [])
+            _check(isinstance(changed, dict) and isinstance(removed, list), "Malformed changes in publish link")
+            for session_id, session in changed.items():
+                _validate_session(session_id, session)
+                target = stories.setdefault(session_id, {"title": session.get("title", ""), "questions": {}})
+                target["title"] = session.get("title", target.get("title", ""))
+                target["questions"].update(session.get("questions", {}))
+            for entry in removed:
+                _check(isinstance(entry, list) and len(entry) == 2 and all(isinstance(part, str) for part in entry),
+                       "Malformed removal in publish link")
+                session_id, question = entry
+                session = stories.get(session_id)
+                if session:
+                    session["questions"].pop(question, None)
+                    if not session["questions"]:
+                        del stories[session_id]
+            span.set(changed=sum(len(s.get("questions", {})) for s in changed.values()), removed=len(removed))
+        else:
+            stories = payload.get("stories")
+            _check(isinstance(stories, dict), "Publish link has no stories")
+            for session_id, session in stories.items():
+                _validate_session(session_id, session)
+            span.set(changed=sum(len(s.get("questions", {})) for s in stories.values()))
+
+        if revision_of(answer_revisions(stories)) != payload["revision"]:
+            raise SyncError("Your stories didn't arrive intact; please publish again")
+        _save_snapshot(user_id, payload["revision"], stories)
+
+    stories_data["stories"] = stories
+    return stories_data
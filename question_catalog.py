@@ -0,0 +1,83 @@
+# question_catalog.py - THE INTERVIEW'S SESSIONS AND QUESTIONS, WITH STABLE IDS
+#
+# Answers are stored, synced to the publisher and keyed in widgets by a
+# short question id ("s1q3"), not by the question's wording, so they are
+# smaller to store and send and the keys are the same on every server and
+# after every restart. Both apps read the questions from here: the
+# interview app asks them, the publisher turns ids back into wording.
+#
+# An id belongs to its question for good. Reword a question in place and
+# its answers follow it; give a new question the next unused number in its
+# session; never reuse the id of a removed question.
+#
+#   question_catalog.question_text("s1q1")                      # "What is your earliest memory?"
+#   question_catalog.question_id("What is your earliest memory?")   # "s1q1" (data saved before ids)
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+SESSIONS = [
+    {
+        "id": 1,
+        "title": "Childhood",
+        "guidance": "Welcome to Session 1: Childhood—this is where we lay the foundation of your story. Professional biographies thrive on specific, sensory-rich memories. I'm looking for the kind of details that transport readers: not just what happened, but how it felt, smelled, sounded. The 'insignificant' moments often reveal the most. Take your time—we're mining for gold here.",
+        "questions": [
+            {"id": "s1q1", "text": "What is your earliest memory?"},
+            {"id": "s1q2", "text": "Can you describe your family home growing up?"},
+            {"id": "s1q3", "text": "Who were the most influential people in your early years?"},
+            {"id": "s1q4", "text": "What was school like for you?"},
+            {"id": "s1q5", "text": "Were there any favourite games or hobbies?"},
+            {"id": "s1q6", "text": "Is there a moment from childhood that shaped who you are?"},
+            {"id": "s1q7", "text": "If you could give your younger self some advice, what would it be?"}
+        ],
+        "completed": False,
+        "word_target": 800
+    },
+    {
+        "id": 2,
+        "title": "Family & Relationships",
+        "guidance": "Welcome to Session 2: Family & Relationships—this is where we explore the people who shaped you. Family stories are complex ecosystems. We're not seeking perfect narratives, but authentic ones. The richest material often lives in the tensions, the unsaid things, the small rituals. My job is to help you articulate what usually goes unspoken. Think in scenes rather than summaries.",
+        "questions": [
+            {"id": "s2q1", "text": "How would you describe your relationship with your parents?"},
+            {"id": "s2q2", "text": "Are there any family traditions you remember fondly?"},
+            {"id": "s2q3", "text": "What was your relationship like with siblings or close relatives?"},
+            {"id": "s2q4", "text": "Can you share a story about a family celebration or challenge?"},
+            {"id": "s2q5", "text": "How did your family shape your values?"}
+        ],
+        "completed": False,
+        "word_target": 700
+    },
+    {
+        "id": 3,
+        "title": "Education & Growing Up",
+        "guidance": "Welcome to Session 3: Education & Growing Up—this is where we explore how you learned to navigate the world. Education isn't just about schools—it's about how you learned to navigate the world. We're interested in the hidden curriculum: what you learned about yourself, about systems, about survival and growth. Think beyond grades to transformation.",
+        "questions": [
+            {"id": "s3q1", "text": "What were your favourite subjects at school?"},
+            {"id": "s3q2", "text": "Did you have any memorable teachers or mentors?"},
+            {"id": "s3q3", "text": "How did you feel about exams and studying?"},
+            {"id": "s3q4", "text": "Were there any big turning points in your education?"},
+            {"id": "s3q5", "text": "Did you pursue further education or training?"},
+            {"id": "s3q6", "text": "What advice would you give about learning?"}
+        ],
+        "completed": False,
+        "word_target": 600
+    }
+]
+
+_TEXT_BY_ID = {question["id"]: question["text"] for session in SESSIONS for question in session["questions"]}
+_ID_BY_TEXT = {text: question_id for question_id, text in _TEXT_BY_ID.items()}
+
+
+# ============================================================================
+# LOOKUPS
+# ============================================================================
+def question_text(key):
+    """Wording of a question id; anything else (wording saved before ids, or a retired id) as is"""
+    return _TEXT_BY_ID.get(key, key)
+
+
+def question_id(key):
+    """Id of a question given by id or by its wording; wording not in the catalog is kept as is"""
+    if key in _TEXT_BY_ID:
+        return key
+    return _ID_BY_TEXT.get(key, key)
@@ -0,0 +1,186 @@
+# rerun_profiler.py - PER-SECTION TIMINGS FOR EACH STREAMLIT RERUN
+#
+# Opt-in: add ?profile=1 to the app URL or set DEEPER_PROFILE=1.
+# The script calls profiler.section("...") at every numbered SECTION banner;
+# timings are kept per browser session in a rolling window and shown in a
+# debug panel at the bottom of the page. Fragment functions are wrapped in
+# profiler.timed("..."), so their own reruns, which skip the sections, are
+# measured too; the panel shows them on the next full run.
+import functools
+import os
+import time
+from collections import deque
+
+import streamlit as st
+
+ROLLING_WINDOW = 200  # samples kept per section
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+STATE_KEY = "_rerun_profiler"
+
+
+def is_enabled():
+    """Profiling is on via ?profile=1 or the DEEPER_PROFILE env var"""
+    if os.environ.get("DEEPER_PROFILE", "") not in ("", "0"):
+        return True
+    return st.query_params.get("profile", "") not in ("", "0")
+
+
+# ============================================================================
+# PROFILER
+# ============================================================================
+class _DisabledProfiler:
+    """Stand-in used when profiling is off so the markers cost nothing"""
+
+    def section(self, name):
+        pass
+
+    def timed(self, name):
+        return lambda func: func
+
+    def finish(self):
+        pass
+
+    def render_panel(self):
+        pass
+
+
+class RerunProfiler:
+    """Times consecutive script sections; history lives in st.session_state"""
+
+    def __init__(self, state):
+        if STATE_KEY not in state:
+            state[STATE_KEY] = {
+                "sections": {},            # name -> deque of ms
+                "run_totals": deque(maxlen=ROLLING_WINDOW),
+                "runs": 0,
+                "interaction_reruns": 0,
+                "interactions": deque(maxlen=50),  # reruns per finished interaction
+                "open_section": None,      # (name, start) of a run cut short by st.rerun()
+            }
+        self.data = state[STATE_KEY]
+        self.current = None
+        self.current_start = None
+        self.run_start = time.perf_counter()
+
+        # A section still open means the last run ended in st.rerun(), so
+        # this run belongs to the same user interaction.
+        open_section = self.data["open_section"]
+        if open_section is not None:
+            name, started = open_section
+            self._record(name, (self.run_start - started) * 1000)
+            self.data["interaction_reruns"] += 1
+        else:
+            if self.data["interaction_reruns"]:
+                self.data["interactions"].append(self.data["interaction_reruns"])
+            self.data["interaction_reruns"] = 1
+        self.data["runs"] += 1
+
+    def _record(self, name, elapsed_ms):
+        history = self.data["sections"].get(name)
+        if history is None:
+            history = self.data["sections"][name] = deque(maxlen=ROLLING_WINDOW)
+        history.append(elapsed_ms)
+
+    def section(self, name):
+        """End the running section and start timing the next one"""
+        now = time.perf_counter()
+        if self.current is not None:
+            self._record(self.current, (now - self.current_start) * 1000)
+        self.current = name
+        self.current_start = now
+        self.data["open_section"] = (name, now)
+
+    def timed(self, name):
+        """Decorator recording each call of a fragment function under its own name"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._record(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def finish(self):
+        """Close the last section; call once when the script completes normally"""
+        now = time.perf_counter()
+        if self.current is not None:
+            self._record(self.current, (now - self.current_start) * 1000)
+            self.current = None
+        self.data["run_totals"].append((now - self.run_start) * 1000)
+        self.data["open_section"] = None
+
+    # ========================================================================
+    # STATISTICS
+    # ========================================================================
+    @staticmethod
+    def _percentile(sorted_values, fraction):
+        return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+    def section_stats(self):
+        """Per-section summary rows, slowest p95 first"""
+        rows = []
+        for name, samples in self.data["sections"].items():
+            ordered = sorted(samples)
+            rows.append({
+                "section": name,
+                "samples": len(ordered),
+                "mean_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(self._percentile(ordered, 0.50), 2),
+                "p95_ms": round(self._percentile(ordered, 0.95), 2),
+                "max_ms": round(ordered[-1], 2)
+            })
+        return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+    def histogram(self, name):
+        """Bucketed counts for one section's rolling window"""
+        # Numbered so the chart keeps bucket order when it sorts the axis
+        labels = [f"{i:02d} ≤{b}ms" for i, b in enumerate(HISTOGRAM_BUCKETS_MS)]
+        labels.append(f"{len(HISTOGRAM_BUCKETS_MS):02d} >{HISTOGRAM_BUCKETS_MS[-1]}ms")
+        counts = [0] * len(labels)
+        for value in self.data["sections"].get(name, []):
+            for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return dict(zip(labels, counts))
+
+    # ========================================================================
+    # DEBUG PANEL
+    # ========================================================================
+    def render_panel(self):
+        """Show slowest sections, a histogram and rerun counts per interaction"""
+        stats = self.section_stats()
+        run_totals = list(self.data["run_totals"])
+
+        with st.expander("🐢 Rerun Profiler", expanded=True):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Script runs (this session)", self.data["runs"])
+            with col2:
+                st.metric("Runs for this interaction", self.data["interaction_reruns"])
+            with col3:
+                if run_totals:
+                    st.metric("Last full run", f"{run_totals[-1]:.1f} ms")
+
+            if self.data["interactions"]:
+                recent = list(self.data["interactions"])[-20:]
+                st.caption("Runs per recent interaction: " + ", ".join(str(n) for n in recent))
+
+            st.write("**Slowest sections (rolling window)**")
+            st.dataframe(stats, use_container_width=True)
+
+            if stats:
+                chosen = st.selectbox("Histogram for section:", [row["section"] for row in stats], key="_profiler_section")
+                st.bar_chart(self.histogram(chosen))
+
+
+def start(state):
+    """Create the profiler for this run, or a no-op one when profiling is off"""
+    if not is_enabled():
+        return _DisabledProfiler()
+    return RerunProfiler(state)
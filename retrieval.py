@@ -0,0 +1,217 @@
+# retrieval.py - RELATED EARLIER ANSWERS FOR THE BIOGRAPHER PROMPT (LOCAL BM25)
+#
+# Every saved answer is split into short passages and kept in an in-memory
+# BM25 index per user. When the biographer replies, the passages most
+# related to the current topic and answer (from other topics) are added to
+# the system prompt, within a small token budget, so it can connect
+# memories across sessions without sending the whole biography.
+#
+# Indexes live in this process, shared by all browser sessions; they are
+# built from the user's data on load and updated on every save.
+import heapq
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import question_catalog
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+PASSAGE_WORDS = 80          # words per passage
+TOP_K = 3
+TOKEN_BUDGET = 300          # prompt tokens the related passages may use
+MAX_USERS_IN_MEMORY = 500   # least recently used indexes are dropped past this
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+NORM_DRIFT = 0.01           # reweight every posting once the average passage length moves by this fraction
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being but by can could did do
+does doing down during each few for from further had has have having he her here hers him his how i if in
+into is it its just me more most my no nor not now of off on once only or other our out over own same she
+so some such than that the their them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your
+""".split())
+
+_TOKEN_RE = re.compile(r"\w+")
+
+_indexes = OrderedDict()   # user id -> PassageIndex
+_indexes_lock = threading.Lock()
+
+
+def tokenize(text):
+    """Lower-cased word tokens without stopwords"""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def estimate_tokens(text):
+    """Rough OpenAI token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def split_passages(answer):
+    """Consecutive PASSAGE_WORDS-word windows of an answer"""
+    words = answer.split()
+    return [" ".join(words[i:i + PASSAGE_WORDS]) for i in range(0, len(words), PASSAGE_WORDS)]
+
+
+# ============================================================================
+# BM25 INDEX
+# ============================================================================
+class PassageIndex:
+    """Inverted index over one user's answer passages.
+
+    Postings hold each passage's BM25 term weight, tf / (tf + length norm),
+    worked out when the passage is indexed, so a query only multiplies by
+    idf for the passages that contain its terms. The norms depend on the
+    average passage length; they are redone when it drifts by NORM_DRIFT,
+    so scores stay within about that fraction of exact BM25.
+    """
+
+    def __init__(self):
+        self.postings = {}      # term -> {passage id: tf / (tf + norm)}
+        self.passages = {}      # passage id -> (session_id, question, text, length)
+        self.by_answer = {}     # (session_id, question) -> [passage ids]
+        self.norm_average = None  # average length the posting weights were computed with
+        self.total_length = 0
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    def _weigh(self, passage_id, terms, average):
+        norm = K1 * (1 - B + B * len(terms) / average)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[passage_id] = tf / (tf + norm)
+
+    def _refresh_weights(self):
+        """Reweight every posting if the average length has drifted; O(1) amortised per change"""
+        if not self.passages:
+            self.norm_average = None
+            return
+        average = self.total_length / len(self.passages)
+        if self.norm_average is not None and abs(average - self.norm_average) <= NORM_DRIFT * self.norm_average:
+            return
+        self.norm_average = average
+        for passage_id, passage in self.passages.items():
+            self._weigh(passage_id, tokenize(passage[2]), average)
+
+    def _add(self, session_id, question, text):
+        terms = tokenize(text)
+        if not terms:
+            return None
+        passage_id = self.next_id
+        self.next_id += 1
+        self.passages[passage_id] = (session_id, question, text, len(terms))
+        self.total_length += len(terms)
+        self._weigh(passage_id, terms, self.norm_average or len(terms))
+        self._refresh_weights()
+        return passage_id
+
+    def _remove(self, passage_id):
+        session_id, question, text, length = self.passages.pop(passage_id)
+        self.total_length -= length
+        for term in set(tokenize(text)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(passage_id, None)
+                if not posting:
+                    del self.postings[term]
+        self._refresh_weights()
+
+    def update_answer(self, session_id, question, answer):
+        """Replace the passages of one answer (an empty answer removes them)"""
+        with self.lock:
+            for passage_id in self.by_answer.pop((session_id, question), []):
+                self._remove(passage_id)
+            ids = [self._add(session_id, question, text) for text in split_passages(answer)]
+            ids = [i for i in ids if i is not None]
+            if ids:
+                self.by_answer[(session_id, question)] = ids
+
+    def search(self, query, k=TOP_K, exclude=None):
+        """Top-k (score, session_id, question, text), skipping passages of the `exclude` answer"""
+        with self.lock:
+            if not self.passages:
+                return []
+            n = len(self.passages)
+
+            # Only passages holding a query term get a score
+            scores = {}
+            score_of = scores.get
+            for term in set(tokenize(query)):
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5)) * (K1 + 1)
+                for passage_id, weight in posting.items():
+                    scores[passage_id] = score_of(passage_id, 0.0) + idf * weight
+            if exclude:
+                for passage_id in self.by_answer.get(exclude, ()):
+                    scores.pop(passage_id, None)
+
+            best = heapq.nlargest(k, ((score, passage_id) for passage_id, score in scores.items() if score > 0))
+            return [(score, *self.passages[passage_id][:3]) for score, passage_id in best]
+
+
+# ============================================================================
+# PER-USER INDEXES
+# ============================================================================
+def rebuild(user_id, responses):
+    """Index all of a user's answers from scratch (on data load and after clearing); questions keyed by id"""
+    index = PassageIndex()
+    for session_id, session_data in responses.items():
+        for question, answer_data in session_data.get("questions", {}).items():
+            index.update_answer(int(session_id), question_catalog.question_text(question), answer_data["answer"])
+    with _indexes_lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > MAX_USERS_IN_MEMORY:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _get(user_id):
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is not None:
+            _indexes.move_to_end(user_id)
+        return index
+
+
+def has_index(user_id):
+    """Whether the user's index is in memory"""
+    with _indexes_lock:
+        return user_id in _indexes
+
+
+def index_answer(user_id, session_id, question, answer):
+    """Incremental update after save_response; a no-op until the user's index is built"""
+    index = _get(user_id)
+    if index is not None:
+        index.update_answer(session_id, question, answer)
+
+
+def related_passages(user_id, query, exclude=None, k=TOP_K, token_budget=TOKEN_BUDGET):
+    """Best passages from other answers that fit in token_budget: [{session_id, question, text}]"""
+    index = _get(user_id)
+    if index is None or not query.strip():
+        return []
+
+    with tracing.span("retrieval.query", user=tracing.hash_user(user_id), passages=len(index.passages)) as query_span:
+        chosen = []
+        used = 0
+        for score, session_id, question, text in index.search(query, k, exclude):
+            cost = estimate_tokens(question) + estimate_tokens(text)
+            if used + cost > token_budget:
+                continue
+            chosen.append({"session_id": session_id, "question": question, "text": text, "score": round(score, 3)})
+            used += cost
+        query_span.set(chosen=len(chosen), tokens=used)
+    return chosen
@@ -0,0 +1,174 @@
+# search_index.py - FULL-TEXT SEARCH OVER EACH AUTHOR'S ANSWERS (SQLITE FTS5)
+#
+# One row per (user, session, question), updated on every save_response and
+# rebuilt from the user's JSON file when their data is loaded, so the index
+# can always be deleted and regenerated. Queries are ranked with bm25 and
+# return highlighted snippets. Rows hold the question's wording, not its
+# id, so questions are searchable too.
+import os
+import re
+import threading
+
+import question_catalog
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SEARCH_DB = os.environ.get("SEARCH_DB", "search_index.db")
+
+MAX_HITS = 8
+SNIPPET_TOKENS = 14
+HIGHLIGHT = ("**", "**")   # Markdown bold around matched terms
+
+# bm25 column weights: user key (never matched), question, answer
+BM25_WEIGHTS = (0.0, 2.0, 1.0)
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+# ============================================================================
+# LOCAL STORE
+# ============================================================================
+def _connect():
+    """Open the search database, creating the tables on first use"""
+    global _schema_ready
+    import sqlite3
+    conn = sqlite3.connect(SEARCH_DB, timeout=5)
+    if not _schema_ready:
+        with _schema_lock:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS answers (
+                    id INTEGER PRIMARY KEY,
+                    user_key TEXT NOT NULL,
+                    session_id INTEGER NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    UNIQUE (user_key, session_id, question)
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS answers_fts USING fts5(
+                    user_key, question, answer,
+                    content='answers', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS answers_ai AFTER INSERT ON answers BEGIN
+                    INSERT INTO answers_fts (rowid, user_key, question, answer)
+                    VALUES (new.id, new.user_key, new.question, new.answer);
+                END;
+                CREATE TRIGGER IF NOT EXISTS answers_ad AFTER DELETE ON answers BEGIN
+                    INSERT INTO answers_fts (answers_fts, rowid, user_key, question, answer)
+                    VALUES ('delete', old.id, old.user_key, old.question, old.answer);
+                END;
+                CREATE TRIGGER IF NOT EXISTS answers_au AFTER UPDATE ON answers BEGIN
+                    INSERT INTO answers_fts (answers_fts, rowid, user_key, question, answer)
+                    VALUES ('delete', old.id, old.user_key, old.question, old.answer);
+                    INSERT INTO answers_fts (rowid, user_key, question, answer)
+                    VALUES (new.id, new.user_key, new.question, new.answer);
+                END;
+            """)
+            _schema_ready = True
+    return conn
+
+
+def user_key(user_id):
+    """Token that scopes FTS matches to one user (the hashed id, so it is a single term)"""
+    return "u" + tracing.hash_user(user_id)
+
+
+# ============================================================================
+# KEEPING THE INDEX CURRENT
+# ============================================================================
+def index_answer(user_id, session_id, question, answer):
+    """Add or replace one answer, or drop it once blank (as reindex_user skips blanks); called from save_response"""
+    import sqlite3
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                if not answer.strip():
+                    conn.execute(
+                        "DELETE FROM answers WHERE user_key = ? AND session_id = ? AND question = ?",
+                        (user_key(user_id), session_id, question)
+                    )
+                    return
+                conn.execute("""
+                    INSERT INTO answers (user_key, session_id, question, answer) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_key, session_id, question) DO UPDATE SET answer = excluded.answer
+                """, (user_key(user_id), session_id, question, answer))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Error indexing answer for {user_id}: {e}")
+
+
+def reindex_user(user_id, responses):
+    """Replace everything indexed for a user with their current responses (questions keyed by id)"""
+    import sqlite3
+    key = user_key(user_id)
+    rows = []
+    for session_id, session_data in responses.items():
+        for question, answer_data in session_data.get("questions", {}).items():
+            answer = answer_data["answer"]
+            if answer.strip():
+                rows.append((key, int(session_id), question_catalog.question_text(question), answer))
+
+    with tracing.span("search.reindex", user=tracing.hash_user(user_id), answers=len(rows)):
+        try:
+            conn = _connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM answers WHERE user_key = ?", (key,))
+                    conn.executemany(
+                        "INSERT INTO answers (user_key, session_id, question, answer) VALUES (?, ?, ?, ?)", rows
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error rebuilding search index for {user_id}: {e}")
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+def to_match_query(text):
+    """Turn free text into an FTS5 query: every word must appear, the last one as a prefix"""
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search(user_id, text, limit=MAX_HITS):
+    """Best-matching answers for a user: [{session_id, question, snippet, score}]"""
+    import sqlite3
+    query = to_match_query(text)
+    if not user_id or not query:
+        return []
+
+    with tracing.span("search.query", user=tracing.hash_user(user_id), terms=len(query.split())) as search_span:
+        try:
+            conn = _connect()
+            try:
+                rows = conn.execute(f"""
+                    SELECT a.session_id,
+                           a.question,
+                           snippet(answers_fts, 2, ?, ?, '…', {SNIPPET_TOKENS}),
+                           bm25(answers_fts, {', '.join(str(w) for w in BM25_WEIGHTS)}) AS score
+                    FROM answers_fts
+                    JOIN answers a ON a.id = answers_fts.rowid
+                    WHERE answers_fts MATCH ?
+                    ORDER BY score
+                    LIMIT ?
+                """, (*HIGHLIGHT, f'user_key:"{user_key(user_id)}" AND ({query})', limit)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Error searching for {user_id}: {e}")
+            return []
+        search_span.set(hits=len(rows))
+
+    return [{"session_id": session_id, "question": question, "snippet": snippet, "score": round(score, 3)}
+            for session_id, question, snippet, score in rows]
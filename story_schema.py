@@ -0,0 +1,232 @@
+# story_schema.py - TYPED, VERSIONED STORY DATA SHARED BY BOTH APPS
+#
+# Stories are stored and handed over in two JSON shapes:
+#
+#   user data file (deepseek.py):  {"schema": 2, "user_id", "responses": {"1": {"title", "questions"}}, "last_saved"}
+#   export payload (publisher):    {"schema": 2, "user", "stories": {"1": {"title", "questions"}}, "export_date"}
+#
+# where "questions" maps a question id ("s1q1", see question_catalog.py)
+# to {"answer", "timestamp"}. Data saved by older versions has no
+# "schema" (version 1): questions are keyed by their wording, and answers
+# may be bare strings. Both shapes are decoded once, where they enter an
+# app, into the slotted classes below: session ids become ints, sessions
+# are sorted, every answer is an Answer and missing timestamps are filled
+# in. A UserData keys answers by question id (migrating wording to ids), a
+# Biography by wording, ready to print. Nothing past the boundary has to
+# sniff types again:
+#
+#   biography = story_schema.as_biography(stories_data)
+#   for session in biography.sessions:
+#       for question, answer in session.answers.items():
+#           print(session.id, question, answer.text, answer.date)
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import question_catalog
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SCHEMA_VERSION = 2   # 1 (no "schema"): questions keyed by wording; 2: by question id. Bump when the JSON shape changes
+
+
+class SchemaError(ValueError):
+    """Story data that can't be decoded into the schema"""
+
+
+# ============================================================================
+# TYPES
+# ============================================================================
+@dataclass(slots=True)
+class Answer:
+    text: str
+    timestamp: str = ""   # ISO save time; "" only in interview data saved before timestamps were kept
+
+    @property
+    def date(self):
+        return self.timestamp[:10]
+
+    def to_json(self):
+        return {"answer": self.text, "timestamp": self.timestamp}
+
+
+@dataclass(slots=True)
+class Session:
+    id: int
+    title: str
+    answers: dict = field(default_factory=dict)   # question (id in UserData, wording in Biography) -> Answer, in the order answered
+
+    def stories(self):
+        """(question, Answer) for each answer that isn't blank"""
+        return [(question, answer) for question, answer in self.answers.items() if answer.text.strip()]
+
+
+@dataclass(slots=True)
+class Biography:
+    """An export payload: what the publisher and the renderers work from"""
+    user: str
+    sessions: list = field(default_factory=list)   # Session, by id
+    export_date: str = ""
+    user_profile: dict = field(default_factory=dict)
+    summary: dict = field(default_factory=dict)
+
+    @property
+    def display_name(self):
+        """Author name shown on the cover: profile name if present, else the user id"""
+        if self.user_profile and 'first_name' in self.user_profile:
+            name = f"{self.user_profile.get('first_name', '')} {self.user_profile.get('last_name', '')}".strip()
+            return name or self.user
+        return self.user
+
+    def story_count(self):
+        return sum(len(session.answers) for session in self.sessions)
+
+
+@dataclass(slots=True)
+class UserData:
+    """A user data file: the interview app's saved answers"""
+    user_id: str
+    sessions: dict = field(default_factory=dict)   # session id (int) -> Session, answers keyed by question id
+    last_saved: str = ""
+
+    def to_biography(self):
+        """The export payload for these answers (sessions without any left out)
+
+        Answers saved without a timestamp are dated to the last save, as decode_export does.
+        """
+        export_date = self.last_saved or datetime.now().isoformat()
+        sessions = [
+            Session(session.id, session.title,
+                    {question_catalog.question_text(question): Answer(answer.text, answer.timestamp or export_date)
+                     for question, answer in session.answers.items()})
+            for _, session in sorted(self.sessions.items()) if session.answers
+        ]
+        return Biography(user=self.user_id, sessions=sessions, export_date=export_date)
+
+
+# ============================================================================
+# DECODING
+# ============================================================================
+def session_id(key):
+    """Session id of a JSON key ("3") or an int; keys that aren't numbers sort first, as 0"""
+    if isinstance(key, int):
+        return key
+    return int(key) if key.isdigit() else 0
+
+
+def _answers(questions, default_timestamp, question_key):
+    """{question_key(question): Answer}; question_key turns ids into wording or wording into ids"""
+    if not isinstance(questions, dict):
+        raise SchemaError("Session questions are not an object")
+    answers = {}
+    for question, answer_data in questions.items():
+        if isinstance(answer_data, dict):
+            answer = Answer(str(answer_data.get("answer", "")), answer_data.get("timestamp") or default_timestamp)
+        else:
+            answer = Answer(str(answer_data), default_timestamp)
+        answers[question_key(question)] = answer
+    return answers
+
+
+def _sessions(sessions, default_title, default_timestamp):
+    if not isinstance(sessions, dict):
+        raise SchemaError("Sessions are not an object")
+    decoded = []
+    for key, session_data in sessions.items():
+        if not isinstance(session_data, dict):
+            raise SchemaError(f"Session {key} is not an object")
+        number = session_id(key)
+        decoded.append(Session(number, session_data.get("title") or default_title.format(key),
+                               _answers(session_data.get("questions", {}), default_timestamp, question_catalog.question_text)))
+    decoded.sort(key=lambda session: session.id)
+    return decoded
+
+
+def _check_version(data):
+    if not isinstance(data, dict):
+        raise SchemaError("Story data is not an object")
+    version = data.get("schema", 1)
+    if not isinstance(version, int) or version > SCHEMA_VERSION:
+        raise SchemaError(f"These stories were saved by a newer version (schema {version}); please update the app")
+
+
+def decode_export(data):
+    """Biography from an export payload dict, questions by their wording
+
+    Answers saved without a timestamp are dated to the export, so every
+    render of the same payload shows (and caches) the same dates.
+    """
+    _check_version(data)
+    export_date = data.get("export_date") or datetime.now().isoformat()
+    return Biography(
+        user=data.get("user", "Unknown"),
+        sessions=_sessions(data.get("stories", {}), "Chapter {}", export_date),
+        export_date=export_date,
+        user_profile=data.get("user_profile") or {},
+        summary=data.get("summary") or {},
+    )
+
+
+def as_biography(stories_data):
+    """A Biography as is, or decoded from an export payload dict"""
+    return stories_data if isinstance(stories_data, Biography) else decode_export(stories_data)
+
+
+def decode_user_data(data):
+    """UserData from a user data file, questions by id; sessions whose keys aren't numbers are skipped"""
+    _check_version(data)
+    responses = data.get("responses", {})
+    if not isinstance(responses, dict):
+        raise SchemaError("Responses are not an object")
+    sessions = {}
+    for key, session_data in responses.items():
+        if not (isinstance(key, int) or key.isdigit()) or not isinstance(session_data, dict):
+            continue
+        number = session_id(key)
+        sessions[number] = Session(number, session_data.get("title") or f"Session {number}",
+                                   _answers(session_data.get("questions", {}), "", question_catalog.question_id))
+    return UserData(user_id=data.get("user_id", "Unknown"), sessions=sessions, last_saved=data.get("last_saved", ""))
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+def encode_export(biography):
+    """The export payload dict for a Biography (what decode_export reads back)
+
+    Questions keep their wording, so a saved payload reads on its own.
+    """
+    payload = {
+        "schema": SCHEMA_VERSION,
+        "user": biography.user,
+        "stories": {
+            str(session.id): {
+                "title": session.title,
+                "questions": {question: answer.to_json() for question, answer in session.answers.items()}
+            }
+            for session in biography.sessions
+        },
+        "export_date": biography.export_date,
+    }
+    if biography.user_profile:
+        payload["user_profile"] = biography.user_profile
+    if biography.summary:
+        payload["summary"] = biography.summary
+    return payload
+
+
+def export_payload(user_id, responses, titles, export_date=None):
+    """Export payload for the interview app's responses ({session id: {"questions"}}), titled from titles
+
+    Only sessions with answers are included, in the order of titles.
+    Questions are sent as ids, which keeps publish links short.
+    """
+    stories = {}
+    for number, title in titles.items():
+        questions = responses.get(number, {}).get("questions")
+        if questions:
+            stories[str(number)] = {"title": title,
+                                    "questions": {question: answer.to_json() for question, answer
+                                                  in _answers(questions, "", question_catalog.question_id).items()}}
+    return {"schema": SCHEMA_VERSION, "user": user_id, "stories": stories,
+            "export_date": export_date or datetime.now().isoformat()}
@@ -0,0 +1,111 @@
+# submissions.py - IDEMPOTENT CHAT SUBMISSIONS
+#
+# A double Enter, a flaky connection or a rerun while the spinner is up can
+# deliver the same chat answer twice. Each submission gets an id (a hash of
+# user, session, question id, conversation turn and the whitespace-
+# normalised text) and goes through a per-user ledger:
+#
+#   pending  - a run owns it and is waiting on the biographer
+#   replied  - the reply is known but the answer may not be saved yet
+#   saved    - reply cached and answer written
+#
+# A repeat within SUBMISSION_TTL_SECONDS gets the cached reply instead of a
+# second API call and save. claim() never waits: a repeat of a pending
+# submission (from another tab) gets the pending entry back, and the app
+# polls lookup() from a fragment until the reply arrives. The turn is the
+# number of replies already in the conversation, so sending the same text
+# again once it has been answered is a new submission. Runs that fail or
+# are interrupted release their claim, so trying again really does try again.
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+SUBMISSION_TTL_SECONDS = int(os.environ.get("SUBMISSION_TTL_SECONDS", "600"))
+PENDING_POLL_SECONDS = 1.0     # how often a repeat checks whether the first run has replied
+MAX_PER_USER = 50              # newest submissions kept per user
+
+PENDING = "pending"
+REPLIED = "replied"
+SAVED = "saved"
+
+_ledger = {}   # user id -> OrderedDict(submission id -> entry)
+_lock = threading.Lock()
+
+
+def conversation_turn(conversation):
+    """Turn a new answer belongs to: the number of replies already in the conversation"""
+    return sum(1 for message in conversation if message["role"] == "assistant")
+
+
+def submission_id(user_id, session_id, question_id, turn, text):
+    """Stable id of one answer at one turn of one question's conversation"""
+    normalized = re.sub(r"\s+", " ", text).strip()
+    raw = "\x1f".join((user_id, str(session_id), question_id, str(turn), normalized))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _entries(user_id):
+    """The user's ledger with expired submissions dropped; call with _lock held"""
+    entries = _ledger.setdefault(user_id, OrderedDict())
+    cutoff = time.monotonic() - SUBMISSION_TTL_SECONDS
+    while entries:
+        oldest = next(iter(entries.values()))
+        if oldest["updated"] >= cutoff and len(entries) <= MAX_PER_USER:
+            break
+        entries.popitem(last=False)
+    return entries
+
+
+# ============================================================================
+# LEDGER
+# ============================================================================
+def claim(user_id, sid):
+    """None if the caller now owns sid; otherwise a copy of the earlier submission's entry, at once"""
+    with _lock:
+        entries = _entries(user_id)
+        entry = entries.get(sid)
+        if entry is None:
+            entries[sid] = {"state": PENDING, "user_input": None, "reply": None, "updated": time.monotonic()}
+            return None
+        tracing.event("submission.duplicate", user=tracing.hash_user(user_id), state=entry["state"])
+        return dict(entry)
+
+
+def lookup(user_id, sid):
+    """A copy of sid's entry, or None once it has been released or has expired"""
+    with _lock:
+        entry = _entries(user_id).get(sid)
+        return dict(entry) if entry is not None else None
+
+
+def record_reply(user_id, sid, user_input, reply):
+    """Cache the reply as soon as it is known, before anything that can interrupt the run"""
+    with _lock:
+        entry = _entries(user_id).get(sid)
+        if entry is not None:
+            entry.update(state=REPLIED, user_input=user_input, reply=reply, updated=time.monotonic())
+
+
+def mark_saved(user_id, sid):
+    """The answer for sid has been written to storage (only a submission with a cached reply is kept)"""
+    with _lock:
+        entry = _entries(user_id).get(sid)
+        if entry is not None and entry["state"] == REPLIED:
+            entry.update(state=SAVED, updated=time.monotonic())
+
+
+def release(user_id, sid):
+    """Drop a claim that never got a reply (API error, interrupted run); a no-op otherwise"""
+    with _lock:
+        entries = _entries(user_id)
+        entry = entries.get(sid)
+        if entry is not None and entry["state"] == PENDING:
+            del entries[sid]
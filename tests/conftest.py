@@ -0,0 +1,28 @@
+# conftest.py - SHARED PYTEST SETUP
+#
+# The modules live at the repository root, like the apps that import them.
+# Every store they write (SQLite files, user data, snapshots) is pointed at
+# the test's tmp_path, and tracing is off so no traces.jsonl is written.
+#
+#   python -m pytest -q
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ["TRACE_EXPORTER"] = "off"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """user_registry with its data tree, registry and legacy folder under tmp_path"""
+    import user_registry
+    monkeypatch.setattr(user_registry, "USER_DATA_DIR", str(tmp_path / "user_data"))
+    monkeypatch.setattr(user_registry, "REGISTRY_DB", str(tmp_path / "user_data" / "registry.db"))
+    monkeypatch.setattr(user_registry, "LEGACY_DIR", str(tmp_path / "legacy"))
+    monkeypatch.setattr(user_registry, "_schema_ready", False)
+    monkeypatch.setattr(user_registry, "_paths", {})
+    (tmp_path / "legacy").mkdir()
+    return user_registry
@@ -0,0 +1,117 @@
+import copy
+import os
+
+import pytest
+
+import publish_sync
+
+
+@pytest.fixture(autouse=True)
+def stores(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(publish_sync, "SNAPSHOT_DIR", str(tmp_path / "publisher_snapshots"))
+
+
+STORIES = {
+    "1": {"title": "Childhood", "questions": {
+        "s1q1": {"answer": "Picking apples", "timestamp": "2024-01-01T10:00:00"},
+        "s1q2": {"answer": "My grandmother", "timestamp": "2024-01-02T10:00:00"},
+    }},
+    "2": {"title": "Work", "questions": {"s2q1": "A bare answer saved before timestamps"}},
+}
+
+
+def publish(user_id, stories, full=False):
+    """The payload a publish link carries, as the publisher decodes it"""
+    url, revision = publish_sync.prepare_publish(user_id, stories, full)
+    payload = publish_sync.decode(url.split("?sync=", 1)[1])
+    assert payload["revision"] == revision
+    return payload
+
+
+def edited(stories):
+    stories = copy.deepcopy(stories)
+    stories["1"]["questions"]["s1q2"] = {"answer": "My grandfather", "timestamp": "2024-02-01T10:00:00"}
+    del stories["2"]
+    stories["3"] = {"title": "Love", "questions": {"s3q1": {"answer": "We met at a dance", "timestamp": "2024-02-02"}}}
+    return stories
+
+
+def test_full_then_delta_round_trip():
+    assert publish_sync.apply(publish("ann", STORIES))["stories"] == STORIES
+
+    changed = edited(STORIES)
+    delta = publish("ann", changed)
+    assert delta["base"] and "stories" not in delta
+    assert set(delta["changed"]) == {"1", "3"}
+    assert list(delta["changed"]["1"]["questions"]) == ["s1q2"]
+    assert delta["removed"] == [["2", "s2q1"]]
+    assert publish_sync.apply(delta)["stories"] == changed
+    # A reload of the same link reuses the snapshot
+    assert publish_sync.apply(delta)["stories"] == changed
+
+
+def test_unchanged_stories_reuse_the_link():
+    first, _ = publish_sync.prepare_publish("ann", STORIES)
+    again, _ = publish_sync.prepare_publish("ann", STORIES)
+    assert again == first
+
+
+def test_delta_applies_to_an_earlier_base_when_a_link_was_never_opened():
+    publish_sync.apply(publish("ann", STORIES))
+    unopened = edited(STORIES)
+    publish("ann", unopened)
+
+    latest = copy.deepcopy(unopened)
+    latest["1"]["title"] = "Growing up"
+    del latest["3"]
+    delta = publish("ann", latest)
+    assert len(delta["fallback_bases"]) == 1
+    assert publish_sync.apply(delta)["stories"] == latest
+
+
+def test_missing_base_asks_for_a_full_copy():
+    publish("ann", STORIES)   # never opened
+    with pytest.raises(publish_sync.MissingBase):
+        publish_sync.apply(publish("ann", edited(STORIES)))
+    full = publish("ann", edited(STORIES), full=True)
+    assert publish_sync.apply(full)["stories"] == edited(STORIES)
+
+
+def test_payloads_not_matching_their_revision_are_rejected():
+    payload = publish("ann", STORIES)
+    del payload["stories"]["1"]["questions"]["s1q2"]
+    with pytest.raises(publish_sync.SyncError):
+        publish_sync.apply(payload)
+
+
+@pytest.mark.parametrize("entry", [["1"], [["1"], "s1q1"], [{"a": 1}, "s1q1"], "1/s1q1"])
+def test_malformed_removals_are_rejected(entry):
+    publish_sync.apply(publish("ann", STORIES))
+    delta = publish("ann", edited(STORIES))
+    delta["removed"] = [entry]
+    with pytest.raises(publish_sync.SyncError):
+        publish_sync.apply(delta)
+
+
+@pytest.mark.parametrize("token", ["garbage!!", publish_sync.encode({"v": 99, "user": "ann", "revision": "a" * 20}),
+                                   publish_sync.encode({"v": 2, "user": "ann", "revision": "../../etc/passwd"})])
+def test_bad_tokens_are_rejected(token):
+    with pytest.raises(publish_sync.SyncError):
+        publish_sync.decode(token)
+
+
+def test_snapshots_are_capped_across_users(monkeypatch):
+    monkeypatch.setattr(publish_sync, "SNAPSHOT_MAX_BYTES", 1)
+    publish_sync.apply(publish("ann", STORIES))
+    publish_sync.apply(publish("bob", STORIES))
+    # Only the snapshot just written survives, and emptied user folders go too
+    assert os.listdir(publish_sync.SNAPSHOT_DIR) == [publish_sync.user_registry.user_key("bob")]
+
+
+def test_publish_state_sits_next_to_the_registered_data_file(registry, monkeypatch):
+    monkeypatch.setattr(registry, "user_key", lambda user_id: "ef" * 32)
+    registry.resolve("ann", create=True)
+    data_file = registry.resolve("bob", create=True)
+    publish_sync.prepare_publish("bob", STORIES)
+    assert os.path.exists(data_file[:-len(".json")] + ".published.json")
+    assert publish_sync.load_published("ann") is None
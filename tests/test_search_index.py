@@ -0,0 +1,59 @@
+import pytest
+
+import search_index
+
+
+@pytest.fixture(autouse=True)
+def search_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_DB", str(tmp_path / "search_index.db"))
+    monkeypatch.setattr(search_index, "_schema_ready", False)
+
+
+def questions(hits):
+    return [hit["question"] for hit in hits]
+
+
+def test_search_finds_answer_and_question_wording():
+    search_index.index_answer("ann", 1, "What is your earliest memory?", "Picking apples in the orchard")
+    assert questions(search_index.search("ann", "apples")) == ["What is your earliest memory?"]
+    assert questions(search_index.search("ann", "earliest")) == ["What is your earliest memory?"]
+    assert questions(search_index.search("ann", "orch")) == ["What is your earliest memory?"]   # last word as a prefix
+
+
+def test_search_is_scoped_to_the_user():
+    search_index.index_answer("ann", 1, "Q", "apples")
+    search_index.index_answer("bob", 1, "Q", "apples too")
+    assert len(search_index.search("ann", "apples")) == 1
+    assert search_index.search("carol", "apples") == []
+
+
+def test_blanking_an_answer_drops_it_from_the_index():
+    search_index.index_answer("ann", 1, "What is your earliest memory?", "apples")
+    search_index.index_answer("ann", 1, "What is your earliest memory?", "   ")
+    # Question wording is searchable too, so a blank row would still be a hit
+    assert search_index.search("ann", "earliest") == []
+
+
+def test_editing_an_answer_replaces_it():
+    search_index.index_answer("ann", 1, "Q", "apples")
+    search_index.index_answer("ann", 1, "Q", "pears")
+    assert search_index.search("ann", "apples") == []
+    assert questions(search_index.search("ann", "pears")) == ["Q"]
+
+
+def test_reindex_replaces_everything_and_skips_blank_answers():
+    search_index.index_answer("ann", 9, "Old", "apples")
+    search_index.reindex_user("ann", {
+        "1": {"questions": {"s1q1": {"answer": "pears"}, "s1q2": {"answer": ""}}},
+    })
+    assert search_index.search("ann", "apples") == []
+    assert questions(search_index.search("ann", "pears")) == ["What is your earliest memory?"]
+
+
+@pytest.mark.parametrize("text, query", [
+    ("apple pie", '"apple" "pie"*'),
+    ("   ", ""),
+    ('say "hi" OR NOT', '"say" "hi" "OR" "NOT"*'),
+])
+def test_to_match_query_quotes_every_term(text, query):
+    assert search_index.to_match_query(text) == query
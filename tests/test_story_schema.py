@@ -0,0 +1,74 @@
+import pytest
+
+import question_catalog
+import story_schema
+
+EARLIEST = question_catalog.question_text("s1q1")
+
+
+def test_version_1_user_data_is_migrated_to_question_ids():
+    data = story_schema.decode_user_data({
+        "user_id": "ann",
+        "responses": {
+            "1": {"title": "Childhood", "questions": {EARLIEST: "Apples", "A question not in the catalog": {"answer": "x"}}},
+            "profile": {"questions": {}},   # not a session: skipped
+        },
+        "last_saved": "2024-03-01T09:00:00",
+    })
+    assert list(data.sessions) == [1]
+    answers = data.sessions[1].answers
+    assert list(answers) == ["s1q1", "A question not in the catalog"]
+    assert answers["s1q1"] == story_schema.Answer("Apples", "")
+
+
+def test_user_data_to_biography_uses_wording_and_dates_untimed_answers():
+    data = story_schema.decode_user_data({
+        "schema": 2, "user_id": "ann", "last_saved": "2024-03-01T09:00:00",
+        "responses": {"2": {"title": "Work", "questions": {}},
+                      "1": {"title": "Childhood", "questions": {"s1q1": {"answer": "Apples", "timestamp": ""}}}},
+    })
+    biography = data.to_biography()
+    assert [session.id for session in biography.sessions] == [1]   # the empty session is left out
+    answer = biography.sessions[0].answers[EARLIEST]
+    assert (answer.text, answer.date) == ("Apples", "2024-03-01")
+
+
+def test_export_round_trip():
+    payload = story_schema.export_payload("ann", {1: {"questions": {"s1q1": {"answer": "Apples", "timestamp": "2024-01-01"}}},
+                                                  2: {"questions": {}}},
+                                          {1: "Childhood", 2: "Work"}, export_date="2024-03-01T09:00:00")
+    assert payload["stories"] == {"1": {"title": "Childhood",
+                                        "questions": {"s1q1": {"answer": "Apples", "timestamp": "2024-01-01"}}}}
+
+    biography = story_schema.decode_export(payload)
+    assert biography.sessions[0].answers == {EARLIEST: story_schema.Answer("Apples", "2024-01-01")}
+    assert story_schema.decode_export(story_schema.encode_export(biography)) == biography
+
+
+def test_export_sessions_are_sorted_and_bare_answers_dated_to_the_export():
+    biography = story_schema.decode_export({
+        "user": "ann", "export_date": "2024-03-01T09:00:00",
+        "stories": {"10": {"title": "Later", "questions": {"Q": "Bare"}}, "2": {"questions": {}}},
+    })
+    assert [(session.id, session.title) for session in biography.sessions] == [(2, "Chapter 2"), (10, "Later")]
+    assert biography.sessions[1].answers["Q"] == story_schema.Answer("Bare", "2024-03-01T09:00:00")
+    assert story_schema.as_biography(biography) is biography
+
+
+def test_display_name_prefers_the_profile():
+    biography = story_schema.decode_export({"user": "ann42", "stories": {}})
+    assert biography.display_name == "ann42"
+    biography.user_profile = {"first_name": "Ann", "last_name": "Lee"}
+    assert biography.display_name == "Ann Lee"
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"schema": story_schema.SCHEMA_VERSION + 1, "stories": {}},
+    {"stories": []},
+    {"stories": {"1": "not a session"}},
+    {"stories": {"1": {"questions": []}}},
+])
+def test_malformed_exports_raise_schema_error(data):
+    with pytest.raises(story_schema.SchemaError):
+        story_schema.decode_export(data)
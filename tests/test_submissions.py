@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import submissions
+
+
+@pytest.fixture(autouse=True)
+def ledger(monkeypatch):
+    monkeypatch.setattr(submissions, "_ledger", {})
+
+
+def sid(text="Apples in the orchard", turn=0, question_id="s1q1"):
+    return submissions.submission_id("ann", "session-1", question_id, turn, text)
+
+
+def test_submission_id_ignores_whitespace_but_not_turn_or_question():
+    assert sid("Apples  in the\norchard ") == sid()
+    assert sid(turn=1) != sid()
+    assert sid(question_id="s1q2") != sid()
+
+
+def test_conversation_turn_counts_replies():
+    conversation = [{"role": "assistant", "content": "Q"}, {"role": "user", "content": "A"},
+                    {"role": "assistant", "content": "Q2"}]
+    assert submissions.conversation_turn(conversation) == 2
+
+
+def test_repeat_gets_the_cached_reply():
+    assert submissions.claim("ann", sid()) is None
+    submissions.record_reply("ann", sid(), "Apples", "Tell me more")
+    submissions.mark_saved("ann", sid())
+
+    entry = submissions.claim("ann", sid())
+    assert entry["state"] == submissions.SAVED
+    assert (entry["user_input"], entry["reply"]) == ("Apples", "Tell me more")
+
+
+def test_repeat_of_a_pending_submission_returns_at_once_and_can_poll():
+    assert submissions.claim("ann", sid()) is None
+    start = time.monotonic()
+    assert submissions.claim("ann", sid())["state"] == submissions.PENDING
+    assert time.monotonic() - start < submissions.PENDING_POLL_SECONDS
+
+    submissions.record_reply("ann", sid(), "Apples", "Tell me more")
+    assert submissions.lookup("ann", sid())["reply"] == "Tell me more"
+
+
+def test_released_claim_can_be_tried_again():
+    assert submissions.claim("ann", sid()) is None
+    submissions.release("ann", sid())
+    assert submissions.lookup("ann", sid()) is None
+    assert submissions.claim("ann", sid()) is None
+
+
+def test_release_keeps_a_submission_with_a_reply():
+    submissions.claim("ann", sid())
+    submissions.record_reply("ann", sid(), "Apples", "Tell me more")
+    submissions.release("ann", sid())
+    assert submissions.lookup("ann", sid())["state"] == submissions.REPLIED
+
+
+def test_same_text_at_the_next_turn_is_a_new_submission():
+    submissions.claim("ann", sid(turn=0))
+    submissions.record_reply("ann", sid(turn=0), "Apples", "Tell me more")
+    assert submissions.claim("ann", sid(turn=1)) is None
+
+
+def test_expired_and_excess_submissions_are_dropped(monkeypatch):
+    submissions.claim("ann", sid())
+    monkeypatch.setattr(submissions, "SUBMISSION_TTL_SECONDS", -1)
+    assert submissions.lookup("ann", sid()) is None
+
+    monkeypatch.setattr(submissions, "SUBMISSION_TTL_SECONDS", 600)
+    monkeypatch.setattr(submissions, "MAX_PER_USER", 2)
+    for n in range(3):
+        submissions.claim("ann", sid(turn=n))
+    assert submissions.lookup("ann", sid(turn=0)) is None
+    assert submissions.lookup("ann", sid(turn=2)) is not None
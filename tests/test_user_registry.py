@@ -0,0 +1,76 @@
+import json
+import os
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_resolve_creates_a_sharded_path_only_when_asked(registry):
+    assert registry.resolve("ann") is None
+    key = registry.user_key("ann")
+    path = registry.resolve("ann", create=True)
+    assert path == os.path.join(registry.USER_DATA_DIR, key[:2], key[2:4], f"{key}.json")
+    assert registry.resolve("ann") == path
+
+
+def test_colliding_keys_get_their_own_files(registry, monkeypatch):
+    monkeypatch.setattr(registry, "user_key", lambda user_id: "ab" * 32)
+    first = registry.resolve("ann", create=True)
+    second = registry.resolve("bob", create=True)
+    assert first != second
+    assert second.endswith("-1.json")
+
+    # The registry, not the cache, keeps them apart
+    monkeypatch.setattr(registry, "_paths", {})
+    assert registry.resolve("ann") == first
+    assert registry.resolve("bob") == second
+
+
+def test_legacy_file_is_adopted_on_first_resolve(registry):
+    legacy = registry.legacy_filename("ann")
+    write_json(legacy, {"user_id": "ann", "responses": {}})
+
+    path = registry.resolve("ann")
+    assert path == registry.shard_path(registry.user_key("ann"))
+    assert not os.path.exists(legacy)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["user_id"] == "ann"
+
+
+def test_legacy_file_of_another_user_is_left_alone(registry):
+    # Same 8-character MD5 prefix, different user inside
+    legacy = registry.legacy_filename("ann")
+    write_json(legacy, {"user_id": "someone else"})
+    assert registry.resolve("ann") is None
+    assert os.path.exists(legacy)
+
+
+def test_file_without_a_registry_row_is_reregistered(registry):
+    path = registry.shard_path(registry.user_key("ann"))
+    write_json(path, {"user_id": "ann"})
+    assert registry.resolve("ann") == path
+    assert list(registry.iter_registered()) == [("ann", path)]
+
+
+def test_migrate_legacy_moves_readable_files(registry):
+    write_json(registry.legacy_filename("ann"), {"user_id": "ann"})
+    write_json(registry.legacy_filename("bob"), {"user_id": "bob"})
+    write_json(os.path.join(registry.LEGACY_DIR, "user_data_broken.json"), {})
+
+    assert registry.migrate_legacy(registry.LEGACY_DIR, dry_run=True) == \
+        {"migrated": 2, "already_registered": 0, "unreadable": 1}
+    assert registry.migrate_legacy(registry.LEGACY_DIR) == {"migrated": 2, "already_registered": 0, "unreadable": 1}
+    assert sorted(user_id for user_id, _ in registry.iter_registered()) == ["ann", "bob"]
+    assert os.listdir(registry.LEGACY_DIR) == ["user_data_broken.json"]
+
+
+def test_iter_data_files_skips_companion_files(registry, monkeypatch):
+    monkeypatch.setattr(registry, "user_key", lambda user_id: "cd" * 32)
+    paths = [registry.resolve(user_id, create=True) for user_id in ("ann", "bob")]
+    for path in paths:
+        write_json(path, {})
+        write_json(path[:-len(".json")] + ".published.json", {})
+    assert sorted(path for path, _ in registry.iter_data_files()) == sorted(paths)
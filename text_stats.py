@@ -0,0 +1,142 @@
+# text_stats.py - WORD COUNTS AND STORY STATISTICS SHARED BY BOTH APPS
+#
+# The interview app's progress bar and footer, the publisher's header and
+# the books' statistics pages all count here, so they agree: a word is a
+# run of letters or digits, and inner apostrophes, hyphens and points join
+# runs into one word ("don't", "well-known", "3.5"). Words, sentences and
+# vocabulary come from one scan of each text, cached by a hash of the
+# text, so a rerun or republish only scans answers that changed.
+#
+#   stats = text_stats.of(answer)            # TextStats: words, sentences, unique_words, characters
+#   summary = text_stats.summarize(stories)  # (question, answer) pairs -> totals, longest, shortest
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+WORDS_PER_MINUTE = int(os.environ.get("READING_WORDS_PER_MINUTE", "200"))   # a relaxed adult reading pace
+CACHE_ENTRIES = int(os.environ.get("TEXT_STATS_CACHE_ENTRIES", "20000"))    # distinct texts kept
+
+_WORD = re.compile(r"\w+(?:['’.\-]\w+)*")
+_SENTENCE_END = re.compile(r"[.!?…]+(?!\w)")   # not the point in "3.5" or "e.g"
+
+_cache = OrderedDict()   # blake2b digest of the text -> TextStats
+_lock = threading.Lock()
+
+
+# ============================================================================
+# PER-TEXT STATISTICS
+# ============================================================================
+@dataclass(slots=True, frozen=True)
+class TextStats:
+    words: int
+    sentences: int
+    unique_words: int   # distinct words, ignoring case
+    characters: int     # without surrounding whitespace
+
+    @property
+    def reading_minutes(self):
+        return self.words / WORDS_PER_MINUTE
+
+    @property
+    def vocabulary_richness(self):
+        """Distinct words per word (type-token ratio); 0 for an empty text"""
+        return self.unique_words / self.words if self.words else 0.0
+
+
+EMPTY = TextStats(0, 0, 0, 0)
+
+
+def _scan(text):
+    words = _WORD.findall(text.casefold())
+    if not words:
+        return TextStats(0, 0, 0, len(text.strip()))
+    stripped = text.rstrip()
+    sentences = len(_SENTENCE_END.findall(stripped))
+    if stripped[-1] not in ".!?…":   # the last sentence needn't end with punctuation
+        sentences += 1
+    return TextStats(len(words), sentences, len(set(words)), len(text.strip()))
+
+
+def of(text):
+    """TextStats for a text, scanned once per distinct text"""
+    if not text:
+        return EMPTY
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    with _lock:
+        stats = _cache.get(key)
+        if stats is not None:
+            _cache.move_to_end(key)
+            return stats
+    stats = _scan(text)
+    with _lock:
+        _cache[key] = stats
+        while len(_cache) > CACHE_ENTRIES:
+            _cache.popitem(last=False)
+    return stats
+
+
+def word_count(text):
+    return of(text).words
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+
+
+# ============================================================================
+# COLLECTIONS OF STORIES
+# ============================================================================
+@dataclass(slots=True, frozen=True)
+class Summary:
+    stories: int
+    words: int
+    sentences: int
+    longest: tuple = None    # (question, TextStats) of the story with the most words
+    shortest: tuple = None   # (question, TextStats) of the story with the fewest words
+
+    @property
+    def reading_minutes(self):
+        return self.words / WORDS_PER_MINUTE
+
+    @property
+    def average_words(self):
+        return self.words // self.stories if self.stories else 0
+
+
+def summarize(stories):
+    """Summary of (question, answer text) pairs in one pass; blank answers are left out"""
+    count = words = sentences = 0
+    longest = shortest = None
+    for question, answer in stories:
+        stats = of(answer)
+        if not stats.words:
+            continue
+        count += 1
+        words += stats.words
+        sentences += stats.sentences
+        if longest is None or stats.words > longest[1].words:
+            longest = (question, stats)
+        if shortest is None or stats.words < shortest[1].words:
+            shortest = (question, stats)
+    return Summary(count, words, sentences, longest, shortest)
+
+
+def format_reading_time(minutes):
+    """Reading time in words: under a minute, 12 minutes, 3 hours 5 minutes"""
+    minutes = round(minutes)
+    if minutes < 1:
+        return "under a minute"
+    hours, minutes = divmod(minutes, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours} hour{'s' if hours != 1 else ''}")
+    if minutes:
+        parts.append(f"{minutes} minute{'s' if minutes != 1 else ''}")
+    return " ".join(parts)
@@ -0,0 +1,362 @@
+# tracing.py - LIGHTWEIGHT SPANS FOR HOT-PATH INSTRUMENTATION
+#
+# Spans are handed to a QueueHandler, so the Streamlit script thread never
+# blocks on stdout or disk. A background QueueListener writes them out as
+# JSON lines (default) or posts them as OTLP/JSON to a local collector.
+#
+#   TRACE_EXPORTER=jsonl   write spans to TRACE_FILE (default traces.jsonl),
+#                          rotated at TRACE_FILE_MAX_BYTES
+#   TRACE_EXPORTER=otlp    post batches to OTLP_ENDPOINT, at least every
+#                          OTLP_FLUSH_SECONDS
+#   TRACE_EXPORTER=off     drop spans
+#
+# A stand-in collector for local use:  python tracing.py collector
+import atexit
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "jsonl")
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+TRACE_FILE_MAX_BYTES = int(os.environ.get("TRACE_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_FILE_BACKUPS = int(os.environ.get("TRACE_FILE_BACKUPS", "3"))   # traces.jsonl.1 ... .3, oldest dropped
+OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT", "http://127.0.0.1:4318/v1/traces")
+SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "deepervault")
+
+OTLP_BATCH_SIZE = 64
+OTLP_FLUSH_SECONDS = 2.0
+
+logger = logging.getLogger("deepervault.trace")
+logger.propagate = False
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_listener = None
+_setup_lock = threading.Lock()
+
+
+# ============================================================================
+# EXPORTERS (RUN ON THE LISTENER THREAD)
+# ============================================================================
+class JsonLinesFormatter(logging.Formatter):
+    """One span per line"""
+
+    def format(self, record):
+        return json.dumps(record.span, default=str)
+
+
+class OtlpHttpHandler(logging.Handler):
+    """Batch spans and post them to an OTLP/HTTP JSON endpoint.
+
+    A full batch is posted at once; a timer thread posts a partial one
+    every OTLP_FLUSH_SECONDS, so spans don't wait for the app's next
+    span while it is idle.
+    """
+
+    def __init__(self, endpoint):
+        super().__init__()
+        self.endpoint = endpoint
+        self.batch = []
+        self._stopped = threading.Event()
+        threading.Thread(target=self._flush_periodically, name="otlp-flush", daemon=True).start()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(OTLP_FLUSH_SECONDS):
+            self.flush()
+
+    def emit(self, record):
+        self.batch.append(record.span)
+        if len(self.batch) >= OTLP_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if not self.batch:
+                return
+            batch, self.batch = self.batch, []
+        import urllib.request
+        body = json.dumps(to_otlp(batch), default=str).encode()
+        request = urllib.request.Request(self.endpoint, data=body, headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(request, timeout=2).close()
+        except OSError as e:
+            print(f"Error exporting {len(batch)} spans to {self.endpoint}: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stopped.set()
+        super().close()
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans):
+    """Convert span dicts to an OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "deepervault.tracing"},
+                "spans": [{
+                    "traceId": s["trace_id"],
+                    "spanId": s["span_id"],
+                    "parentSpanId": s["parent_id"] or "",
+                    "name": s["name"],
+                    "kind": 1,
+                    "startTimeUnixNano": str(int(s["start"] * 1e9)),
+                    "endTimeUnixNano": str(int((s["start"] + s["duration_ms"] / 1000) * 1e9)),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+                    "status": {"code": 1 if s["status"] == "ok" else 2, "message": s["status"]}
+                } for s in spans]
+            }]
+        }]
+    }
+
+
+def _setup():
+    """Attach the queue handler and start the listener thread once per process"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None or TRACE_EXPORTER == "off":
+            return
+
+        if TRACE_EXPORTER == "otlp":
+            target = OtlpHttpHandler(OTLP_ENDPOINT)
+        else:
+            target = logging.handlers.RotatingFileHandler(TRACE_FILE, maxBytes=TRACE_FILE_MAX_BYTES,
+                                                          backupCount=TRACE_FILE_BACKUPS, encoding="utf-8")
+            target.setFormatter(JsonLinesFormatter())
+
+        span_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(span_queue))
+        logger.setLevel(logging.INFO)
+
+        _listener = logging.handlers.QueueListener(span_queue, target)
+        _listener.start()
+        atexit.register(shutdown)
+
+
+def shutdown():
+    """Drain queued spans and stop the listener"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+            handler.close()
+        _listener = None
+
+
+# ============================================================================
+# SPAN API
+# ============================================================================
+def hash_user(user_id):
+    """Short, stable pseudonym for a user id so traces never carry names"""
+    if not user_id:
+        return ""
+    return hashlib.sha256(user_id.encode()).hexdigest()[:12]
+
+
+def payload_size(value):
+    """Size in bytes of a str/bytes/BytesIO result, or None"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "getbuffer"):
+        return value.getbuffer().nbytes
+    return None
+
+
+class Span:
+    """A timed operation; nested spans share the trace id of their parent"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "_t0", "attributes", "ended", "_token")
+
+    def __init__(self, name, parent=None, **attributes):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.attributes = attributes
+        self.ended = False
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._t0) * 1000
+
+    def end(self, status="ok"):
+        if self.ended:
+            return
+        self.ended = True
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except (ValueError, RuntimeError):
+                # Ended from a different context (e.g. a later rerun)
+                pass
+            self._token = None
+        if TRACE_EXPORTER == "off":
+            return
+        _setup()
+        logger.info(self.name, extra={"span": {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.elapsed_ms(), 3),
+            "status": status,
+            "attributes": self.attributes
+        }})
+
+
+def start_span(name, **attributes):
+    """Start a span as a child of the current one and make it current"""
+    span = Span(name, _current_span.get(), **attributes)
+    span._token = _current_span.set(span)
+    return span
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block; the span status is the exception type if the block raises"""
+    current = start_span(name, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(status=type(e).__name__)
+        raise
+    else:
+        current.end()
+
+
+def traced(name):
+    """Decorator form of span(); records the size of str/bytes results"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name) as current:
+                result = func(*args, **kwargs)
+                size = payload_size(result)
+                if size is not None:
+                    current.set(bytes=size)
+                return result
+        return wrapper
+    return decorator
+
+
+def event(name, **attributes):
+    """Zero-duration span for things that used to be DEBUG prints"""
+    Span(name, _current_span.get(), **attributes).end()
+
+
+# ============================================================================
+# STREAMLIT RERUN SPANS
+# ============================================================================
+def begin_rerun(state, **attributes):
+    """Start the span for one script run, stored in st.session_state.
+
+    st.rerun() and st.stop() abort the script before it reaches
+    end_rerun(), so a span still open at the next run was cut short by
+    a rerun and is closed here with status 'rerun'.
+    """
+    previous = state.get("_trace_rerun_span")
+    if previous is not None and not previous.ended:
+        previous.end(status="rerun")
+
+    _current_span.set(None)
+    state["_trace_rerun_span"] = start_span("script.rerun", **attributes)
+    return state["_trace_rerun_span"]
+
+
+def end_rerun(state, status="ok", **attributes):
+    """Close the span opened by begin_rerun()"""
+    current = state.get("_trace_rerun_span")
+    if current is not None and not current.ended:
+        current.set(**attributes)
+        current.end(status=status)
+
+
+# ============================================================================
+# LOCAL COLLECTOR STAND-IN
+# ============================================================================
+def run_collector(port=4318, out_path="collected_spans.jsonl"):
+    """Accept OTLP/JSON posts on /v1/traces and append each span as a JSON line"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    write_lock = threading.Lock()
+
+    class CollectorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length))
+            except ValueError:
+                self.send_error(400, "Body is not JSON")
+                return
+
+            lines = []
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for s in scope_spans.get("spans", []):
+                        lines.append(json.dumps(s))
+            with write_lock, open(out_path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), CollectorHandler)
+    print(f"Collecting OTLP/JSON spans on http://127.0.0.1:{port}/v1/traces -> {out_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "collector":
+        port = int(sys.argv[2]) if len(sys.argv) >= 3 else 4318
+        out_path = sys.argv[3] if len(sys.argv) >= 4 else "collected_spans.jsonl"
+        run_collector(port, out_path)
+    else:
+        print("Usage: python tracing.py collector [port] [output.jsonl]")
@@ -0,0 +1,62 @@
+# usage_dashboard.py - OPENAI USAGE DASHBOARD
+# Run with: streamlit run usage_dashboard.py
+import streamlit as st
+
+import usage_meter
+
+st.set_page_config(page_title="DeeperVault Usage", page_icon="📊", layout="wide")
+st.title("📊 OpenAI Usage & Cost")
+
+days = st.slider("Days to include", min_value=1, max_value=90, value=7)
+
+# ============================================================================
+# TOTALS
+# ============================================================================
+by_day = usage_meter.usage_summary("day", days)
+
+if not by_day:
+    st.info("No completion calls recorded yet.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Calls", f"{sum(r['calls'] for r in by_day):,}")
+with col2:
+    st.metric("Tokens", f"{sum(r['prompt_tokens'] + r['completion_tokens'] for r in by_day):,}")
+with col3:
+    st.metric("Failures", f"{sum(r['failures'] for r in by_day):,}")
+with col4:
+    st.metric("Estimated Cost", f"${sum(r['cost_usd'] for r in by_day):,.2f}")
+
+st.subheader("Daily Tokens")
+st.bar_chart(
+    {r["day"]: r["prompt_tokens"] + r["completion_tokens"] for r in sorted(by_day, key=lambda r: r["day"])}
+)
+
+# ============================================================================
+# BREAKDOWNS
+# ============================================================================
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("By Feature")
+    st.dataframe(usage_meter.usage_summary("feature", days), use_container_width=True)
+with col2:
+    st.subheader("Latency by Feature")
+    st.dataframe(usage_meter.latency_percentiles(days), use_container_width=True)
+
+st.subheader("By User")
+st.caption("Users appear as the same hashed ids the traces use.")
+st.dataframe(usage_meter.usage_summary("user_id", days), use_container_width=True)
+
+st.subheader("By Model")
+st.dataframe(usage_meter.usage_summary("model", days), use_container_width=True)
+
+# ============================================================================
+# BUDGET WATCH
+# ============================================================================
+st.subheader(f"⚠️ Users Near Today's Budget ({usage_meter.DAILY_TOKEN_BUDGET:,} tokens)")
+near_budget = usage_meter.users_over_budget()
+if near_budget:
+    st.dataframe(near_budget, use_container_width=True)
+else:
+    st.success("No users above 80% of their daily budget.")
@@ -0,0 +1,280 @@
+# usage_meter.py - TOKEN, COST AND LATENCY ACCOUNTING FOR OPENAI CALLS
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import tracing
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+USAGE_DB = os.environ.get("USAGE_DB", "usage_metrics.db")
+
+# Tokens (prompt + completion) one user may spend per calendar day
+DAILY_TOKEN_BUDGET = int(os.environ.get("DAILY_TOKEN_BUDGET", "200000"))
+
+MAX_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# Features that make completion calls
+FEATURE_CORRECTION = "correction"
+FEATURE_BIOGRAPHER = "biographer"
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+class BudgetExceeded(Exception):
+    """Raised when a user has spent their daily token budget"""
+
+
+# ============================================================================
+# LOCAL STORE
+# ============================================================================
+# Users are stored as tracing.hash_user pseudonyms, the same ones the traces
+# carry, never by name.
+def _user_key(user_id):
+    return tracing.hash_user(user_id) or "anonymous"
+
+
+def _connect():
+    """Open the usage database, creating the table on first use"""
+    global _schema_ready
+    import sqlite3
+    conn = sqlite3.connect(USAGE_DB, timeout=5)
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS api_calls (
+                    ts TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    feature TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                    completion_tokens INTEGER NOT NULL DEFAULT 0,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    latency_ms REAL NOT NULL,
+                    retries INTEGER NOT NULL DEFAULT 0,
+                    outcome TEXT NOT NULL,
+                    cost_usd REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_api_calls_user_day ON api_calls (user_id, day)")
+            # Rows recorded before ids were hashed still carry the user's name
+            conn.create_function("hash_user", 1, tracing.hash_user, deterministic=True)
+            conn.execute("""
+                UPDATE api_calls SET user_id = hash_user(user_id)
+                WHERE user_id != 'anonymous' AND NOT (length(user_id) = 12 AND user_id NOT GLOB '*[^0-9a-f]*')
+            """)
+            conn.commit()
+            _schema_ready = True
+    return conn
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0):
+    """Estimate the USD cost of one call from the price table"""
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES["gpt-4o-mini"])
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+def record_call(user_id, feature, model, usage, latency_ms, retries, outcome):
+    """Store one completion call in the usage database"""
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    now = datetime.now()
+    import sqlite3
+
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "INSERT INTO api_calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now.isoformat(), now.date().isoformat(), _user_key(user_id), feature, model,
+                 prompt_tokens, completion_tokens, cached_tokens, latency_ms, retries, outcome,
+                 estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Error recording usage for {user_id}: {e}")
+
+
+# ============================================================================
+# BUDGET CHECK
+# ============================================================================
+def tokens_used_today(user_id):
+    """Total tokens a user has spent today"""
+    import sqlite3
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM api_calls WHERE user_id = ? AND day = ?",
+                (_user_key(user_id), datetime.now().date().isoformat())
+            ).fetchone()
+        finally:
+            conn.close()
+        return row[0]
+    except sqlite3.Error as e:
+        print(f"Error reading usage for {user_id}: {e}")
+        return 0
+
+
+def check_daily_budget(user_id):
+    """Raise BudgetExceeded if the user has used up today's tokens"""
+    if DAILY_TOKEN_BUDGET <= 0:
+        return
+    used = tokens_used_today(user_id)
+    if used >= DAILY_TOKEN_BUDGET:
+        raise BudgetExceeded(f"Daily token budget of {DAILY_TOKEN_BUDGET:,} reached ({used:,} used)")
+
+
+# ============================================================================
+# METERED COMPLETION CALL
+# ============================================================================
+def _is_retryable(error):
+    """Timeouts, connection drops, rate limits and server errors are worth retrying"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def metered_completion(client, user_id, feature, **request):
+    """Call client.chat.completions.create and record tokens, latency, retries and outcome"""
+    model = request.get("model", "")
+
+    try:
+        check_daily_budget(user_id)
+    except BudgetExceeded:
+        record_call(user_id, feature, model, None, 0.0, 0, "budget_exceeded")
+        raise
+
+    with tracing.span("openai.completion", feature=feature, model=model, user=tracing.hash_user(user_id)) as call_span:
+        retries = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                response = client.chat.completions.create(**request)
+                break
+            except Exception as e:
+                if retries < MAX_RETRIES and _is_retryable(e):
+                    retries += 1
+                    time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (retries - 1))
+                    continue
+                latency_ms = (time.perf_counter() - start) * 1000
+                call_span.set(retries=retries)
+                record_call(user_id, feature, model, None, latency_ms, retries, type(e).__name__)
+                raise
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        usage = getattr(response, "usage", None)
+        call_span.set(
+            retries=retries,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+        record_call(user_id, feature, getattr(response, "model", None) or model, usage, latency_ms, retries, "ok")
+        return response
+
+
+# ============================================================================
+# AGGREGATES FOR THE DASHBOARD
+# ============================================================================
+def usage_summary(group_by, days=7):
+    """Aggregate calls over the last N days grouped by 'user_id', 'feature', 'model' or 'day'"""
+    if group_by not in ("user_id", "feature", "model", "day"):
+        raise ValueError(f"Cannot group usage by {group_by}")
+
+    since = (datetime.now().date() - timedelta(days=days - 1)).isoformat()
+    conn = _connect()
+    try:
+        rows = conn.execute(f"""
+            SELECT {group_by},
+                   COUNT(*),
+                   SUM(prompt_tokens),
+                   SUM(completion_tokens),
+                   SUM(cached_tokens),
+                   AVG(latency_ms),
+                   SUM(retries),
+                   SUM(CASE WHEN outcome = 'ok' THEN 0 ELSE 1 END),
+                   SUM(cost_usd)
+            FROM api_calls
+            WHERE day >= ?
+            GROUP BY {group_by}
+            ORDER BY SUM(prompt_tokens + completion_tokens) DESC
+        """, (since,)).fetchall()
+    finally:
+        conn.close()
+
+    return [{
+        group_by: row[0],
+        "calls": row[1],
+        "prompt_tokens": row[2],
+        "completion_tokens": row[3],
+        "cached_tokens": row[4],
+        "avg_latency_ms": round(row[5], 1),
+        "retries": row[6],
+        "failures": row[7],
+        "cost_usd": round(row[8], 4)
+    } for row in rows]
+
+
+def latency_percentiles(days=7):
+    """p50/p95/max latency per feature for successful calls"""
+    since = (datetime.now().date() - timedelta(days=days - 1)).isoformat()
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT feature, latency_ms FROM api_calls WHERE day >= ? AND outcome = 'ok' ORDER BY feature, latency_ms",
+            (since,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    by_feature = {}
+    for feature, latency in rows:
+        by_feature.setdefault(feature, []).append(latency)
+
+    result = []
+    for feature, latencies in by_feature.items():
+        result.append({
+            "feature": feature,
+            "calls": len(latencies),
+            "p50_ms": round(latencies[int(0.50 * (len(latencies) - 1))], 1),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1),
+            "max_ms": round(latencies[-1], 1)
+        })
+    return result
+
+
+def users_over_budget(fraction=0.8):
+    """Users who have used at least the given fraction of today's budget"""
+    if DAILY_TOKEN_BUDGET <= 0:
+        return []
+    conn = _connect()
+    try:
+        rows = conn.execute("""
+            SELECT user_id, SUM(prompt_tokens + completion_tokens) AS used
+            FROM api_calls
+            WHERE day = ?
+            GROUP BY user_id
+            HAVING used >= ?
+            ORDER BY used DESC
+        """, (datetime.now().date().isoformat(), DAILY_TOKEN_BUDGET * fraction)).fetchall()
+    finally:
+        conn.close()
+    return [{"user_id": user_id, "tokens_today": used, "budget_used": f"{used / DAILY_TOKEN_BUDGET:.0%}"}
+            for user_id, used in rows]
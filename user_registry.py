@@ -0,0 +1,246 @@
+# user_registry.py - WHERE EACH USER'S DATA FILE LIVES
+#
+# Users are keyed by the full SHA-256 of their id and stored in a two-level
+# sharded tree, so no directory ever holds more than a few files:
+#
+#   user_data/3f/a9/3fa9...e1.json
+#
+# A small SQLite registry maps user id -> file, keeps the real user id next
+# to the key (so a hash collision can never make two users share a file),
+# and records files moved over from the old flat user_data_<md5[:8]>.json
+# layout. Old files are migrated lazily on first load, or all at once:
+#
+#   python user_registry.py migrate [--source .] [--dry-run]
+#   python user_registry.py where "Jane Doe"
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+USER_DATA_DIR = os.environ.get("USER_DATA_DIR", "user_data")
+REGISTRY_DB = os.environ.get("USER_REGISTRY_DB", os.path.join(USER_DATA_DIR, "registry.db"))
+
+# Where the old flat user_data_xxxxxxxx.json files were written
+LEGACY_DIR = os.environ.get("LEGACY_USER_DATA_DIR", ".")
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+# user id -> path, so repeated saves in one process skip the registry query
+_paths = {}
+_paths_lock = threading.Lock()
+
+
+# ============================================================================
+# KEYS AND PATHS
+# ============================================================================
+def user_key(user_id):
+    """Full-length SHA-256 hex digest of the user id"""
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+
+
+def shard_path(key, suffix=""):
+    """user_data/ab/cd/<key><suffix>.json"""
+    return os.path.join(USER_DATA_DIR, key[:2], key[2:4], f"{key}{suffix}.json")
+
+
+def legacy_filename(user_id, legacy_dir=None):
+    """The flat file the app used before the registry existed"""
+    filename_hash = hashlib.md5(user_id.encode()).hexdigest()[:8]
+    return os.path.join(legacy_dir or LEGACY_DIR, f"user_data_{filename_hash}.json")
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+def _connect():
+    """Open the registry, creating the table on first use"""
+    global _schema_ready
+    import sqlite3
+    os.makedirs(os.path.dirname(REGISTRY_DB) or ".", exist_ok=True)
+    conn = sqlite3.connect(REGISTRY_DB, timeout=5)
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id TEXT PRIMARY KEY,
+                    user_key TEXT NOT NULL,
+                    path TEXT NOT NULL UNIQUE,
+                    created TEXT NOT NULL,
+                    migrated_from TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_users_key ON users (user_key)")
+            conn.commit()
+            _schema_ready = True
+    return conn
+
+
+def _register(conn, user_id, migrated_from=None):
+    """Insert a user and return their path; a key already taken by another id gets a suffix"""
+    key = user_key(user_id)
+    taken = conn.execute("SELECT COUNT(*) FROM users WHERE user_key = ?", (key,)).fetchone()[0]
+    path = shard_path(key, f"-{taken}" if taken else "")
+    conn.execute(
+        "INSERT INTO users (user_id, user_key, path, created, migrated_from) VALUES (?, ?, ?, ?, ?)",
+        (user_id, key, path, datetime.now().isoformat(), migrated_from)
+    )
+    return path
+
+
+def _lookup(conn, user_id):
+    row = conn.execute("SELECT path FROM users WHERE user_id = ?", (user_id,)).fetchone()
+    return row[0] if row else None
+
+
+def _stored_user_id(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("user_id")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _adopt_legacy_file(conn, user_id):
+    """Move the user's old flat file into the sharded tree; returns the new path or None"""
+    legacy_path = legacy_filename(user_id)
+    # The 8-char MD5 prefix can collide, so only take the file if it says it is ours
+    if not os.path.exists(legacy_path) or _stored_user_id(legacy_path) != user_id:
+        return None
+    path = _register(conn, user_id, migrated_from=os.path.basename(legacy_path))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(legacy_path, path)
+    return path
+
+
+def resolve(user_id, create=False):
+    """Path of the user's data file, or None if they have none and create is False"""
+    with _paths_lock:
+        if user_id in _paths:
+            return _paths[user_id]
+
+    import sqlite3
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                path = _lookup(conn, user_id) or _adopt_legacy_file(conn, user_id)
+                # A file at the default location with no registry row (e.g. the
+                # registry was deleted) is re-registered rather than orphaned
+                if path is None and (create or os.path.exists(shard_path(user_key(user_id)))):
+                    path = _register(conn, user_id)
+        finally:
+            conn.close()
+    except sqlite3.IntegrityError:
+        # Another session registered the same user first
+        conn = _connect()
+        try:
+            path = _lookup(conn, user_id)
+        finally:
+            conn.close()
+
+    if path is not None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _paths_lock:
+            _paths[user_id] = path
+    return path
+
+
+def iter_registered():
+    """Yield (user_id, path) for every registered user"""
+    conn = _connect()
+    try:
+        for user_id, path in conn.execute("SELECT user_id, path FROM users ORDER BY user_key"):
+            yield user_id, path
+    finally:
+        conn.close()
+
+
+def iter_data_files(data_dir=None):
+    """Yield (path, stat) for every user file in the sharded tree, two levels deep"""
+    data_dir = data_dir or USER_DATA_DIR
+    try:
+        top = os.scandir(data_dir)
+    except FileNotFoundError:
+        return
+    with top:
+        for first in top:
+            if len(first.name) != 2 or not first.is_dir():
+                continue
+            with os.scandir(first.path) as middle:
+                for second in middle:
+                    if not second.is_dir():
+                        continue
+                    with os.scandir(second.path) as leaves:
+                        for leaf in leaves:
+                            # <key>.json only, not companions like <key>.published.json
+                            if leaf.name.endswith(".json") and "." not in leaf.name[:-5] and leaf.is_file():
+                                yield leaf.path, leaf.stat()
+
+
+# ============================================================================
+# ONE-TIME MIGRATION
+# ============================================================================
+def migrate_legacy(source_dir=".", dry_run=False):
+    """Move every flat user_data_*.json in source_dir into the sharded tree; returns counts"""
+    counts = {"migrated": 0, "already_registered": 0, "unreadable": 0}
+    conn = _connect()
+    try:
+        with os.scandir(source_dir) as entries:
+            for entry in entries:
+                if not (entry.name.startswith("user_data_") and entry.name.endswith(".json") and entry.is_file()):
+                    continue
+                user_id = _stored_user_id(entry.path)
+                if not user_id:
+                    counts["unreadable"] += 1
+                    print(f"Skipping {entry.name}: no user_id inside", file=sys.stderr)
+                    continue
+                if _lookup(conn, user_id):
+                    counts["already_registered"] += 1
+                    print(f"Skipping {entry.name}: {user_id!r} already has a registered file", file=sys.stderr)
+                    continue
+                if dry_run:
+                    counts["migrated"] += 1
+                    continue
+                with conn:
+                    path = _register(conn, user_id, migrated_from=entry.name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(entry.path, path)
+                counts["migrated"] += 1
+    finally:
+        conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded user data registry.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="move flat user_data_*.json files into the sharded tree")
+    migrate.add_argument("--source", default=LEGACY_DIR, help="folder holding the old user_data_*.json files")
+    migrate.add_argument("--dry-run", action="store_true", help="report what would move without moving it")
+
+    where = commands.add_parser("where", help="print the data file of a user")
+    where.add_argument("user_id")
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        counts = migrate_legacy(args.source, args.dry_run)
+        verb = "Would migrate" if args.dry_run else "Migrated"
+        print(f"{verb} {counts['migrated']} file(s) into {USER_DATA_DIR}/ • "
+              f"{counts['already_registered']} already registered • {counts['unreadable']} unreadable")
+        return 1 if counts["unreadable"] else 0
+
+    path = resolve(args.user_id)
+    print(path or f"No data stored for {args.user_id!r}")
+    return 0 if path else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())